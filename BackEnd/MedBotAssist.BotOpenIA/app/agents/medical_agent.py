@@ -55,6 +55,7 @@ class MedicalQueryAgent:
             1. For questions about "how many patients" or "patient count": Use get_patients_summary (returns only statistics, no patient details)
             2. For specific patient details: Use get_patient_by_id ONLY when provided with an IdentificationNumber
             3. For general patient searches: Use search_patients, search_patients_by_name, or filter_patients_by_demographics
+               If search_patients_by_name finds nothing, retry once with search_patients_by_similar_name, which tolerates misspelled names
             4. For creating new patients: Use create_patient when user requests to create/register a new patient
             5. **For questions about medical procedures, protocols, medication instructions, or any instructive content: Use search_instructive_info**
             6. **To see what instructives are available: Use get_available_instructives_list**
@@ -176,8 +177,9 @@ class MedicalQueryAgent:
                 elif msg["role"] == "assistant":
                     chat_history.append(AIMessage(content=msg["content"]))
 
-            # 6. Execute the agent with permission context
-            response = self.agent_executor.invoke({
+            # 6. Execute the agent with permission context; async so the event
+            # loop keeps serving other requests while the agent runs
+            response = await self.agent_executor.ainvoke({
                 "input": f"{permission_context_msg}\nQuery: {message}",
                 "chat_history": chat_history
             })
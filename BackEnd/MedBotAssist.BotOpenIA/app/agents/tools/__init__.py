@@ -7,6 +7,7 @@ This package contains all the tools used by the medical agent, organized by func
 from .patient_search_tools import (
     search_patients,
     search_patients_by_name,
+    search_patients_by_similar_name,
     search_patients_by_condition,
     get_patient_by_id,
     get_patients_summary,
@@ -46,6 +47,7 @@ ALL_TOOLS = [
     search_patients,
     get_patients_summary,
     search_patients_by_name,
+    search_patients_by_similar_name,
     filter_patients_by_demographics,
     search_patients_by_condition,
     get_patient_by_id,
@@ -72,6 +74,7 @@ __all__ = [
     'ALL_TOOLS',
     'search_patients',
     'search_patients_by_name', 
+    'search_patients_by_similar_name',
     'search_patients_by_condition',
     'get_patient_by_id',
     'get_patients_summary',
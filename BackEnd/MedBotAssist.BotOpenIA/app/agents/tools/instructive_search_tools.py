@@ -3,17 +3,24 @@ Tools for searching information in vectorized instructional documents using in-m
 """
 
 import json
+import logging
 from typing import List, Dict, Any, Optional
-from openai import OpenAI
+from openai import AsyncOpenAI
 from langchain.tools import tool
 from app.core.config import settings
 from app.services.permission_context import permission_context
 
+logger = logging.getLogger(__name__)
+
+SEARCH_MODES = ('vector', 'hybrid', 'keyword')
+WARMING_MESSAGE = "The instructional document index is still loading after startup. Please try again in a few moments."
+
 class InstructiveSearchTools:
     """Tools for searching information in instructional documents using in-memory vectorization"""
     
     def __init__(self, vectorization_manager=None):
-        self.openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        # Async so OpenAI calls from the agent and the endpoints do not block the event loop
+        self.async_openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self.vectorization_manager = vectorization_manager
         print("InstructiveSearchTools initialized with in-memory vector storage")
         
@@ -28,40 +35,89 @@ class InstructiveSearchTools:
             return 0
         return self.vectorization_manager.get_document_count()
     
-    def _search_documents(self, query: str, max_results: int = 5) -> List[Dict[str, Any]]:
-        """Search for documents similar to the query."""
+    def _is_warming(self) -> bool:
+        """True while the vector index is still being loaded or built after startup."""
+        return bool(self.vectorization_manager) and getattr(self.vectorization_manager, 'is_index_warming', False) is True
+    
+    @staticmethod
+    def _resolve_search_mode(query: str, mode: Optional[str] = None) -> str:
+        """Pick the search mode; a query wrapped in double quotes is an exact-term lookup."""
+        stripped = query.strip()
+        if mode is None and len(stripped) > 2 and stripped.startswith('"') and stripped.endswith('"'):
+            return 'keyword'
+        mode = (mode or settings.INSTRUCTIVE_SEARCH_MODE).lower()
+        return mode if mode in SEARCH_MODES else 'hybrid'
+    
+    def _search_with_embedding(self, query: str, query_embedding, max_results: int,
+                               filters: Optional[Dict[str, Any]], mode: str) -> List[Dict[str, Any]]:
+        """Run a 'vector' or 'hybrid' search once the query is embedded."""
+        logger.debug(f"Got query embedding with {len(query_embedding)} dimensions")
+        
+        if mode == 'hybrid':
+            results = self.vectorization_manager.search_hybrid(
+                query=query,
+                query_embedding=query_embedding,
+                top_k=max_results,
+                filters=filters
+            )
+        else:
+            results = self.vectorization_manager.search_similar(
+                query_embedding=query_embedding,
+                top_k=max_results,
+                filters=filters
+            )
+        
+        logger.debug(f"Found {len(results)} similar documents")
+        return results
+    
+    def _search_keywords(self, query: str, max_results: int, filters: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run a BM25-only search, which needs no embedding request."""
+        results = self.vectorization_manager.search_keywords(
+            query.strip().strip('"'),
+            top_k=max_results,
+            filters=filters
+        )
+        logger.debug(f"Found {len(results)} documents by keyword")
+        return results
+    
+    def _can_search(self) -> bool:
         if not self.vectorization_manager:
-            print(f"DEBUG: No vectorization manager available")
-            return []
+            logger.debug("No vectorization manager available")
+            return False
         
         if self.vectorization_manager.get_document_count() == 0:
-            print(f"DEBUG: No documents available in vectorization manager")
+            logger.debug("No documents available in vectorization manager")
+            return False
+        return True
+    
+    async def _asearch_documents(self, query: str, max_results: int = 5, filters: Optional[Dict[str, Any]] = None,
+                                 mode: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Search for documents matching the query, optionally restricted by metadata filters.
+        
+        Modes: 'vector' (embedding similarity), 'hybrid' (similarity fused with
+        BM25 keyword ranking) and 'keyword' (BM25 only, no embedding request).
+        The query is embedded through the manager's async client and query
+        embedding cache, so the event loop is not blocked and repeated or
+        concurrent identical queries do not send new embeddings requests.
+        """
+        if not self._can_search():
             return []
         
         try:
-            # Generate embedding for the query
-            response = self.openai_client.embeddings.create(
-                model=settings.OPENAI_EMBEDDING_MODEL,
-                input=[query]
-            )
-            
-            query_embedding = response.data[0].embedding
-            print(f"DEBUG: Generated query embedding with {len(query_embedding)} dimensions")
+            mode = self._resolve_search_mode(query, mode)
+            if mode == 'keyword':
+                return self._search_keywords(query, max_results, filters)
             
-            # Search for similar documents
-            results = self.vectorization_manager.search_similar(
-                query_embedding=query_embedding,
-                top_k=max_results
-            )
-            
-            print(f"DEBUG: Found {len(results)} similar documents")
-            return results
+            query_embedding = await self.vectorization_manager.embed_query(query)
+            return self._search_with_embedding(query, query_embedding, max_results, filters, mode)
             
         except Exception as e:
             print(f"ERROR: Error searching documents: {e}")
             return []
 
-    def search_instructive_information(self, query: str, max_results: int = 5, min_similarity: float = 0.2) -> Dict[str, Any]:
+    async def search_instructive_information(self, query: str, max_results: int = 5, min_similarity: float = 0.2,
+                                       mode: Optional[str] = None) -> Dict[str, Any]:
         """Search for specific information in vectorized instructional documents."""
         # Validate permissions
         if not permission_context.has_permission('UseAgent'):
@@ -79,6 +135,14 @@ class InstructiveSearchTools:
                     'results': []
                 }
             
+            if self._is_warming():
+                return {
+                    'success': False,
+                    'warming': True,
+                    'error': WARMING_MESSAGE,
+                    'results': []
+                }
+            
             if self.vectorization_manager.get_document_count() == 0:
                 return {
                     'success': False,
@@ -87,12 +151,12 @@ class InstructiveSearchTools:
                 }
             
             # Search for documents
-            results = self._search_documents(query, max_results)
+            results = await self._asearch_documents(query, max_results, mode=mode)
             
-            # Filter by minimum similarity
+            # Filter by minimum similarity (keyword-only results have no similarity)
             filtered_results = [
                 result for result in results 
-                if result['similarity_score'] >= min_similarity
+                if result.get('similarity_score', min_similarity) >= min_similarity
             ]
             
             if not filtered_results:
@@ -108,8 +172,11 @@ class InstructiveSearchTools:
             context_parts = []
             sources = set()
             
-            for result in filtered_results[:3]:  # Top 3 results
-                content = result['content']
+            # Top 3 results, each with its neighbouring chunks
+            for result in self.vectorization_manager.expand_with_neighbors(filtered_results[:3]):
+                content = result['context']
+                if not content:
+                    continue
                 filename = result['metadata'].get('filename', 'unknown')
                 sources.add(filename)
                 context_parts.append(f"From {filename}: {content}")
@@ -126,7 +193,7 @@ QUESTION: {query}
 
 Respond clearly and professionally based solely on the information provided."""
 
-            response = self.openai_client.chat.completions.create(
+            response = await self.async_openai_client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[{"role": "system", "content": system_prompt}],
                 max_tokens=500,
@@ -162,35 +229,36 @@ Respond clearly and professionally based solely on the information provided."""
                     'message': 'Vectorized database not available'
                 }
             
-            document_count = self.vectorization_manager.get_document_count()
-            if document_count == 0:
+            if self._is_warming():
                 return {
                     'success': True,
+                    'warming': True,
                     'instructives': [],
                     'total_files': 0,
-                    'message': 'No documents in vectorized database'
+                    'message': WARMING_MESSAGE
                 }
             
-            # Get unique files from documents
-            files_info = {}
-            for doc_id, doc in self.vectorization_manager.documents.items():
-                filename = doc.metadata.get('filename', 'unknown')
-                file_type = doc.metadata.get('file_type', 'unknown')
-                
-                if filename not in files_info:
-                    files_info[filename] = {
-                        'filename': filename,
-                        'file_type': file_type,
-                        'chunks_count': 0
-                    }
-                files_info[filename]['chunks_count'] += 1
+            # Per-file catalog kept by the manager, read without scanning chunks
+            catalog = self.vectorization_manager.get_file_catalog()
+            if catalog['total_documents'] == 0:
+                return {
+                    'success': True,
+                    'instructives': [],
+                    'total_files': 0,
+                    'index_version': catalog['index_version'],
+                    'index_etag': catalog['etag'],
+                    'message': 'No documents in vectorized database'
+                }
             
-            instructives_list = list(files_info.values())
+            instructives_list = catalog['files']
             
             return {
                 'success': True,
                 'instructives': instructives_list,
                 'total_files': len(instructives_list),
+                'total_chunks': catalog['total_documents'],
+                'index_version': catalog['index_version'],
+                'index_etag': catalog['etag'],
                 'message': f'Found {len(instructives_list)} available instructional documents'
             }
             
@@ -201,7 +269,7 @@ Respond clearly and professionally based solely on the information provided."""
                 'instructives': []
             }
 
-    def search_by_filename(self, filename: str, query: str = "") -> Dict[str, Any]:
+    async def search_by_filename(self, filename: str, query: str = "") -> Dict[str, Any]:
         """Searches for information in a specific file"""
         try:
             if not self.vectorization_manager:
@@ -210,17 +278,19 @@ Respond clearly and professionally based solely on the information provided."""
                     'error': 'Vectorization system not available'
                 }
             
+            if self._is_warming():
+                return {
+                    'success': False,
+                    'warming': True,
+                    'error': WARMING_MESSAGE,
+                    'results': []
+                }
+            
             if not query:
                 query = "document content"
             
-            # Search all documents and filter by filename
-            results = self._search_documents(query, max_results=20)
-            
-            # Filter by filename
-            filtered_results = [
-                result for result in results 
-                if result['metadata'].get('filename') == filename
-            ]
+            # Search only the chunks of the requested file
+            filtered_results = await self._asearch_documents(query, max_results=20, filters={'filename': filename})
             
             if not filtered_results:
                 return {
@@ -249,7 +319,7 @@ instructive_search_tools = None
 
 # LangChain tools to use in the medical agent
 @tool
-def search_instructive_info(query: str) -> str:
+async def search_instructive_info(query: str) -> str:
     """
     Searches for information in vectorized medical instructional documents.
     
@@ -282,13 +352,16 @@ def search_instructive_info(query: str) -> str:
                 print(f"Warning: Could not get vectorization manager: {e}")
                 return "No vectorized instructional documents available in the system."
         
+        if instructive_search_tools._is_warming():
+            return WARMING_MESSAGE
+        
         # Verify we have documents
         document_count = instructive_search_tools._get_document_count()
         if document_count == 0:
             return "No vectorized instructional documents available in the system."
         
-        # Search for documents
-        results = instructive_search_tools._search_documents(query, max_results=5)
+        # Search for documents (shares the query embedding cache and in-flight requests)
+        results = await instructive_search_tools._asearch_documents(query, max_results=5)
         
         if not results:
             return "No relevant information found in the instructional documents for your query."
@@ -297,8 +370,11 @@ def search_instructive_info(query: str) -> str:
         context_parts = []
         sources = set()
         
-        for result in results[:3]:  # Top 3 results
-            content = result['content']
+        # Top 3 results, each with its neighbouring chunks
+        for result in instructive_search_tools.vectorization_manager.expand_with_neighbors(results[:3]):
+            content = result['context']
+            if not content:
+                continue
             filename = result['metadata'].get('filename', 'unknown')
             sources.add(filename)
             context_parts.append(f"From {filename}: {content}")
@@ -315,7 +391,7 @@ QUESTION: {query}
 
 Respond clearly and professionally based solely on the information provided."""
 
-        response = instructive_search_tools.openai_client.chat.completions.create(
+        response = await instructive_search_tools.async_openai_client.chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[{"role": "system", "content": system_prompt}],
             max_tokens=500,
@@ -365,33 +441,24 @@ def get_available_instructives_list() -> str:
                 print(f"Warning: Could not get vectorization manager: {e}")
                 return "No vectorization system available."
         
+        if instructive_search_tools._is_warming():
+            return WARMING_MESSAGE
+        
         # Verify we have documents
-        document_count = instructive_search_tools._get_document_count()
+        catalog = instructive_search_tools.vectorization_manager.get_file_catalog()
+        document_count = catalog['total_documents']
         print(f"DEBUG: Document count: {document_count}")
         if document_count == 0:
             return "No instructional documents have been vectorized yet."
         
-        # Get unique files from documents
-        files_info = {}
-        for doc_id, doc in instructive_search_tools.vectorization_manager.documents.items():
-            filename = doc.metadata.get('filename', 'unknown')
-            file_type = doc.metadata.get('file_type', 'unknown')
-            
-            if filename not in files_info:
-                files_info[filename] = {
-                    'filename': filename,
-                    'file_type': file_type,
-                    'chunks_count': 0
-                }
-            files_info[filename]['chunks_count'] += 1
-        
+        files_info = catalog['files']
         if not files_info:
             return "No instructional documents found in the system."
         
         # Format the response
         response_lines = ["**Available Instructional Documents:**\n"]
         
-        for file_info in files_info.values():
+        for file_info in files_info:
             response_lines.append(
                 f"- **{file_info['filename']}** ({file_info['file_type']}) - {file_info['chunks_count']} chunks"
             )
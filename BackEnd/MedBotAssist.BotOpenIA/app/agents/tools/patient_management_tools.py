@@ -6,6 +6,7 @@ To use any of these tools, users must have both the UseAgent and ManagePatients
 """
 
 from typing import Optional
+from datetime import date
 from langchain.tools import tool
 from app.services.database_service import DatabaseService
 from app.services.permission_context import permission_context
@@ -103,7 +104,8 @@ def create_patient(
             logger.info(f"Response text: {response.text}")
             
             if response.status_code == 200 or response.status_code == 201:
-                # Success
+                # Success: the next patient read picks up the new row
+                get_database_service().invalidate_patient_cache()
                 try:
                     result = response.json()
                     patient_id = result.get('patientId', 'N/A')
@@ -216,13 +218,10 @@ def update_patient(
         if not jwt_token:
             return "Error: JWT token for authentication with the external backend not found"
 
-        # 3. Get the raw patient data from database directly
-        patients = get_database_service().get_all_patients()
-        current_patient = None
-        for patient in patients:
-            if patient.get('identification_number') == identification_number:
-                current_patient = patient
-                break
+        # 3. Get the current patient data by exact identification number, from
+        # the database: every field is sent back, so a stale cached value
+        # would overwrite a newer edit
+        current_patient = get_database_service().get_patient_by_identification(identification_number, use_cache=False)
         
         if not current_patient:
             return f"Error: Patient with ID could not be found. '{identification_number}'"
@@ -239,6 +238,9 @@ def update_patient(
         # 6. Handle birth_date formatting
         current_birth_date = current_patient.get('birth_date', '')
         if current_birth_date:
+            # Cached and database rows hold date (or datetime) values
+            if isinstance(current_birth_date, date):
+                current_birth_date = current_birth_date.isoformat()
             # Ensure ISO format with timezone
             if isinstance(current_birth_date, str):
                 if 'T' not in current_birth_date:
@@ -291,7 +293,8 @@ def update_patient(
             logger.info(f"Response text: {response.text}")
             
             if response.status_code == 200 or response.status_code == 204:
-                # Success
+                # Success: the next patient read picks up the change
+                get_database_service().invalidate_patient_cache()
                 updated_fields = []
                 if name is not None:
                     updated_fields.append(f"Nombre: {name}")
@@ -8,8 +8,9 @@ All tools in this module require UseAgent + ViewPatients permissions.
 from typing import Optional
 from langchain.tools import tool
 from app.services.database_service import DatabaseService, normalize_text_for_search
+from app.services.patient_cache import age_on, parse_birth_date
 from .permission_validators import validate_patient_view_permissions
-from datetime import datetime
+from datetime import date
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,6 +30,8 @@ def get_database_service():
 def search_patients(query: str, top_k: int = 5) -> str:
     """
     Search for patients using natural language queries.
+    Matches names, identification numbers, phone numbers, emails and birth
+    dates; patients matching more of the query's words come first.
     
     Args:
         query: Natural language query to search for patients
@@ -48,39 +51,13 @@ def search_patients(query: str, top_k: int = 5) -> str:
         if not has_permission:
             return error_msg
         
-        # 2. Get all patients from database
-        patients = get_database_service().get_all_patients()
+        # 2. Ranked search on the patient term index (name, ID, phone, email, birth date)
+        limited_patients = get_database_service().search_patients(query, top_k)
         
-        if not patients:
-            return "No patients found in the database"
-
-        # 3. Simple text-based filtering using real database fields with normalization
-        normalized_query = normalize_text_for_search(query)
-        query_words = normalized_query.split()
-        matching_patients = []
-        
-        for patient in patients:
-            # Create searchable text from real patient data and normalize it
-            patient_text = f"""
-            {patient.get('full_name', '')} 
-            {patient.get('identification_number', '')} 
-            {patient.get('birth_date', '')}
-            {patient.get('phone', '')}
-            {patient.get('email', '')}
-            """
-            normalized_patient_text = normalize_text_for_search(patient_text)
-            
-            # Check if any query terms match using normalized text
-            if any(word in normalized_patient_text for word in query_words):
-                matching_patients.append(patient)
-        
-        if not matching_patients:
+        if not limited_patients:
             return f"No patients found matching '{query}'"
         
-        # 4. Limit results
-        limited_patients = matching_patients[:top_k]
-        
-        # 5. Convert to natural language descriptions
+        # 3. Convert to natural language descriptions
         descriptions = get_database_service().convert_patients_to_natural_language(limited_patients)
 
         response = f"Found {len(limited_patients)} patients matching '{query}':\n\n"
@@ -98,7 +75,9 @@ def search_patients(query: str, top_k: int = 5) -> str:
 @tool
 def search_patients_by_name(name: str) -> str:
     """
-    Search for patients by name (partial matches allowed).
+    Search for patients by name (partial matches allowed, accents and case ignored).
+    Best matches come first: exact name, then names starting with the search,
+    then names containing every searched word.
     
     Args:
         name: Patient name to search for
@@ -111,7 +90,7 @@ def search_patients_by_name(name: str) -> str:
         if not has_permission:
             return error_msg
 
-        # 2. Use the database service's search function
+        # 2. Use the database service's search function (in-memory name index)
         matching_patients = get_database_service().search_patients_by_name(name)
         
         if not matching_patients:
@@ -132,6 +111,47 @@ def search_patients_by_name(name: str) -> str:
         return f"Error searching patients: {str(e)}"
 
 
+@tool
+def search_patients_by_similar_name(name: str, max_distance: int = 2, top_k: int = 10) -> str:
+    """
+    Search for patients by name tolerating spelling mistakes and typos
+    (e.g. "Gonzales" finds "González", "Rodrigez" finds "Rodríguez").
+    Use it when search_patients_by_name finds nothing for a name.
+    
+    Args:
+        name: Patient name to search for, possibly misspelled
+        max_distance: Character edits allowed per word, 0 to 2 (default: 2)
+        top_k: Maximum number of results to return (default: 10)
+        
+    **Requires Permissions:** UseAgent, ViewPatients
+    """
+    try:
+        # 1. Check permissions
+        has_permission, error_msg = validate_patient_view_permissions()
+        if not has_permission:
+            return error_msg
+        
+        # 2. Typo-tolerant search on the name index, closest names first
+        matching_patients = get_database_service().fuzzy_search_patients_by_name(name, max_distance, top_k)
+        
+        if not matching_patients:
+            return f"No patients found with a name similar to '{name}'"
+        
+        # 3. Convert to natural language descriptions
+        descriptions = get_database_service().convert_patients_to_natural_language(matching_patients)
+        
+        response = f"Found {len(matching_patients)} patient(s) with a name similar to '{name}':\n\n"
+        
+        for i, (patient, description) in enumerate(zip(matching_patients, descriptions), 1):
+            response += f"{i}. {description} (name differences: {patient['name_distance']})\n\n"
+        
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error searching patients by similar name: {e}")
+        return f"Error searching patients: {str(e)}"
+
+
 @tool
 def search_patients_by_condition(contact_info: str) -> str:
     """
@@ -150,21 +170,17 @@ def search_patients_by_condition(contact_info: str) -> str:
         if not has_permission:
             return error_msg
         
-        patients = get_database_service().get_all_patients()
+        patients = get_database_service().get_cached_patients()
         
         if not patients:
             return "No patients found in the database"
         
-        # 2. Filter by phone or email with normalization for better matching
+        # 2. Filter by phone or email on the pre-normalized fields
         normalized_contact = normalize_text_for_search(contact_info)
-        matching_patients = []
-        
-        for patient in patients:
-            phone = normalize_text_for_search(patient.get('phone', ''))
-            email = normalize_text_for_search(patient.get('email', ''))
-            
-            if normalized_contact in phone or normalized_contact in email:
-                matching_patients.append(patient)
+        matching_patients = [
+            patient.to_dict() for patient in patients
+            if normalized_contact in patient.search_phone or normalized_contact in patient.search_email
+        ]
         
         if not matching_patients:
             return f"No patients found with contact info containing '{contact_info}'"
@@ -200,17 +216,8 @@ def get_patient_by_id(identification_number: str) -> str:
         if not has_permission:
             return error_msg
         
-        patients = get_database_service().get_all_patients()
-        
-        if not patients:
-            return "No patients found in the database"
-        
-        # 2. Search for patient with exact identification number match
-        matching_patient = None
-        for patient in patients:
-            if patient.get('identification_number') == identification_number:
-                matching_patient = patient
-                break
+        # 2. Exact identification number lookup (cache hash map or indexed query)
+        matching_patient = get_database_service().get_patient_by_identification(identification_number)
         
         if not matching_patient:
             return f"No patient found with identification number '{identification_number}'"
@@ -223,15 +230,10 @@ def get_patient_by_id(identification_number: str) -> str:
             response += descriptions[0]
             
             # Add additional details if available
-            if matching_patient.get('birth_date'):
-                try:
-                    birth_date = datetime.fromisoformat(matching_patient['birth_date'].replace('Z', '+00:00'))
-                    today = datetime.now()
-                    age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-                    response += f"  - Calculated Age: {age} years\n"
-                    response += f"  - Phone: {matching_patient.get('phone', 'N/A')}\n"
-                except:
-                    pass
+            birth_date = parse_birth_date(matching_patient.get('birth_date'))
+            if birth_date:
+                response += f"  - Calculated Age: {age_on(birth_date, date.today())} years\n"
+                response += f"  - Phone: {matching_patient.get('phone') or 'N/A'}\n"
             
             return response
         else:
@@ -258,28 +260,20 @@ def get_patients_summary() -> str:
         if not has_permission:
             return error_msg
         
-        patients = get_database_service().get_all_patients()
+        patients = get_database_service().get_cached_patients()
         
         if not patients:
             return "No patients found in the database"
         
         # 2. Calculate basic statistics from real data
         total_patients = len(patients)
-        patients_with_email = sum(1 for p in patients if p.get('email'))
-        patients_with_phone = sum(1 for p in patients if p.get('phone'))
-        patients_with_id = sum(1 for p in patients if p.get('identification_number'))
-        
-        # 3. Calculate age distribution from birth dates
-        ages = []
-        for patient in patients:
-            if patient.get('birth_date'):
-                try:
-                    birth_date = datetime.fromisoformat(patient['birth_date'].replace('Z', '+00:00'))
-                    today = datetime.now()
-                    age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-                    ages.append(age)
-                except:
-                    pass
+        patients_with_email = sum(1 for p in patients if p.email)
+        patients_with_phone = sum(1 for p in patients if p.phone)
+        patients_with_id = sum(1 for p in patients if p.identification_number)
+        
+        # 3. Calculate age distribution from the parsed birth dates
+        today = date.today()
+        ages = [patient.age(today) for patient in patients if patient.birth_date]
         
         avg_age = sum(ages) / len(ages) if ages else 0
         min_age = min(ages) if ages else 0
@@ -329,53 +323,37 @@ def filter_patients_by_demographics(age_min: Optional[int] = None,
         if not has_permission:
             return error_msg
         
-        patients = get_database_service().get_all_patients()
+        patients = get_database_service().get_cached_patients()
         
         if not patients:
             return "No patients found in the database"
         
-        filtered_patients = patients.copy()
+        filtered_patients = list(patients)
         
-        # 2. Age filtering
+        # 2. Age filtering on the parsed birth dates
         if age_min is not None or age_max is not None:
-            age_filtered = []
-            for patient in filtered_patients:
-                if patient.get('birth_date'):
-                    try:
-                        birth_date = datetime.fromisoformat(patient['birth_date'].replace('Z', '+00:00'))
-                        today = datetime.now()
-                        age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-                        
-                        if age_min is not None and age < age_min:
-                            continue
-                        if age_max is not None and age > age_max:
-                            continue
-                        
-                        age_filtered.append(patient)
-                    except:
-                        pass
-            filtered_patients = age_filtered
-        
-        # 3. Email domain filtering with normalization
+            today = date.today()
+            filtered_patients = [
+                p for p in filtered_patients
+                if p.birth_date
+                and (age_min is None or p.age(today) >= age_min)
+                and (age_max is None or p.age(today) <= age_max)
+            ]
+        
+        # 3. Email domain filtering on the pre-normalized email
         if email_domain:
             normalized_domain = normalize_text_for_search(email_domain)
             filtered_patients = [
                 p for p in filtered_patients 
-                if normalize_text_for_search(p.get('email', '')).endswith(normalized_domain)
+                if p.search_email.endswith(normalized_domain)
             ]
         
         # 4. Year of birth filtering
         if year_of_birth:
-            birth_year_filtered = []
-            for patient in filtered_patients:
-                if patient.get('birth_date'):
-                    try:
-                        birth_date = datetime.fromisoformat(patient['birth_date'].replace('Z', '+00:00'))
-                        if birth_date.year == year_of_birth:
-                            birth_year_filtered.append(patient)
-                    except:
-                        pass
-            filtered_patients = birth_year_filtered
+            filtered_patients = [
+                p for p in filtered_patients
+                if p.birth_date and p.birth_date.year == year_of_birth
+            ]
         
         if not filtered_patients:
             return f"No patients found matching the specified criteria"
@@ -394,7 +372,7 @@ def filter_patients_by_demographics(age_min: Optional[int] = None,
         filter_desc = ", ".join(filters)
         
         # 6. Convert to natural language descriptions
-        descriptions = get_database_service().convert_patients_to_natural_language(filtered_patients)
+        descriptions = get_database_service().convert_patients_to_natural_language([p.to_dict() for p in filtered_patients])
 
         response = f"Found {len(filtered_patients)} patient(s) matching criteria: {filter_desc}\n\n"
 
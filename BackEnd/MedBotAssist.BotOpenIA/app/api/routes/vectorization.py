@@ -5,14 +5,15 @@ FastAPI endpoints for document vectorization management.
 All endpoints require JWT authentication with UseAgent permission.
 """
 
-from fastapi import APIRouter, HTTPException, status, Query, Header
+from fastapi import APIRouter, HTTPException, status, Query, Header, Response
 from typing import Optional, Dict, Any
 import logging
 from datetime import datetime
 
 from app.services.vectorization_manager import VectorizationManager
 from app.services.jwt_service import JWTService
-from app.agents.tools.instructive_search_tools import InstructiveSearchTools
+from app.models.schemas import InstructiveBatchSearchRequest
+from app.agents.tools.instructive_search_tools import InstructiveSearchTools, WARMING_MESSAGE
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -89,23 +90,32 @@ def validate_jwt_and_permissions(authorization: str) -> Dict[str, Any]:
             detail=f"Invalid JWT token: {str(e)}"
         )
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
 @router.get("/revectorize-all",
+           status_code=status.HTTP_202_ACCEPTED,
            summary="Revectorize all files in the blob container", 
-           description="Clears existing vectors and revectorizes all files from scratch. Requires UseAgent permission and JWT with sasToken claim.")
+           description="Submits a background job that clears existing vectors and revectorizes all files from scratch. Returns the job id to poll at /jobs/{job_id}. Requires UseAgent permission and JWT with sasToken claim.")
 async def revectorize_all(
     authorization: str = Header(None, alias="Authorization")
 ) -> Dict[str, Any]:
     """
-    Delete all existing vectors and revectorize all files in the blob container.
+    Submit a job that deletes all existing vectors and revectorizes all files in the blob container.
     
     This endpoint:
     1. Validates JWT authentication and UseAgent permission
     2. Extracts SAS token from JWT claims for blob storage access
-    3. Clears all existing vectors and logs from ChromaDB
-    4. Lists all files in the Azure Blob Storage container
-    5. Processes each file individually, vectorizing from scratch
-    6. Provides detailed summary of the operation
-    7. Stores the names of vectorized files for tracking
+    3. Queues a background revectorization job and returns its id right away
+    
+    The job clears all existing vectors, lists the container and vectorizes
+    every file. Poll GET /jobs/{job_id} for progress and the final summary.
+    If a revectorization is already queued or running, that job is returned.
     
     Warning: This operation is destructive and cannot be undone.
     All existing vectors will be permanently deleted.
@@ -114,7 +124,7 @@ async def revectorize_all(
         authorization: JWT token with UseAgent permission and sasToken claim
         
     Returns:
-        Operation summary with processed files, failures, and statistics
+        Job id and current job status
         
     Raises:
         HTTPException:
@@ -122,10 +132,14 @@ async def revectorize_all(
             - 403 for insufficient permissions or missing sasToken claim
             - 500 for internal errors
     """
+    return _submit_job('revectorize', authorization)
+
+def _submit_job(kind: str, authorization: str) -> Dict[str, Any]:
+    """Validate the caller and queue an ingestion job of the given kind."""
     try:
         # Validate JWT and permissions
         user_info = validate_jwt_and_permissions(authorization)
-        logger.info(f"API request to revectorize all files by user '{user_info['username']}'")
+        logger.info(f"API request to submit {kind} job by user '{user_info['username']}'")
         
         # Extract SAS token from JWT
         token = authorization.split(" ")[1]
@@ -134,25 +148,197 @@ async def revectorize_all(
         if not sas_token:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail="SAS token not found in JWT. Cannot access blob storage for revectorization."
+                detail=f"SAS token not found in JWT. Cannot access blob storage for {kind}."
             )
         
-        # Perform complete revectorization
-        result = await vectorization_manager.revectorize_all(sas_token)
-        result["requested_by"] = user_info["username"]
+        job = vectorization_manager.submit_ingestion_job(kind, sas_token, requested_by=user_info["username"])
         
-        logger.info(f"Revectorization completed by '{user_info['username']}': {result.get('files_processed', 0)} files processed")
-        return result
+        return {
+            "status": "accepted",
+            "message": f"{kind.capitalize()} job {job.status}. Poll /api/v1/vectorization/jobs/{job.id} for progress.",
+            "job_id": job.id,
+            "job": job.to_dict(),
+            "requested_by": user_info["username"]
+        }
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in revectorize_all endpoint: {e}")
+        logger.error(f"Unexpected error submitting {kind} job: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
         )
 
+@router.post("/jobs",
+            status_code=status.HTTP_202_ACCEPTED,
+            summary="Submit a background ingestion job",
+            description="Queues a 'revectorize' or 'sync' job. Jobs run one at a time. Requires UseAgent permission and JWT with sasToken claim.")
+async def submit_job(
+    kind: str = Query(..., description="Job kind: revectorize or sync", pattern="^(revectorize|sync)$"),
+    authorization: str = Header(None, alias="Authorization")
+) -> Dict[str, Any]:
+    """
+    Queue a background ingestion job.
+    
+    Args:
+        kind: 'revectorize' (clear and rebuild) or 'sync' (incremental)
+        authorization: JWT token with UseAgent permission and sasToken claim
+        
+    Returns:
+        Job id and current job status
+    """
+    return _submit_job(kind, authorization)
+
+@router.get("/jobs",
+           summary="List ingestion jobs",
+           description="Lists queued, running and recently finished ingestion jobs. Requires UseAgent permission.")
+async def list_jobs(
+    authorization: str = Header(None, alias="Authorization")
+) -> Dict[str, Any]:
+    """
+    List ingestion jobs, newest first.
+    
+    Args:
+        authorization: JWT token with UseAgent permission
+        
+    Returns:
+        Jobs with their status and progress
+    """
+    validate_jwt_and_permissions(authorization)
+    jobs = vectorization_manager.jobs.list_jobs()
+    return {
+        "status": "success",
+        "total_jobs": len(jobs),
+        "jobs": [job.to_dict() for job in jobs]
+    }
+
+@router.get("/jobs/{job_id}",
+           summary="Get ingestion job status",
+           description="Returns status, per-file progress, throughput and ETA of an ingestion job. Requires UseAgent permission.")
+async def get_job(
+    job_id: str,
+    include_files: bool = Query(False, description="Include the status of every file"),
+    authorization: str = Header(None, alias="Authorization")
+) -> Dict[str, Any]:
+    """
+    Get the status of an ingestion job.
+    
+    Args:
+        job_id: Id returned when the job was submitted
+        include_files: Include per-file status, chunk counts and errors
+        authorization: JWT token with UseAgent permission
+        
+    Returns:
+        Job status, progress and, once finished, its result
+        
+    Raises:
+        HTTPException:
+            - 401/403 for authentication errors
+            - 404 if the job does not exist
+    """
+    validate_jwt_and_permissions(authorization)
+    job = vectorization_manager.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job '{job_id}' not found")
+    return job.to_dict(include_files=include_files)
+
+@router.get("/stats",
+           summary="Get vector index statistics",
+           description="Returns document, index, embedding cache and memory statistics, including bytes per chunk. Requires UseAgent permission.")
+async def get_stats(
+    authorization: str = Header(None, alias="Authorization")
+) -> Dict[str, Any]:
+    """
+    Get vector index statistics.
+
+    'memory' reports the bytes held by embeddings, chunk rows, the text
+    arena, ids and metadata records, with bytes_per_chunk for the current
+    layout and legacy_bytes_per_chunk estimated for the previous
+    one-object-per-chunk layout.
+
+    Args:
+        authorization: JWT token with UseAgent permission
+
+    Returns:
+        Vectorization statistics of the published index
+    """
+    validate_jwt_and_permissions(authorization)
+    return {
+        "status": "success",
+        **vectorization_manager.get_vectorization_stats()
+    }
+
+@router.delete("/jobs/{job_id}",
+              summary="Cancel an ingestion job",
+              description="Cancels a queued or running ingestion job. The index stays as it was before the job. Requires UseAgent permission.")
+async def cancel_job(
+    job_id: str,
+    authorization: str = Header(None, alias="Authorization")
+) -> Dict[str, Any]:
+    """
+    Cancel a queued or running ingestion job.
+    
+    Args:
+        job_id: Id returned when the job was submitted
+        authorization: JWT token with UseAgent permission
+        
+    Returns:
+        Job status after the cancellation request
+        
+    Raises:
+        HTTPException:
+            - 401/403 for authentication errors
+            - 404 if the job does not exist
+            - 409 if the job already finished
+    """
+    user_info = validate_jwt_and_permissions(authorization)
+    job = vectorization_manager.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job '{job_id}' not found")
+    if not job.is_active:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job '{job_id}' already {job.status}")
+    
+    vectorization_manager.jobs.cancel(job_id)
+    logger.info(f"Ingestion job {job_id} cancelled by '{user_info['username']}'")
+    return job.to_dict()
+
+
+@router.post("/sync",
+            status_code=status.HTTP_202_ACCEPTED,
+            summary="Incrementally sync vectors with the blob container",
+            description="Submits a background job that re-vectorizes only new or changed files (by etag) and drops vectors of deleted files. Returns the job id to poll at /jobs/{job_id}. Requires UseAgent permission and JWT with sasToken claim.")
+async def sync_vectors(
+    authorization: str = Header(None, alias="Authorization")
+) -> Dict[str, Any]:
+    """
+    Submit a job that incrementally syncs the vector store with the blob container.
+    
+    This endpoint:
+    1. Validates JWT authentication and UseAgent permission
+    2. Extracts SAS token from JWT claims for blob storage access
+    3. Queues a background sync job and returns its id right away
+    
+    The job diffs the container listing against the vectorization log by
+    etag, vectorizes new and changed files, removes vectors of files no
+    longer in the container and leaves unchanged files untouched. Poll
+    GET /jobs/{job_id} for progress and the final summary with new, changed,
+    deleted and unchanged file counts. If a sync is already queued or
+    running, that job is returned.
+    
+    Args:
+        authorization: JWT token with UseAgent permission and sasToken claim
+        
+    Returns:
+        Job id and current job status
+        
+    Raises:
+        HTTPException:
+            - 401 for authentication errors
+            - 403 for insufficient permissions or missing sasToken claim
+            - 500 for internal errors
+    """
+    return _submit_job('sync', authorization)
 
 
 @router.delete("/clear-vectors",
@@ -189,7 +375,7 @@ async def clear_all_vectors(
         initial_logs = len(vectorization_manager.vectorization_log)
         
         # Clear all documents and logs from memory
-        vectorization_manager.clear_all_documents()
+        await vectorization_manager.clear_index()
         
         result = {
             "status": "success",
@@ -238,6 +424,7 @@ async def search_instructives(
     query: str = Query(..., description="Search query for instructives"),
     max_results: int = Query(5, description="Maximum number of results", ge=1, le=20),
     min_similarity: float = Query(0.7, description="Minimum similarity threshold", ge=0.0, le=1.0),
+    mode: Optional[str] = Query(None, description="Search mode: vector, hybrid or keyword (no embedding request)", pattern="^(vector|hybrid|keyword)$"),
     authorization: str = Header(None, alias="Authorization")
 ) -> Dict[str, Any]:
     """
@@ -251,6 +438,7 @@ async def search_instructives(
         query: Search query (e.g., "insulin administration procedure")
         max_results: Maximum number of results to return (1-20)
         min_similarity: Minimum similarity score (0.0-1.0)
+        mode: Search mode; defaults to INSTRUCTIVE_SEARCH_MODE
         authorization: JWT token with UseAgent permission
     
     Returns:
@@ -271,10 +459,11 @@ async def search_instructives(
         
         # Use the instructive search tools
         instructive_tools = get_instructive_tools()
-        result = instructive_tools.search_instructive_information(
+        result = await instructive_tools.search_instructive_information(
             query=query,
             max_results=max_results,
-            min_similarity=min_similarity
+            min_similarity=min_similarity,
+            mode=mode
         )
         
         # Add user info to result
@@ -293,20 +482,110 @@ async def search_instructives(
         )
 
 
+@router.post("/search-instructives/batch",
+            summary="Search several queries in vectorized instructives",
+            description="Search vectorized medical instructives for several queries at once. Requires UseAgent permission.")
+async def search_instructives_batch(
+    request: InstructiveBatchSearchRequest,
+    authorization: str = Header(None, alias="Authorization")
+) -> Dict[str, Any]:
+    """
+    Search vectorized medical instructives for several queries at once.
+    
+    All queries are embedded in a single embeddings request and scored
+    together against the vector store, returning the matching chunks for
+    each query without generating a contextual response.
+    
+    Args:
+        request: Queries, maximum results per query and minimum similarity
+        authorization: JWT token with UseAgent permission
+    
+    Returns:
+        Dictionary with the results of each query, in request order
+        
+    Raises:
+        HTTPException:
+            - 401 for authentication errors
+            - 403 for insufficient permissions
+            - 500 for internal errors
+    
+    Example:
+        POST /api/v1/vectorization/search-instructives/batch
+        {"queries": ["insulin administration", "wound care protocol"], "max_results": 3}
+    """
+    try:
+        # Validate JWT and permissions
+        user_info = validate_jwt_and_permissions(authorization)
+        
+        if vectorization_manager.is_index_warming:
+            return {
+                'success': False,
+                'warming': True,
+                'error': WARMING_MESSAGE,
+                'results': [],
+                'requested_by': user_info["username"]
+            }
+        
+        if vectorization_manager.get_document_count() == 0:
+            return {
+                'success': False,
+                'error': 'No documents found in vectorized database',
+                'results': [],
+                'requested_by': user_info["username"]
+            }
+        
+        batch_results = await vectorization_manager.search_queries(request.queries, top_k=request.max_results)
+        
+        results = []
+        for query, query_results in zip(request.queries, batch_results):
+            filtered_results = [
+                result for result in query_results
+                if result['similarity_score'] >= request.min_similarity
+            ]
+            results.append({
+                'query': query,
+                'results': filtered_results,
+                'total_found': len(filtered_results)
+            })
+        
+        logger.info(f"Batch instructive search of {len(request.queries)} queries by '{user_info['username']}'")
+        return {
+            'success': True,
+            'results': results,
+            'total_queries': len(results),
+            'requested_by': user_info["username"]
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in batch instructive search: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error searching instructives: {str(e)}"
+        )
+
+
 @router.get("/available-instructives", 
            summary="Get list of available instructives",
-           description="Get a list of all available instructives in the vector database. Requires UseAgent permission.")
+           description="Get a list of all available instructives in the vector database. Supports If-None-Match: answers 304 while the index version is unchanged. Requires UseAgent permission.")
 async def get_available_instructives(
-    authorization: str = Header(None, alias="Authorization")
+    response: Response,
+    authorization: str = Header(None, alias="Authorization"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match")
 ) -> Dict[str, Any]:
     """
     Get a list of all available instructives in the vector database.
     
     Returns information about what medical documents have been
-    vectorized and are available for searching.
+    vectorized and are available for searching, read from the per-file
+    catalog. The response carries the index version as its ETag; a request
+    whose If-None-Match still matches gets an empty 304.
     
     Args:
+        response: Response used to set the ETag header
         authorization: JWT token with UseAgent permission
+        if_none_match: ETag of a previously received list
     
     Returns:
         Dictionary with list of available instructive documents
@@ -324,9 +603,16 @@ async def get_available_instructives(
         # Validate JWT and permissions
         user_info = validate_jwt_and_permissions(authorization)
         
+        # The list is temporary while the index warms up, so it is not cacheable then
+        if not vectorization_manager.is_index_warming and _etag_matches(if_none_match, vectorization_manager.index_etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": vectorization_manager.index_etag})
+        
         instructive_tools = get_instructive_tools()
         result = instructive_tools.get_available_instructives()
         result["requested_by"] = user_info["username"]
+        if result.get("index_etag") and not result.get("warming"):
+            response.headers["ETag"] = result["index_etag"]
+            response.headers["Cache-Control"] = "private, no-cache"
         
         logger.info(f"Retrieved {result.get('total_files', 0)} available instructives for '{user_info['username']}'")
         return result
@@ -377,7 +663,7 @@ async def search_by_filename(
         user_info = validate_jwt_and_permissions(authorization)
         
         instructive_tools = get_instructive_tools()
-        result = instructive_tools.search_by_filename(filename=filename, query=query)
+        result = await instructive_tools.search_by_filename(filename=filename, query=query)
         result["requested_by"] = user_info["username"]
         
         logger.info(f"Search in file '{filename}' with query '{query}' by '{user_info['username']}' returned {result.get('total_chunks', 0)} chunks")
@@ -26,6 +26,8 @@ class Settings(BaseSettings):
     DB_USER: str = "medicaluser"
     DB_PASSWORD: str = "Admin123!"
     DB_DRIVER: str = "ODBC Driver 17 for SQL Server"  # Use version 17 which is more widely available
+    PATIENT_CACHE_TTL_SECONDS: float = float(os.getenv("PATIENT_CACHE_TTL_SECONDS", "30"))  # 0 checks the database on every read
+    PATIENT_CACHE_MAX_AGE_SECONDS: float = float(os.getenv("PATIENT_CACHE_MAX_AGE_SECONDS", "3600"))  # full reload interval
     
     # JWT Configuration
     JWT_SECRET: str = os.getenv("JWT_SECRET", "")
@@ -46,7 +48,32 @@ class Settings(BaseSettings):
     VECTOR_DB_PATH: str = os.getenv("VECTOR_DB_PATH", "./chroma_db")
     DEFAULT_COLLECTION_NAME: str = os.getenv("DEFAULT_COLLECTION_NAME", "medical_documents")
     CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "200"))
-    CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "120"))
+    CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "0"))  # words carried between chunks of a section
+    VECTOR_SYNC_INTERVAL_MINUTES: int = int(os.getenv("VECTOR_SYNC_INTERVAL_MINUTES", "0"))  # 0 disables the periodic sync
+    INGESTION_MAX_CONCURRENT_DOWNLOADS: int = int(os.getenv("INGESTION_MAX_CONCURRENT_DOWNLOADS", "8"))
+    INGESTION_EXTRACTION_WORKERS: int = int(os.getenv("INGESTION_EXTRACTION_WORKERS", "2"))
+    INGESTION_EXTRACTION_EXECUTOR: str = os.getenv("INGESTION_EXTRACTION_EXECUTOR", "process")  # process or thread
+    PDF_PAGES_PER_TASK: int = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+    INGESTION_MAX_CONCURRENT_EMBEDDINGS: int = int(os.getenv("INGESTION_MAX_CONCURRENT_EMBEDDINGS", "4"))
+    EMBEDDING_BATCH_MAX_TOKENS: int = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "100000"))
+    EMBEDDING_BATCH_MAX_INPUTS: int = int(os.getenv("EMBEDDING_BATCH_MAX_INPUTS", "2048"))
+    EMBEDDING_BATCH_LINGER_MS: int = int(os.getenv("EMBEDDING_BATCH_LINGER_MS", "20"))
+    EMBEDDING_MAX_RETRIES: int = int(os.getenv("EMBEDDING_MAX_RETRIES", "4"))
+    EMBEDDING_RETRY_BASE_DELAY: float = float(os.getenv("EMBEDDING_RETRY_BASE_DELAY", "1.0"))
+    EMBEDDING_CACHE_MAX_ENTRIES: int = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "20000"))  # 0 disables the cache
+    QUERY_EMBEDDING_CACHE_MAX_ENTRIES: int = int(os.getenv("QUERY_EMBEDDING_CACHE_MAX_ENTRIES", "1000"))  # 0 disables the cache
+    QUERY_EMBEDDING_CACHE_TTL_SECONDS: float = float(os.getenv("QUERY_EMBEDDING_CACHE_TTL_SECONDS", "3600"))  # 0 keeps entries until evicted
+    VECTOR_STORAGE_DTYPE: str = os.getenv("VECTOR_STORAGE_DTYPE", "float32")  # float32, float16 or int8
+    VECTOR_RERANK_CANDIDATES: int = int(os.getenv("VECTOR_RERANK_CANDIDATES", "0"))  # 0 disables full-precision re-ranking
+    VECTOR_INDEX_TYPE: str = os.getenv("VECTOR_INDEX_TYPE", "exact")  # exact or ivf
+    VECTOR_IVF_LISTS: int = int(os.getenv("VECTOR_IVF_LISTS", "0"))  # 0 uses sqrt(chunk count)
+    VECTOR_IVF_PROBES: int = int(os.getenv("VECTOR_IVF_PROBES", "8"))
+    VECTOR_ANN_MIN_DOCUMENTS: int = int(os.getenv("VECTOR_ANN_MIN_DOCUMENTS", "10000"))  # smaller indexes are searched exactly
+    INSTRUCTIVE_SEARCH_MODE: str = os.getenv("INSTRUCTIVE_SEARCH_MODE", "hybrid")  # vector, hybrid or keyword
+    INSTRUCTIVE_CONTEXT_WINDOW: int = int(os.getenv("INSTRUCTIVE_CONTEXT_WINDOW", "1"))  # neighbouring chunks added to each hit's context
+    PERSIST_VECTOR_INDEX: bool = os.getenv("PERSIST_VECTOR_INDEX", "true").lower() == "true"
+    VECTOR_INDEX_SHARED: bool = os.getenv("VECTOR_INDEX_SHARED", "false").lower() == "true"  # one ingesting worker, others map its snapshot
+    VECTOR_INDEX_REFRESH_SECONDS: float = float(os.getenv("VECTOR_INDEX_REFRESH_SECONDS", "5"))
     
     # Logging Configuration
     LOG_LEVEL: str = "INFO"
@@ -61,3 +61,15 @@ class ConversationHistoryResponse(BaseModel):
     messages: List[Dict[str, Any]] = Field(..., description="Conversation messages")
     total_messages: int = Field(..., description="Total number of messages")
     timestamp: datetime = Field(default_factory=datetime.utcnow, description="Response timestamp")
+
+# Instructive Search Schemas
+class InstructiveBatchSearchRequest(BaseModel):
+    queries: List[str] = Field(
+        ...,
+        description="Search queries for instructives",
+        min_length=1,
+        max_length=50,
+        example=["insulin administration", "wound care protocol"]
+    )
+    max_results: int = Field(default=5, description="Maximum number of results per query", ge=1, le=20)
+    min_similarity: float = Field(default=0.7, description="Minimum similarity threshold", ge=0.0, le=1.0)
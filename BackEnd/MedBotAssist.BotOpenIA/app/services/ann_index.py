@@ -0,0 +1,256 @@
+"""
+Approximate nearest-neighbour index for MedBot Assistant
+
+Inverted-file (IVF) index over the rows of the in-memory vector store. The
+normalized embeddings are clustered with spherical k-means; each row is
+assigned to its closest centroid, and a query only scores the rows of its
+n_probe closest clusters instead of the whole matrix. The index stores row
+numbers only, so the embeddings themselves stay in the vector store.
+"""
+
+from typing import List, Dict, Any, Optional
+import copy
+import logging
+import os
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CENTROIDS_FILE = "ivf_centroids.npy"
+ASSIGNMENTS_FILE = "ivf_assignments.npy"
+
+# Rows compared against the centroids at a time, bounding temporary memory
+ASSIGNMENT_BLOCK_ROWS = 8192
+
+# Training rows sampled per list for k-means
+TRAINING_ROWS_PER_LIST = 40
+
+class IVFIndex:
+    """
+    Inverted lists of store rows keyed by their closest k-means centroid.
+
+    The index is trained once the store reaches min_rows and retrained when
+    the store has grown to retrain_factor times the size it was trained on,
+    so cluster sizes stay balanced as files are added.
+    """
+
+    def __init__(self, n_lists: int = 0, n_probe: int = 8, min_rows: int = 10000,
+                 kmeans_iterations: int = 10, retrain_factor: float = 4.0, seed: int = 0):
+        """
+        Initialize an untrained index.
+
+        Args:
+            n_lists: Number of clusters; 0 picks sqrt(rows) at training time
+            n_probe: Clusters scanned per query; higher is slower and more exact
+            min_rows: Stores smaller than this are searched exactly
+            kmeans_iterations: Lloyd iterations when training
+            retrain_factor: Growth since the last training that triggers a retrain
+            seed: Seed for the training sample and initial centroids
+        """
+        self.n_lists = n_lists
+        self.n_probe = max(n_probe, 1)
+        self.min_rows = min_rows
+        self.kmeans_iterations = kmeans_iterations
+        self.retrain_factor = retrain_factor
+        self.seed = seed
+
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._trained_rows = 0
+        # Rows sorted by list, with list boundaries; rebuilt lazily after writes
+        self._list_rows: Optional[np.ndarray] = None
+        self._list_offsets: Optional[np.ndarray] = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    def needs_training(self, size: int) -> bool:
+        """Whether a store with size rows should (re)train the index."""
+        if size < self.min_rows:
+            return False
+        return not self.is_trained or size > self._trained_rows * self.retrain_factor
+
+    def is_active(self, size: int) -> bool:
+        """Whether searches over size rows should go through the index."""
+        return self.is_trained and size >= self.min_rows and self._assignments.shape[0] == size
+
+    def train(self, vectors: np.ndarray):
+        """
+        Cluster the rows and assign every row to its closest centroid.
+
+        Args:
+            vectors: Normalized float32 rows of the store, in row order
+        """
+        size = vectors.shape[0]
+        n_lists = self.n_lists or int(np.sqrt(size))
+        n_lists = max(1, min(n_lists, size))
+
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(size, n_lists * TRAINING_ROWS_PER_LIST)
+        sample = np.asarray(vectors[np.sort(rng.choice(size, sample_size, replace=False))], dtype=np.float32)
+
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+        for _ in range(self.kmeans_iterations):
+            labels = self._closest(sample, centroids)
+            counts = np.bincount(labels, minlength=n_lists)
+            order = np.argsort(labels, kind='stable')
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            sums = np.add.reduceat(sample[order], starts[counts > 0], axis=0)
+
+            updated = centroids.copy()
+            updated[counts > 0] = sums
+            # Reseed empty clusters with random sample rows
+            empty = np.flatnonzero(counts == 0)
+            if empty.size:
+                updated[empty] = sample[rng.choice(sample_size, empty.size, replace=False)]
+            norms = np.linalg.norm(updated, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = updated / norms
+
+        self._centroids = centroids.astype(np.float32)
+        self._assignments = self._closest(vectors, self._centroids)
+        self._trained_rows = size
+        self._list_rows = None
+        logger.info(f"IVF index trained: {n_lists} lists over {size} rows")
+
+    @staticmethod
+    def _closest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Index of the most similar centroid for each row."""
+        labels = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], ASSIGNMENT_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + ASSIGNMENT_BLOCK_ROWS], dtype=np.float32)
+            labels[start:start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+        return labels
+
+    def assign(self, rows: List[int], vectors: np.ndarray):
+        """
+        Assign new or overwritten rows to their closest list.
+
+        Args:
+            rows: Store rows, possibly beyond the current end
+            vectors: Normalized float32 vectors for those rows
+        """
+        if not self.is_trained:
+            return
+        rows = np.asarray(rows, dtype=np.int64)
+        end = int(rows.max()) + 1
+        if end > self._assignments.shape[0]:
+            self._assignments = np.concatenate((
+                self._assignments,
+                np.zeros(end - self._assignments.shape[0], dtype=np.int32)
+            ))
+        self._assignments[rows] = self._closest(vectors, self._centroids)
+        self._list_rows = None
+
+    def keep(self, rows: List[int]):
+        """Follow a store compaction that kept only the given rows, in order."""
+        if not self.is_trained:
+            return
+        self._assignments = self._assignments[rows]
+        self._list_rows = None
+
+    def _build_lists(self):
+        """Group row numbers by list so each list is a contiguous slice."""
+        counts = np.bincount(self._assignments, minlength=self._centroids.shape[0])
+        list_rows = np.argsort(self._assignments, kind='stable')
+        # Offsets first: a reader that sees _list_rows set also sees matching offsets
+        self._list_offsets = np.concatenate(([0], np.cumsum(counts)))
+        self._list_rows = list_rows
+
+    def candidates(self, query: np.ndarray, min_candidates: int = 0) -> np.ndarray:
+        """
+        Rows in the clusters closest to a normalized query.
+
+        Args:
+            query: Normalized float32 query vector
+            min_candidates: Keep probing further clusters until at least this
+                many rows are collected
+
+        Returns:
+            Array of store rows, in no particular order
+        """
+        if self._list_rows is None:
+            self._build_lists()
+
+        order = np.argsort(-(self._centroids @ query))
+        lists = []
+        found = 0
+        for position, cluster in enumerate(order):
+            if position >= self.n_probe and found >= min_candidates:
+                break
+            start, end = self._list_offsets[cluster], self._list_offsets[cluster + 1]
+            lists.append(self._list_rows[start:end])
+            found += end - start
+        return np.concatenate(lists) if lists else np.empty(0, dtype=np.int64)
+
+    def copy(self) -> "IVFIndex":
+        """Independent copy; centroids are shared since they are replaced, never modified."""
+        clone = copy.copy(self)
+        clone._assignments = self._assignments.copy()
+        return clone
+
+    def clear(self):
+        """Forget the clusters; the index retrains once the store is large enough."""
+        self._centroids = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._trained_rows = 0
+        self._list_rows = None
+        self._list_offsets = None
+
+    def save(self, directory: str):
+        """Write centroids and row assignments next to the store snapshot."""
+        if not self.is_trained:
+            return
+        np.save(os.path.join(directory, CENTROIDS_FILE), self._centroids)
+        np.save(os.path.join(directory, ASSIGNMENTS_FILE), self._assignments)
+
+    def load(self, directory: str, size: int, dimension: int) -> bool:
+        """
+        Restore the index saved with a store snapshot.
+
+        Args:
+            directory: Snapshot directory
+            size: Number of rows in the loaded store
+            dimension: Embedding dimension of the loaded store
+
+        Returns:
+            True if a matching index was loaded
+        """
+        self.clear()
+        centroids_path = os.path.join(directory, CENTROIDS_FILE)
+        assignments_path = os.path.join(directory, ASSIGNMENTS_FILE)
+        if not (os.path.exists(centroids_path) and os.path.exists(assignments_path)):
+            return False
+
+        try:
+            centroids = np.load(centroids_path)
+            assignments = np.load(assignments_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read IVF index from {directory}: {e}")
+            return False
+
+        if centroids.ndim != 2 or centroids.shape[1] != dimension or assignments.shape != (size,):
+            logger.warning(f"IVF index in {directory} does not match the snapshot, it will be retrained")
+            return False
+
+        self._centroids = centroids.astype(np.float32)
+        self._assignments = assignments.astype(np.int32)
+        self._trained_rows = size
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get list count and list size distribution."""
+        if not self.is_trained:
+            return {'type': 'ivf', 'trained': False, 'min_rows': self.min_rows}
+        counts = np.bincount(self._assignments, minlength=self._centroids.shape[0])
+        return {
+            'type': 'ivf',
+            'trained': True,
+            'lists': int(self._centroids.shape[0]),
+            'n_probe': self.n_probe,
+            'min_rows': self.min_rows,
+            'trained_rows': self._trained_rows,
+            'largest_list': int(counts.max()) if counts.size else 0,
+            'empty_lists': int((counts == 0).sum())
+        }
@@ -0,0 +1,418 @@
+"""
+Columnar chunk storage for MedBot Assistant
+
+Keeps the text and metadata of every chunk without a Python object per chunk:
+
+- metadata shared by the chunks of a file (filename, file type, etag, size,
+  timestamps...) is interned once as a record and referenced by number;
+- per-chunk fields (chunk index, section, pages, character offsets) live in
+  one fixed-width NumPy row array, with section headings interned;
+- chunk texts are UTF-8 encoded back to back in one contiguous byte arena and
+  addressed by offset and length.
+
+Rows line up with the rows of the embedding matrix. Texts and metadata are
+only materialized for the rows a caller asks for (e.g. the top-k hits). The
+row array and the text arena are saved as .npy files and memory-mapped on
+load, like the embeddings.
+"""
+
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+import json
+import logging
+import os
+import sys
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CHUNKS_FILE = "chunks.json"
+CHUNK_ROWS_FILE = "chunk_rows.npy"
+CHUNK_TEXT_FILE = "chunk_text.npy"
+
+# Per-chunk integer metadata stored as row columns
+INT_FIELDS = ('chunk_index', 'page_start', 'page_end', 'char_start', 'char_end')
+# Per-chunk string metadata stored as interned string numbers
+STRING_FIELDS = ('section',)
+CHUNK_FIELDS = INT_FIELDS + STRING_FIELDS
+
+ROW_DTYPE = np.dtype(
+    [('record', np.int32)]
+    + [(field, np.int32) for field in CHUNK_FIELDS]
+    + [('text_length', np.int32), ('text_start', np.int64)]
+)
+
+# Column values for a field missing from the metadata, or set to None
+ABSENT = -1
+NONE = -2
+INT32_MAX = np.iinfo(np.int32).max
+
+_EMPTY_ROW = np.zeros(1, dtype=ROW_DTYPE)
+for _field in CHUNK_FIELDS:
+    _EMPTY_ROW[_field] = ABSENT
+
+class VectorInMemoryDocument:
+    """A vectorized chunk, materialized from the chunk store on request."""
+
+    __slots__ = ("id", "content", "metadata", "row")
+
+    def __init__(self, id: str, content: str, metadata: Dict[str, Any], row: int):
+        self.id = id
+        self.content = content
+        self.metadata = metadata
+        # Row of this chunk in the store's embedding matrix
+        self.row = row
+
+def _record_key(record: Dict[str, Any]) -> Any:
+    try:
+        return frozenset(record.items())
+    except TypeError:
+        return json.dumps(record, sort_keys=True, default=str)
+
+class ChunkStore:
+    """
+    Chunk ids, texts and metadata by row.
+
+    Rows are appended, overwritten in place, or compacted with keep(); the
+    owner keeps them aligned with its embedding rows.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        """
+        Initialize an empty store.
+
+        Args:
+            initial_capacity: Rows allocated on the first insert
+        """
+        self.initial_capacity = initial_capacity
+        self.clear()
+
+    def clear(self):
+        self._ids: List[str] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._rows = np.zeros(0, dtype=ROW_DTYPE)
+        self._text = np.zeros(0, dtype=np.uint8)
+        self._text_used = 0
+        # Bytes of overwritten texts still in the arena
+        self._text_garbage = 0
+        self.records: List[Dict[str, Any]] = []
+        self._record_ids: Dict[Any, int] = {}
+        # Changes whenever records are added or renumbered
+        self.records_version = getattr(self, 'records_version', 0) + 1
+        self._strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        # row -> per-chunk metadata that does not fit the columns
+        self._extras: Dict[int, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._row_by_id
+
+    def row_of(self, doc_id: str) -> Optional[int]:
+        return self._row_by_id.get(doc_id)
+
+    def id_at(self, row: int) -> str:
+        return self._ids[row]
+
+    @property
+    def ids(self) -> List[str]:
+        """Chunk ids in row order (read-only)."""
+        return self._ids
+
+    @property
+    def record_column(self) -> np.ndarray:
+        """Record number of every row."""
+        return self._rows['record'][:len(self._ids)]
+
+    def _intern_record(self, record: Dict[str, Any]) -> int:
+        if self.records and self.records[-1] == record:
+            return len(self.records) - 1
+        key = _record_key(record)
+        record_id = self._record_ids.get(key)
+        if record_id is None:
+            record_id = len(self.records)
+            self.records.append(record)
+            self._record_ids[key] = record_id
+            self.records_version += 1
+        return record_id
+
+    def _intern_string(self, value: str) -> int:
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings.append(value)
+            self._string_ids[value] = string_id
+        return string_id
+
+    def _ensure_row_capacity(self, rows_needed: int):
+        capacity = self._rows.shape[0]
+        if rows_needed <= capacity and self._rows.flags.writeable:
+            return
+        capacity = max(capacity, self.initial_capacity, 1)
+        while capacity < rows_needed:
+            capacity *= 2
+        rows = np.zeros(capacity, dtype=ROW_DTYPE)
+        rows[:len(self._ids)] = self._rows[:len(self._ids)]
+        self._rows = rows
+
+    def _ensure_text_capacity(self, bytes_needed: int):
+        capacity = self._text.shape[0]
+        if bytes_needed <= capacity and self._text.flags.writeable:
+            return
+        capacity = max(capacity, 1 << 16)
+        while capacity < bytes_needed:
+            capacity *= 2
+        text = np.zeros(capacity, dtype=np.uint8)
+        text[:self._text_used] = self._text[:self._text_used]
+        self._text = text
+
+    def _write_text(self, content: str) -> Tuple[int, int]:
+        encoded = content.encode('utf-8')
+        start = self._text_used
+        self._ensure_text_capacity(start + len(encoded))
+        self._text[start:start + len(encoded)] = np.frombuffer(encoded, dtype=np.uint8)
+        self._text_used += len(encoded)
+        return start, len(encoded)
+
+    def put(self, doc_id: str, content: str, metadata: Dict[str, Any]) -> int:
+        """
+        Store a chunk, overwriting the row of an existing id.
+
+        Args:
+            doc_id: Chunk id
+            content: Chunk text
+            metadata: Chunk metadata
+
+        Returns:
+            Row of the chunk
+        """
+        row = self._row_by_id.get(doc_id)
+        if row is None:
+            row = len(self._ids)
+            self._ensure_row_capacity(row + 1)
+            self._ids.append(doc_id)
+            self._row_by_id[doc_id] = row
+        else:
+            self._ensure_row_capacity(len(self._ids))
+            self._text_garbage += int(self._rows['text_length'][row])
+            self._extras.pop(row, None)
+
+        record: Dict[str, Any] = {}
+        extras: Dict[str, Any] = {}
+        values = _EMPTY_ROW.copy()
+        for key, value in metadata.items():
+            if key in INT_FIELDS and (value is None or (type(value) is int and 0 <= value <= INT32_MAX)):
+                values[key] = NONE if value is None else value
+            elif key in STRING_FIELDS and (value is None or isinstance(value, str)):
+                values[key] = NONE if value is None else self._intern_string(value)
+            elif key in CHUNK_FIELDS:
+                extras[key] = value
+            else:
+                record[key] = value
+
+        values['record'] = self._intern_record(record)
+        values['text_start'], values['text_length'] = self._write_text(content)
+        self._rows[row] = values[0]
+        if extras:
+            self._extras[row] = extras
+
+        if self._text_garbage > max(self._text_used // 2, 1 << 20):
+            self._compact(range(len(self._ids)))
+        return row
+
+    def content(self, row: int) -> str:
+        """Text of a row, decoded from the arena."""
+        start = int(self._rows['text_start'][row])
+        return self._text[start:start + int(self._rows['text_length'][row])].tobytes().decode('utf-8')
+
+    def field(self, row: int, key: str, default: Any = None) -> Any:
+        """One metadata field of a row, without materializing the rest."""
+        if key in CHUNK_FIELDS:
+            value = int(self._rows[key][row])
+            if value == ABSENT:
+                return self._extras.get(row, {}).get(key, default)
+            if value == NONE:
+                return None
+            return self._strings[value] if key in STRING_FIELDS else value
+        return self.records[int(self._rows['record'][row])].get(key, default)
+
+    def metadata(self, row: int) -> Dict[str, Any]:
+        """Metadata dictionary of a row (a new dict each call)."""
+        values = self._rows[row]
+        metadata = dict(self.records[int(values['record'])])
+        for key in CHUNK_FIELDS:
+            value = int(values[key])
+            if value == NONE:
+                metadata[key] = None
+            elif value != ABSENT:
+                metadata[key] = self._strings[value] if key in STRING_FIELDS else value
+        metadata.update(self._extras.get(row, {}))
+        return metadata
+
+    def document(self, row: int) -> VectorInMemoryDocument:
+        return VectorInMemoryDocument(self._ids[row], self.content(row), self.metadata(row), row)
+
+    def keep(self, keep_rows: Sequence[int]):
+        """
+        Keep only the given rows, in that order, renumbering them from 0.
+
+        Unreferenced records and overwritten texts are dropped.
+        """
+        self._compact(keep_rows)
+
+    def _compact(self, keep_rows: Sequence[int]):
+        compacted = self._compacted(keep_rows)
+        self._ids = compacted._ids
+        self._row_by_id = compacted._row_by_id
+        self._rows = compacted._rows
+        self._text = compacted._text
+        self._text_used = compacted._text_used
+        self._text_garbage = 0
+        self.records = compacted.records
+        self._record_ids = compacted._record_ids
+        self.records_version += 1
+        self._extras = compacted._extras
+
+    def _compacted(self, keep_rows: Sequence[int]) -> "ChunkStore":
+        """New store holding only the given rows, without overwritten texts; self is not changed."""
+        keep = np.asarray(keep_rows, dtype=np.int64)
+        rows = np.array(self._rows[keep])
+
+        # Records still referenced, renumbered
+        used_records, rows['record'] = np.unique(rows['record'], return_inverse=True)
+        records = [self.records[record_id] for record_id in used_records]
+
+        text = np.zeros(max(int(rows['text_length'].sum()), 1), dtype=np.uint8)
+        position = 0
+        for i, (start, length) in enumerate(zip(rows['text_start'].tolist(), rows['text_length'].tolist())):
+            text[position:position + length] = self._text[start:start + length]
+            rows['text_start'][i] = position
+            position += length
+
+        compacted = ChunkStore(self.initial_capacity)
+        compacted._ids = [self._ids[row] for row in keep.tolist()]
+        compacted._row_by_id = {doc_id: row for row, doc_id in enumerate(compacted._ids)}
+        compacted._rows = rows
+        compacted._text = text
+        compacted._text_used = position
+        compacted.records = records
+        compacted._record_ids = {_record_key(record): record_id for record_id, record in enumerate(records)}
+        compacted.records_version = self.records_version + 1
+        # Strings keep their numbers, so the interned lists are shared
+        compacted._strings = self._strings
+        compacted._string_ids = self._string_ids
+        compacted._extras = {new_row: self._extras[old_row] for new_row, old_row in enumerate(keep.tolist()) if old_row in self._extras}
+        return compacted
+
+    def copy(self) -> "ChunkStore":
+        """Independent copy; records are shared and must not be modified in place."""
+        clone = ChunkStore(self.initial_capacity)
+        clone._ids = list(self._ids)
+        clone._row_by_id = dict(self._row_by_id)
+        clone._rows = np.array(self._rows[:len(self._ids)])
+        clone._text = np.array(self._text[:self._text_used])
+        clone._text_used = self._text_used
+        clone._text_garbage = self._text_garbage
+        clone.records = list(self.records)
+        clone._record_ids = dict(self._record_ids)
+        clone.records_version = self.records_version
+        clone._strings = list(self._strings)
+        clone._string_ids = dict(self._string_ids)
+        clone._extras = {row: dict(extras) for row, extras in self._extras.items()}
+        return clone
+
+    def save(self, directory: str):
+        """
+        Write the row array and text arena as .npy files plus a JSON sidecar.
+
+        The store is only read: it may belong to a published generation that
+        searches are using, so overwritten texts are dropped from a compacted
+        copy that is written instead.
+        """
+        store = self._compacted(range(len(self._ids))) if self._text_garbage else self
+        np.save(os.path.join(directory, CHUNK_ROWS_FILE), np.ascontiguousarray(store._rows[:len(store._ids)]))
+        np.save(os.path.join(directory, CHUNK_TEXT_FILE), np.ascontiguousarray(store._text[:store._text_used]))
+        with open(os.path.join(directory, CHUNKS_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                'ids': store._ids,
+                'records': store.records,
+                'strings': store._strings,
+                'extras': {str(row): extras for row, extras in store._extras.items()}
+            }, f, ensure_ascii=False, separators=(',', ':'))
+
+    def load(self, directory: str) -> bool:
+        """
+        Replace the contents with files written by save(), memory-mapping the
+        row array and the text arena read-only.
+
+        Returns:
+            True if the files were loaded, False if they are missing or inconsistent
+        """
+        paths = [os.path.join(directory, name) for name in (CHUNKS_FILE, CHUNK_ROWS_FILE, CHUNK_TEXT_FILE)]
+        if not all(os.path.exists(path) for path in paths):
+            return False
+        try:
+            with open(paths[0], "r", encoding="utf-8") as f:
+                sidecar = json.load(f)
+            rows = np.load(paths[1], mmap_mode='r')
+            text = np.load(paths[2], mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read chunk store from {directory}: {e}")
+            return False
+
+        ids = sidecar.get('ids', [])
+        if rows.dtype != ROW_DTYPE or rows.shape != (len(ids),):
+            logger.warning(f"Chunk store in {directory} is inconsistent: {rows.shape[0]} rows for {len(ids)} ids")
+            return False
+
+        self.clear()
+        self._ids = ids
+        self._row_by_id = {doc_id: row for row, doc_id in enumerate(ids)}
+        self._rows = rows
+        self._text = text
+        self._text_used = text.shape[0]
+        self.records = sidecar.get('records', [])
+        self._record_ids = {_record_key(record): record_id for record_id, record in enumerate(self.records)}
+        self.records_version += 1
+        self._strings = sidecar.get('strings', [])
+        self._string_ids = {value: string_id for string_id, value in enumerate(self._strings)}
+        self._extras = {int(row): extras for row, extras in sidecar.get('extras', {}).items()}
+        return True
+
+    def get_memory_stats(self) -> Dict[str, int]:
+        """Approximate bytes held by each part of the store."""
+        count = len(self._ids)
+        id_bytes = sys.getsizeof(self._ids) + sys.getsizeof(self._row_by_id) + sum(sys.getsizeof(doc_id) for doc_id in self._ids)
+        record_bytes = sum(sys.getsizeof(record) + sum(sys.getsizeof(value) for value in record.values()) for record in self.records)
+        string_bytes = sum(sys.getsizeof(value) for value in self._strings)
+        extra_bytes = sum(sys.getsizeof(extras) for extras in self._extras.values())
+        return {
+            'chunks': count,
+            'records': len(self.records),
+            'row_bytes': int(self._rows[:count].nbytes),
+            'text_bytes': self._text_used - self._text_garbage,
+            'id_bytes': id_bytes,
+            'record_bytes': record_bytes + string_bytes + extra_bytes
+        }
+
+class ChunkDocuments(Mapping):
+    """Read-only mapping of chunk id to its materialized document."""
+
+    def __init__(self, chunks: ChunkStore):
+        self._chunks = chunks
+
+    def __getitem__(self, doc_id: str) -> VectorInMemoryDocument:
+        row = self._chunks.row_of(doc_id)
+        if row is None:
+            raise KeyError(doc_id)
+        return self._chunks.document(row)
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self._chunks
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._chunks.ids))
+
+    def __len__(self) -> int:
+        return len(self._chunks)
@@ -1,37 +1,68 @@
 from typing import List, Dict, Any, Optional
 import pyodbc
-from sqlalchemy import create_engine, text
+from sqlalchemy import bindparam, create_engine, text
 from sqlalchemy.engine import Engine
 from app.core.config import settings
+from app.services.patient_cache import CachedPatient, PatientCache, PatientTableState, normalize_text_for_search
+from app.services.patient_name_index import MAX_FUZZY_DISTANCE, PatientNameIndex
+from app.services.patient_search_index import PatientSearchIndex
 import logging
+import threading
 from datetime import datetime
-import unicodedata
 
 logger = logging.getLogger(__name__)
 
-def normalize_text_for_search(text: str) -> str:
+# Identification numbers per lookup query, well below SQL Server's 2100 parameters
+IDENTIFICATION_LOOKUP_BATCH_SIZE = 1000
+
+# Shared by every DatabaseService instance, created on first use
+_patient_cache: Optional[PatientCache] = None
+_patient_cache_lock = threading.Lock()
+
+def get_patient_cache() -> PatientCache:
+    """Get the process-wide patient cache."""
+    global _patient_cache
+    with _patient_cache_lock:
+        if _patient_cache is None:
+            service = DatabaseService()
+            _patient_cache = PatientCache(
+                load_rows=service.load_patient_rows,
+                load_state=service.load_patient_table_state,
+                ttl_seconds=settings.PATIENT_CACHE_TTL_SECONDS,
+                max_age_seconds=settings.PATIENT_CACHE_MAX_AGE_SECONDS
+            )
+        return _patient_cache
+
+# Indexes of the current cache snapshot by name, rebuilt when the snapshot changes
+_patient_indexes: Dict[str, Any] = {}
+_patient_indexes_lock = threading.Lock()
+
+def _get_patient_index(name: str, index_class):
     """
-    Normalizes text for more flexible searches.
-    Removes accents, converts to lowercase, and removes extra spaces.
+    Get an index of the current patient cache snapshot.
     
-    Examples:
-    - "Sánchez García" -> "sanchez garcia"
-    - "José María" -> "jose maria"
-    - "PÉREZ" -> "perez"
+    Refreshes the cache if it is due, and rebuilds the index when the
+    snapshot changed, e.g. after a patient was created or updated.
     """
-    if not text:
-        return ""
+    patients = get_patient_cache().get_patients()
+    with _patient_indexes_lock:
+        index = _patient_indexes.get(name)
+        if index is None or not index.covers(patients):
+            index = _patient_indexes[name] = index_class(patients)
+        return index
 
-    # Normalize unicode (remove accents)
-    normalized = unicodedata.normalize('NFD', text)
-    # Remove diacritical marks (accents)
-    without_accents = ''.join(char for char in normalized if unicodedata.category(char) != 'Mn')
-    # Convert to lowercase and trim extra spaces
-    clean_text = without_accents.lower().strip()
-    # Normalize multiple spaces to a single space
-    clean_text = ' '.join(clean_text.split())
-    
-    return clean_text
+def get_patient_name_index() -> PatientNameIndex:
+    """Get the accent-insensitive and fuzzy name index of the current patient snapshot."""
+    return _get_patient_index('patient_name_index', PatientNameIndex)
+
+def get_patient_search_index() -> PatientSearchIndex:
+    """Get the multi-field term index of the current patient snapshot."""
+    return _get_patient_index('patient_search_index', PatientSearchIndex)
+
+def get_patient_index_stats() -> Dict[str, Any]:
+    """Get size and build time of the patient indexes built so far."""
+    with _patient_indexes_lock:
+        return {name: index.get_stats() for name, index in _patient_indexes.items()}
 
 class DatabaseService:
     """Service for handling database operations."""
@@ -88,40 +119,185 @@ class DatabaseService:
         raise Exception("Could not connect to database with any available ODBC driver. Please ensure SQL Server ODBC drivers are installed.")
     
     def get_all_patients(self) -> List[Dict[str, Any]]:
+        """
+        Get every patient, ordered by name, from the shared patient cache.
+        
+        Returns:
+            List of patient dictionaries (full_name, identification_number,
+            birth_date, phone, email)
+        """
+        return [patient.to_dict() for patient in self.get_cached_patients()]
+    
+    def get_cached_patients(self) -> List[CachedPatient]:
+        """
+        Get every patient as compact cached rows with normalized search fields.
+        
+        The database is only queried when the cached snapshot is due for a
+        check (see PatientCache); the returned list must not be modified.
+        """
+        try:
+            return get_patient_cache().get_patients()
+        except Exception as e:
+            logger.error(f"Error retrieving patients: {e}")
+            raise
+    
+    def get_patient_by_identification(self, identification_number: str, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Get one patient by identification number (exact match).
+        
+        Args:
+            identification_number: Patient's identification number
+            use_cache: Whether a fresh patient cache may answer; pass False
+                when the result is written back (see get_patients_by_identification)
+            
+        Returns:
+            Patient dictionary, or None if no patient has that number
+        """
+        return self.get_patients_by_identification([identification_number], use_cache).get(identification_number)
+    
+    def get_patients_by_identification(self, identification_numbers: List[str], use_cache: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Resolve many identification numbers at once.
+        
+        While the patient cache is fresh the numbers are resolved from its
+        hash map without touching the database. Otherwise they are resolved
+        with one parameterized query per IDENTIFICATION_LOOKUP_BATCH_SIZE
+        numbers that compares the IdentificationNumber column directly, so an
+        index on it can be used.
+        
+        Args:
+            identification_numbers: Identification numbers (exact match)
+            use_cache: Whether a fresh patient cache may answer. The cache can
+                be up to PATIENT_CACHE_TTL_SECONDS old, so read-modify-write
+                callers such as update_patient pass False to read the database.
+            
+        Returns:
+            Patient dictionaries keyed by identification number; numbers
+            without a patient are left out
+        """
+        wanted = list(dict.fromkeys(number for number in identification_numbers if number))
+        if not wanted:
+            return {}
+        
+        cached = get_patient_cache().find_by_identification(wanted) if use_cache else None
+        if cached is not None:
+            return {number: patient.to_dict() for number, patient in cached.items()}
+        
         try:
             self._ensure_connection()
             query = text("""
                 SELECT 
+                    PatientId,
                     FullName,
                     IdentificationNumber,
                     BirthDate,
                     Phone,
                     Email
                 FROM Patients
-                ORDER BY FullName
-            """)
+                WHERE IdentificationNumber IN :identification_numbers
+                ORDER BY PatientId
+            """).bindparams(bindparam("identification_numbers", expanding=True))
             
+            patients: Dict[str, Dict[str, Any]] = {}
             with self.engine.connect() as conn:
-                result = conn.execute(query)
-                patients = []
-                
-                for row in result:
-                    patient = {
-                        "full_name": row.FullName,
-                        "identification_number": row.IdentificationNumber,
-                        "birth_date": row.BirthDate,
-                        "phone": row.Phone,
-                        "email": row.Email
-                    }
-                    patients.append(patient)
-                
-                logger.info(f"Retrieved {len(patients)} patients from database")
-                return patients
-                
+                for start in range(0, len(wanted), IDENTIFICATION_LOOKUP_BATCH_SIZE):
+                    batch = wanted[start:start + IDENTIFICATION_LOOKUP_BATCH_SIZE]
+                    for row in conn.execute(query, {"identification_numbers": batch}):
+                        # Same rule as the cache: the lowest PatientId wins
+                        patients.setdefault(row.IdentificationNumber, {
+                            "full_name": row.FullName,
+                            "identification_number": row.IdentificationNumber,
+                            "birth_date": row.BirthDate,
+                            "phone": row.Phone,
+                            "email": row.Email
+                        })
+            
+            logger.info(f"Resolved {len(patients)} of {len(wanted)} identification numbers from database")
+            return patients
+            
         except Exception as e:
-            logger.error(f"Error retrieving patients: {e}")
+            logger.error(f"Error looking up patients by identification number: {e}")
             raise
     
+    def invalidate_patient_cache(self):
+        """Make the next patient read check the database, after a patient is created or updated."""
+        get_patient_cache().invalidate()
+    
+    def get_patient_cache_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and refresh timings of the patient cache."""
+        return get_patient_cache().get_stats()
+    
+    def load_patient_rows(self, after_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Read patient rows for the patient cache.
+        
+        Args:
+            after_id: Only read patients with a higher PatientId; None reads all
+            
+        Returns:
+            List of row dictionaries including patient_id
+        """
+        self._ensure_connection()
+        query = """
+            SELECT 
+                PatientId,
+                FullName,
+                IdentificationNumber,
+                BirthDate,
+                Phone,
+                Email
+            FROM Patients
+        """
+        params = {}
+        if after_id is not None:
+            query += " WHERE PatientId > :after_id"
+            params["after_id"] = after_id
+        
+        with self.engine.connect() as conn:
+            result = conn.execute(text(query), params)
+            patients = [
+                {
+                    "patient_id": row.PatientId,
+                    "full_name": row.FullName,
+                    "identification_number": row.IdentificationNumber,
+                    "birth_date": row.BirthDate,
+                    "phone": row.Phone,
+                    "email": row.Email
+                }
+                for row in result
+            ]
+        
+        logger.info(f"Retrieved {len(patients)} patients from database")
+        return patients
+    
+    def load_patient_table_state(self, up_to_id: Optional[int] = None) -> PatientTableState:
+        """
+        Summarize the Patients table so the patient cache can detect changes.
+        
+        Args:
+            up_to_id: Only summarize patients up to this PatientId; None summarizes all
+            
+        Returns:
+            (row count, checksum of the rows) up to up_to_id, and the highest
+            PatientId in the table
+        """
+        self._ensure_connection()
+        query = """
+            SELECT 
+                COUNT(*) AS patient_count,
+                CHECKSUM_AGG(BINARY_CHECKSUM(PatientId, FullName, IdentificationNumber, BirthDate, Phone, Email)) AS patient_checksum,
+                (SELECT MAX(PatientId) FROM Patients) AS max_patient_id
+            FROM Patients
+        """
+        params = {}
+        if up_to_id is not None:
+            query += " WHERE PatientId <= :up_to_id"
+            params["up_to_id"] = up_to_id
+        
+        with self.engine.connect() as conn:
+            row = conn.execute(text(query), params).first()
+        return row.patient_count, row.patient_checksum, row.max_patient_id
+    
     def get_patient_by_id(self, patient_id: int) -> Optional[Dict[str, Any]]:
         try:
             self._ensure_connection()
@@ -158,66 +334,79 @@ class DatabaseService:
             logger.error(f"Error retrieving patient {patient_id}: {e}")
             raise
     
-    def search_patients_by_name(self, name: str) -> List[Dict[str, Any]]:
-        try:
-            self._ensure_connection()
-            # Normalizar el término de búsqueda
-            normalized_search = normalize_text_for_search(name)
-            
-            # Consulta que normaliza los nombres de la BD para comparación
-            query = text("""
-                SELECT 
-                    FullName,
-                    IdentificationNumber,
-                    BirthDate,
-                    Phone,
-                    Email
-                FROM Patients
-                WHERE LOWER(
-                    REPLACE(
-                        REPLACE(
-                            REPLACE(
-                                REPLACE(
-                                    REPLACE(
-                                        REPLACE(
-                                            REPLACE(
-                                                REPLACE(
-                                                    REPLACE(
-                                                        REPLACE(FullName, 'á', 'a'),
-                                                    'é', 'e'),
-                                                'í', 'i'),
-                                            'ó', 'o'),
-                                        'ú', 'u'),
-                                    'ñ', 'n'),
-                                'Á', 'a'),
-                            'É', 'e'),
-                        'Í', 'i'),
-                    'Ó', 'o')
-                ) LIKE :name_pattern
-                ORDER BY FullName
-            """)
+    def search_patients(self, query: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Free-text search over name, identification number, phone, email and
+        birth date, ranked by the number of query terms each patient matches.
+        
+        Args:
+            query: Free text, e.g. "maria 1990 gmail"
+            limit: Maximum number of patients returned; None returns all
             
-            with self.engine.connect() as conn:
-                result = conn.execute(query, {"name_pattern": f"%{normalized_search}%"})
-                patients = []
-                
-                for row in result:
-                    patient = {
-                        "full_name": row.FullName,  # ✅ Mantener datos originales con tildes
-                        "identification_number": row.IdentificationNumber,
-                        "birth_date": row.BirthDate,
-                        "phone": row.Phone,
-                        "email": row.Email
-                    }
-                    patients.append(patient)
+        Returns:
+            Patient dictionaries, best match first
+        """
+        try:
+            patients = [patient.to_dict() for patient, _ in get_patient_search_index().search(query, limit)]
+            logger.info(f"Found {len(patients)} patients matching '{query}'")
+            return patients
                 
-                logger.info(f"Found {len(patients)} patients matching '{name}'")
-                return patients
+        except Exception as e:
+            logger.error(f"Error searching patients for '{query}': {e}")
+            raise
+    
+    def search_patients_by_name(self, name: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Search patients by name, ignoring accents, case and extra spaces.
+        
+        Uses the in-process name index of the patient cache (see
+        PatientNameIndex) instead of normalizing FullName in SQL, which
+        scanned the whole table.
+        
+        Args:
+            name: Name or part of a name
+            limit: Maximum number of patients returned; None returns all
+            
+        Returns:
+            Patient dictionaries, best match first (exact name, name prefix,
+            word prefixes, substring)
+        """
+        try:
+            patients = [patient.to_dict() for patient in get_patient_name_index().search(name, limit)]
+            logger.info(f"Found {len(patients)} patients matching '{name}'")
+            return patients
                 
         except Exception as e:
             logger.error(f"Error searching patients by name '{name}': {e}")
             raise
     
+    def fuzzy_search_patients_by_name(self, name: str, max_distance: int = MAX_FUZZY_DISTANCE,
+                                      limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Search patients by name tolerating typos, e.g. "Gonzales" for "González".
+        
+        Args:
+            name: Name or part of a name, possibly misspelled
+            max_distance: Edits allowed per word (at most MAX_FUZZY_DISTANCE)
+            limit: Maximum number of patients returned; None returns all
+            
+        Returns:
+            Patient dictionaries with an added "name_distance" (total edits),
+            fewest edits first
+        """
+        try:
+            patients = []
+            for patient, distance in get_patient_name_index().fuzzy_search(name, max_distance, limit):
+                patient_dict = patient.to_dict()
+                patient_dict["name_distance"] = distance
+                patients.append(patient_dict)
+            logger.info(f"Found {len(patients)} patients with a name similar to '{name}'")
+            return patients
+                
+        except Exception as e:
+            logger.error(f"Error fuzzy searching patients by name '{name}': {e}")
+            raise
+    
     def convert_patients_to_natural_language(self, patients: List[Dict[str, Any]]) -> List[str]:
         descriptions = []
         
@@ -280,7 +469,7 @@ class DatabaseService:
             logger.error(f"Error getting patients as natural language: {e}")
             raise
     
-    def check_database_health(self) -> Dict[str, str]:
+    def check_database_health(self) -> Dict[str, Any]:
         try:
             self._ensure_connection()
             with self.engine.connect() as conn:
@@ -290,7 +479,9 @@ class DatabaseService:
                 return {
                     "status": "healthy",
                     "connection": "connected",
-                    "total_patients": str(patient_count)
+                    "total_patients": str(patient_count),
+                    "patient_cache": self.get_patient_cache_stats(),
+                    "patient_indexes": get_patient_index_stats()
                 }
                 
         except Exception as e:
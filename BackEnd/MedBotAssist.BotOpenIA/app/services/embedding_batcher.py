@@ -0,0 +1,246 @@
+"""
+Embedding Batcher for MedBot Assistant
+
+Packs texts from concurrent callers (e.g. several files being vectorized at once)
+into OpenAI embedding requests sized by tiktoken token counts. Failed requests are
+retried with exponential backoff, and requests rejected for their inputs are
+split first, so one bad input only affects its own sub-batch. Each caller gets its embeddings back as soon as
+its own texts are done.
+"""
+
+from typing import List, Dict, Any, Optional
+import asyncio
+import logging
+
+from app.core.config import settings
+
+# tiktoken is used for exact token counts; fall back to an estimate without it
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Per-input token limit of the OpenAI embedding models
+MAX_INPUT_TOKENS = 8191
+
+class _PendingEmbedding:
+    """A text waiting for its embedding."""
+
+    __slots__ = ("text", "tokens", "future")
+
+    def __init__(self, text: str, tokens: int, future: asyncio.Future):
+        self.text = text
+        self.tokens = tokens
+        self.future = future
+
+class EmbeddingBatcher:
+    """
+    Shared, token-aware batching front end for the OpenAI embeddings API.
+    """
+
+    def __init__(self, openai_client, model: str = None, max_batch_tokens: int = None,
+                 max_batch_inputs: int = None, max_concurrent_requests: int = None,
+                 max_retries: int = None, retry_base_delay: float = None, linger_ms: int = None):
+        """
+        Initialize the batcher.
+
+        Args:
+            openai_client: AsyncOpenAI client
+            model: Embedding model name
+            max_batch_tokens: Maximum total tokens per request
+            max_batch_inputs: Maximum number of inputs per request
+            max_concurrent_requests: Maximum embedding requests in flight
+            max_retries: Retries per failed sub-batch before giving up
+            retry_base_delay: First backoff delay in seconds, doubled per retry
+            linger_ms: Time to wait for more texts before sending a partial batch
+        """
+        self.openai_client = openai_client
+        self.model = model or settings.OPENAI_EMBEDDING_MODEL
+        self.max_batch_tokens = max_batch_tokens or settings.EMBEDDING_BATCH_MAX_TOKENS
+        self.max_batch_inputs = max_batch_inputs or settings.EMBEDDING_BATCH_MAX_INPUTS
+        self.max_concurrent_requests = max_concurrent_requests or settings.INGESTION_MAX_CONCURRENT_EMBEDDINGS
+        self.max_retries = settings.EMBEDDING_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_base_delay = settings.EMBEDDING_RETRY_BASE_DELAY if retry_base_delay is None else retry_base_delay
+        self.linger_seconds = (settings.EMBEDDING_BATCH_LINGER_MS if linger_ms is None else linger_ms) / 1000
+
+        # Loaded on first use: tiktoken may download its BPE file
+        self._encoding = None
+        self._encoding_loaded = False
+
+        # Queue, worker and request semaphore are bound to the running event loop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._request_semaphore: Optional[asyncio.Semaphore] = None
+        # Strong references to in-flight request tasks
+        self._requests: set = set()
+
+        self.stats = {
+            'requests': 0,
+            'inputs': 0,
+            'tokens': 0,
+            'retries': 0,
+            'failed_inputs': 0
+        }
+
+    def _load_encoding(self):
+        """Get the tiktoken encoding for the model, or None if unavailable."""
+        if not TIKTOKEN_AVAILABLE:
+            logger.warning("tiktoken not available, estimating embedding token counts")
+            return None
+        try:
+            return tiktoken.encoding_for_model(self.model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.warning(f"Could not load tiktoken encoding, estimating token counts: {e}")
+            return None
+
+    def _prepare(self, text: str) -> _PendingEmbedding:
+        """Count tokens and truncate texts above the per-input limit."""
+        if not self._encoding_loaded:
+            self._encoding = self._load_encoding()
+            self._encoding_loaded = True
+
+        if self._encoding is None:
+            # Roughly 4 characters per token for English and Spanish text
+            max_chars = MAX_INPUT_TOKENS * 4
+            text = text[:max_chars]
+            tokens = len(text) // 4 + 1
+        else:
+            token_ids = self._encoding.encode(text, disallowed_special=())
+            if len(token_ids) > MAX_INPUT_TOKENS:
+                logger.warning(f"Truncating embedding input from {len(token_ids)} to {MAX_INPUT_TOKENS} tokens")
+                token_ids = token_ids[:MAX_INPUT_TOKENS]
+                text = self._encoding.decode(token_ids)
+            tokens = len(token_ids)
+        return _PendingEmbedding(text, tokens, self._loop.create_future())
+
+    def _ensure_worker(self):
+        """Start the batching worker on the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._worker is not None and not self._worker.done():
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._request_semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        self._worker = loop.create_task(self._run())
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts, sharing requests with other concurrent callers.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Embeddings in the same order as texts
+
+        Raises:
+            Exception: The last provider error if any text could not be embedded
+                after all retries
+        """
+        if not texts:
+            return []
+
+        self._ensure_worker()
+        pending = [self._prepare(text) for text in texts]
+        for item in pending:
+            self._queue.put_nowait(item)
+
+        results = await asyncio.gather(*(item.future for item in pending), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
+
+    async def _run(self):
+        """Collect queued texts into token-bounded batches and dispatch them."""
+        carry: Optional[_PendingEmbedding] = None
+        while True:
+            first = carry or await self._queue.get()
+            carry = None
+            batch = [first]
+            batch_tokens = first.tokens
+            deadline = self._loop.time() + self.linger_seconds
+
+            while len(batch) < self.max_batch_inputs:
+                try:
+                    if self._queue.empty():
+                        remaining = deadline - self._loop.time()
+                        if remaining <= 0:
+                            break
+                        item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except asyncio.TimeoutError:
+                    break
+
+                if batch_tokens + item.tokens > self.max_batch_tokens:
+                    carry = item
+                    break
+                batch.append(item)
+                batch_tokens += item.tokens
+
+            task = self._loop.create_task(self._send(batch, attempt=0))
+            self._requests.add(task)
+            task.add_done_callback(self._requests.discard)
+
+    async def _send(self, batch: List[_PendingEmbedding], attempt: int):
+        """Send one batch, retrying it (or its halves) with backoff on failure."""
+        error: Optional[Exception] = None
+        async with self._request_semaphore:
+            try:
+                response = await self.openai_client.embeddings.create(
+                    model=self.model,
+                    input=[item.text for item in batch]
+                )
+            except Exception as e:
+                error = e
+
+        if error is None:
+            self.stats['requests'] += 1
+            self.stats['inputs'] += len(batch)
+            self.stats['tokens'] += sum(item.tokens for item in batch)
+            data = sorted(response.data, key=lambda d: getattr(d, 'index', 0))
+            for item, embedding in zip(batch, data):
+                if not item.future.done():
+                    item.future.set_result(embedding.embedding)
+            return
+
+        if attempt >= self.max_retries:
+            logger.error(f"Embedding request for {len(batch)} inputs failed after {attempt} retries: {error}")
+            self.stats['failed_inputs'] += len(batch)
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(error)
+            return
+
+        delay = self.retry_base_delay * (2 ** attempt)
+        logger.warning(f"Embedding request for {len(batch)} inputs failed ({error}), retrying in {delay:.1f}s")
+        self.stats['retries'] += 1
+        await asyncio.sleep(delay)
+
+        # Split requests rejected for their content so a single bad input
+        # cannot keep failing the rest of the batch; transient errors
+        # (rate limits, timeouts) retry the same batch
+        if len(batch) > 1 and self._is_input_error(error):
+            middle = len(batch) // 2
+            await asyncio.gather(
+                self._send(batch[:middle], attempt + 1),
+                self._send(batch[middle:], attempt + 1)
+            )
+        else:
+            await self._send(batch, attempt + 1)
+
+    @staticmethod
+    def _is_input_error(error: Exception) -> bool:
+        """Whether the provider rejected the request because of its inputs."""
+        return getattr(error, 'status_code', None) in (400, 413, 422)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request, input, token, retry and failure counters."""
+        return dict(self.stats)
@@ -0,0 +1,141 @@
+"""
+Embedding Cache for MedBot Assistant
+
+Content-addressed cache of chunk embeddings keyed by a SHA-256 digest of the
+embedding model and the chunk text, so identical chunks (overlapping windows,
+repeated revectorizations, unchanged files) are embedded only once. Entries are
+evicted least-recently-used once the cache is full, and the cache is persisted
+to a single .npz file. Async callers load that file with load() in a worker
+thread before the first lookup, so a large cache never blocks the event loop.
+"""
+
+from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+import hashlib
+import logging
+import os
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def embedding_cache_key(model: str, text: str) -> str:
+    """Stable digest of (model, text), identical across processes and restarts."""
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """LRU cache of embeddings by content digest, with optional persistence."""
+
+    def __init__(self, max_entries: int, path: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of embeddings kept; 0 disables the cache
+            path: .npz file the cache is loaded from (lazily) and saved to
+        """
+        self.max_entries = max_entries
+        self.path = path
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._loaded = path is None
+        self._load_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def load(self):
+        """
+        Load the persisted cache if it has not been loaded yet.
+
+        Reading and decompressing a large .npz takes a while, so async callers
+        run this with asyncio.to_thread. The entries are swapped in only once
+        the whole file has been read.
+        """
+        with self._load_lock:
+            if self._loaded:
+                return
+            entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+            if os.path.exists(self.path):
+                try:
+                    with np.load(self.path) as archive:
+                        for name in archive.files:
+                            if not name.startswith("keys_"):
+                                continue
+                            vectors = archive[f"vectors_{name[len('keys_'):]}"]
+                            for key, vector in zip(archive[name], vectors):
+                                entries[str(key)] = vector
+                    logger.info(f"Loaded {len(entries)} cached embeddings from {self.path}")
+                except Exception as e:
+                    logger.warning(f"Could not load embedding cache from {self.path}: {e}")
+                    entries.clear()
+            self._entries = entries
+            self._evict()
+            self._loaded = True
+
+    def _ensure_loaded(self):
+        """Load the persisted cache the first time it is used, if load() was not called."""
+        if not self._loaded:
+            self.load()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Get a cached embedding and mark it as recently used."""
+        self._ensure_loaded()
+        vector = self._entries.get(key)
+        if vector is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return vector
+
+    def put(self, key: str, embedding: List[float]):
+        """Store an embedding, evicting the least recently used entries if full."""
+        if self.max_entries <= 0:
+            return
+        self._ensure_loaded()
+        self._entries[key] = np.asarray(embedding, dtype=np.float32)
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        while len(self._entries) > max(self.max_entries, 0):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def save(self):
+        """Write the cache to its .npz file, grouping embeddings by dimension."""
+        if self.path is None or not self._loaded:
+            return
+
+        by_dimension: Dict[int, List[str]] = {}
+        for key, vector in self._entries.items():
+            by_dimension.setdefault(vector.shape[0], []).append(key)
+
+        arrays = {}
+        for dimension, keys in by_dimension.items():
+            arrays[f"keys_{dimension}"] = np.array(keys)
+            arrays[f"vectors_{dimension}"] = np.stack([self._entries[key] for key in keys])
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".tmp", "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(self.path + ".tmp", self.path)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
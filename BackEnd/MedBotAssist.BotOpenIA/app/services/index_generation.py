@@ -0,0 +1,99 @@
+"""
+Index generations for MedBot Assistant
+
+An IndexGeneration bundles everything a search reads: the vector store, the
+BM25 keyword index and the per-file vectorization log. The vectorization
+manager publishes one generation at a time with a single reference swap
+(read-copy-update): writers build the next generation off to the side, either
+from scratch or as a copy of the current one, and readers take the current
+reference once per search, so they never see a half-built index and need no
+lock. A replaced generation is freed as soon as the last search holding it
+returns.
+
+The vectorization log doubles as the per-file catalog (type, size, chunk
+count, etag, vectorization time), kept up to date as files are added and
+removed, so listing documents does not scan the chunks. Each generation has an
+ETag for HTTP caching of responses derived from it.
+"""
+
+from typing import Any, Dict, List, Optional
+import time
+import uuid
+
+from app.services.vector_store import InMemoryVectorStore
+from app.services.keyword_index import BM25Index
+
+class IndexGeneration:
+    """
+    One version of the instructive index.
+
+    Only the writer that created a generation may modify it, and only until
+    it is published; published generations are read-only.
+    """
+
+    def __init__(self, number: int, vector_store: InMemoryVectorStore, keyword_index: Optional[BM25Index] = None,
+                 vectorization_log: Optional[Dict[str, Dict[str, Any]]] = None, token: Optional[str] = None):
+        """
+        Initialize a generation.
+
+        Args:
+            number: Generation number, increasing with every published generation
+            vector_store: Chunk embeddings and documents
+            keyword_index: BM25 index over the same chunks
+            vectorization_log: File name -> catalog entry (etag, type, size,
+                chunk count and timestamp)
+            token: Identifier distinguishing generations with the same number
+                (e.g. across restarts); a random one is generated if omitted
+        """
+        self.number = number
+        self.vector_store = vector_store
+        self.keyword_index = keyword_index if keyword_index is not None else BM25Index()
+        self.vectorization_log: Dict[str, Dict[str, Any]] = vectorization_log if vectorization_log is not None else {}
+        self.token = token or uuid.uuid4().hex[:12]
+        self.created_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self.vector_store)
+
+    @property
+    def etag(self) -> str:
+        """Strong HTTP entity tag of this generation."""
+        return f'"{self.number}-{self.token}"'
+
+    def get_file_catalog(self) -> List[Dict[str, Any]]:
+        """
+        Vectorized files, sorted by name.
+
+        Returns:
+            One entry per file with filename, file_type, chunks_count, etag,
+            size, last_modified and vectorized_at
+        """
+        return [
+            {
+                'filename': filename,
+                'file_type': entry.get('file_type', 'unknown'),
+                'chunks_count': entry.get('chunks_processed', 0),
+                'etag': entry.get('etag', ''),
+                'size': entry.get('file_size'),
+                'last_modified': entry.get('last_modified', ''),
+                'vectorized_at': entry.get('vectorization_timestamp')
+            }
+            for filename, entry in sorted(self.vectorization_log.items())
+        ]
+
+    def derive(self, number: int) -> "IndexGeneration":
+        """
+        Copy this generation as the starting point of the next one.
+
+        Args:
+            number: Number of the new generation
+
+        Returns:
+            A generation that can be modified without affecting this one
+        """
+        return IndexGeneration(
+            number,
+            self.vector_store.copy(),
+            self.keyword_index.copy(),
+            {name: dict(entry) for name, entry in self.vectorization_log.items()}
+        )
@@ -0,0 +1,210 @@
+"""
+Background ingestion jobs for MedBot Assistant
+
+Long-running ingestion (full revectorization, container sync) runs as an
+asyncio task owned by IngestionJobManager instead of inside the HTTP request.
+Jobs run one at a time under the vectorization manager's ingestion lock, so
+the vector store has a single writer, and they report per-file progress,
+throughput and an ETA while they run. Queued and running jobs can be
+cancelled.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from datetime import datetime
+import asyncio
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+class IngestionJob:
+    """State and per-file progress of one ingestion job."""
+
+    def __init__(self, kind: str, requested_by: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.requested_by = requested_by
+        self.status = QUEUED
+        self.cancel_requested = False
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # file name -> {'status': pending|processing|done|failed, 'chunks', 'error'}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.files_done = 0
+        self.files_failed = 0
+        self.chunks = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+
+    def set_files(self, file_names: Iterable[str]):
+        """Register the files the job is going to process."""
+        self.files = {name: {'status': 'pending'} for name in file_names}
+
+    def file_started(self, file_name: str):
+        self.files.setdefault(file_name, {})['status'] = 'processing'
+
+    def file_finished(self, file_name: str, chunks: int = 0, error: Optional[str] = None):
+        """Record the outcome of one file."""
+        if error is None:
+            self.files_done += 1
+            self.chunks += chunks
+            self.files[file_name] = {'status': 'done', 'chunks': chunks}
+        else:
+            self.files_failed += 1
+            self.files[file_name] = {'status': 'failed', 'error': error}
+
+    def get_progress(self) -> Dict[str, Any]:
+        """Files processed so far, throughput and estimated time to completion."""
+        total = len(self.files)
+        finished = self.files_done + self.files_failed
+        elapsed = ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0
+        files_per_second = finished / elapsed if elapsed > 0 else 0.0
+        eta_seconds = None
+        if self.status == RUNNING and files_per_second > 0:
+            eta_seconds = round((total - finished) / files_per_second, 1)
+        return {
+            'files_total': total,
+            'files_done': self.files_done,
+            'files_failed': self.files_failed,
+            'files_in_progress': [name for name, file in self.files.items() if file['status'] == 'processing'],
+            'percent': round(100.0 * finished / total, 1) if total else (100.0 if self.finished_at else 0.0),
+            'chunks': self.chunks,
+            'elapsed_seconds': round(elapsed, 1),
+            'files_per_second': round(files_per_second, 3),
+            'chunks_per_second': round(self.chunks / elapsed, 1) if elapsed > 0 else 0.0,
+            'eta_seconds': eta_seconds
+        }
+
+    def to_dict(self, include_files: bool = False) -> Dict[str, Any]:
+        job = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'cancel_requested': self.cancel_requested,
+            'requested_by': self.requested_by,
+            'created_at': _isoformat(self.created_at),
+            'started_at': _isoformat(self.started_at),
+            'finished_at': _isoformat(self.finished_at),
+            'progress': self.get_progress(),
+            'error': self.error,
+            'result': self.result
+        }
+        if include_files:
+            job['files'] = self.files
+        return job
+
+class IngestionJobManager:
+    """
+    Runs ingestion jobs in the background, one at a time.
+
+    Submitting a job of a kind that is already queued or running returns the
+    existing job instead of queueing a duplicate.
+    """
+
+    def __init__(self, lock: asyncio.Lock, max_finished_jobs: int = 50):
+        """
+        Initialize the job manager.
+
+        Args:
+            lock: Lock held by every writer of the vector store
+            max_finished_jobs: Finished jobs kept for status queries
+        """
+        self._lock = lock
+        self.max_finished_jobs = max_finished_jobs
+        self._jobs: Dict[str, IngestionJob] = {}
+
+    def submit(self, kind: str, run: Callable[[IngestionJob], Awaitable[Dict[str, Any]]],
+               requested_by: Optional[str] = None) -> IngestionJob:
+        """
+        Queue a job; must be called from the event loop.
+
+        Args:
+            kind: Job kind (e.g. 'revectorize', 'sync')
+            run: Coroutine function doing the work; it receives the job to
+                report progress and returns the job result
+            requested_by: User that submitted the job
+
+        Returns:
+            The new job, or the active job of the same kind
+        """
+        for job in self._jobs.values():
+            if job.kind == kind and job.is_active:
+                return job
+
+        job = IngestionJob(kind, requested_by)
+        self._jobs[job.id] = job
+        job._task = asyncio.create_task(self._run(job, run))
+        logger.info(f"Queued {kind} ingestion job {job.id}")
+        return job
+
+    async def _run(self, job: IngestionJob, run: Callable[[IngestionJob], Awaitable[Dict[str, Any]]]):
+        try:
+            async with self._lock:
+                job.status = RUNNING
+                job.started_at = time.time()
+                logger.info(f"Started {job.kind} ingestion job {job.id}")
+                job.result = await run(job)
+            job.status = COMPLETED
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(getattr(e, 'detail', e))
+            logger.error(f"Ingestion job {job.id} failed: {job.error}")
+        finally:
+            job.finished_at = time.time()
+            logger.info(f"Ingestion job {job.id} {job.status}: {job.files_done} files done, {job.files_failed} failed")
+            self._prune()
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if not job.is_active]
+        for job in finished[:max(len(finished) - self.max_finished_jobs, 0)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[IngestionJob]:
+        """Jobs known to the manager, newest first."""
+        return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[IngestionJob]:
+        """
+        Request cancellation of a queued or running job.
+
+        A job cancelled before it publishes its new index generation leaves
+        the index as it was. Once the generation is published, cancellation
+        is ignored: the job finishes saving the snapshot and completes.
+
+        Returns:
+            The job, or None if it does not exist
+        """
+        job = self._jobs.get(job_id)
+        if job is not None and job.is_active and job._task is not None:
+            job.cancel_requested = True
+            job._task.cancel()
+        return job
+
+    async def wait(self, job_id: str) -> Optional[IngestionJob]:
+        """Wait until a job finishes."""
+        job = self._jobs.get(job_id)
+        if job is not None and job._task is not None:
+            await asyncio.gather(job._task, return_exceptions=True)
+        return job
@@ -0,0 +1,141 @@
+"""
+Keyword Index for MedBot Assistant
+
+In-memory BM25 inverted index over chunk texts, kept next to the vector store
+so exact terms such as drug names or doses ("insulin glargine", "10 mg/kg") can
+be matched lexically, either on their own (no embedding request) or fused with
+vector similarity.
+"""
+
+from typing import List, Dict, Any, Optional, Set, Tuple
+import heapq
+import math
+import re
+import unicodedata
+
+# Words, numbers and compound tokens such as "mg/kg", "0.5" or "0,5"
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:(?:[./]|(?<=\d),(?=\d))[a-z0-9]+)*")
+TOKEN_SEPARATORS = re.compile(r"[./,]")
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase, accent-free tokens.
+
+    Compound tokens are kept whole and also split into their parts, so
+    "mg/kg/day" matches both "mg/kg/day" and "mg".
+    """
+    if not text:
+        return []
+    normalized = unicodedata.normalize('NFD', text.lower())
+    normalized = ''.join(char for char in normalized if unicodedata.category(char) != 'Mn')
+
+    tokens = []
+    for token in TOKEN_PATTERN.findall(normalized):
+        tokens.append(token)
+        if TOKEN_SEPARATORS.search(token):
+            tokens.extend(part for part in TOKEN_SEPARATORS.split(token) if part)
+    return tokens
+
+class BM25Index:
+    """BM25 scoring over an incrementally maintained inverted index."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize an empty index.
+
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        # term -> chunk id -> term frequency
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, doc_id: str, text: str):
+        """Index a chunk, replacing a previous version with the same id."""
+        if doc_id in self._lengths:
+            self.remove(doc_id)
+
+        tokens = tokenize(text)
+        frequencies: Dict[str, int] = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+
+        for term, frequency in frequencies.items():
+            self._postings.setdefault(term, {})[doc_id] = frequency
+        self._doc_terms[doc_id] = tuple(frequencies)
+        self._lengths[doc_id] = len(tokens)
+        self._total_length += len(tokens)
+
+    def remove(self, doc_id: str):
+        """Drop a chunk from the index; unknown ids are ignored."""
+        if doc_id not in self._lengths:
+            return
+        for term in self._doc_terms.pop(doc_id):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id)
+
+    def copy(self) -> "BM25Index":
+        """Independent copy of the index."""
+        clone = BM25Index(self.k1, self.b)
+        clone._postings = {term: dict(postings) for term, postings in self._postings.items()}
+        clone._lengths = dict(self._lengths)
+        clone._doc_terms = dict(self._doc_terms)
+        clone._total_length = self._total_length
+        return clone
+
+    def clear(self):
+        """Remove every chunk."""
+        self._postings.clear()
+        self._lengths.clear()
+        self._doc_terms.clear()
+        self._total_length = 0
+
+    def search(self, query: str, top_k: int = 5, allowed_ids: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Rank chunks containing the query terms by BM25.
+
+        Args:
+            query: Query text
+            top_k: Number of results to return
+            allowed_ids: If given, only these chunk ids are considered
+
+        Returns:
+            List of (chunk id, BM25 score) tuples, best first
+        """
+        if not self._lengths or top_k <= 0:
+            return []
+
+        document_count = len(self._lengths)
+        average_length = self._total_length / document_count or 1.0
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                if allowed_ids is not None and doc_id not in allowed_ids:
+                    continue
+                length_norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + length_norm)
+
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get chunk, vocabulary and posting counts."""
+        return {
+            'documents': len(self._lengths),
+            'terms': len(self._postings),
+            'postings': sum(len(terms) for terms in self._doc_terms.values())
+        }
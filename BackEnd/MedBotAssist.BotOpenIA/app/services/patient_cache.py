@@ -0,0 +1,292 @@
+"""
+Patient Cache for MedBot Assistant
+
+Keeps the Patients table in memory as compact rows with pre-normalized search
+fields and parsed birth dates, so agent tools do not pull the whole table over
+ODBC on every call. A validated snapshot is served for PATIENT_CACHE_TTL_SECONDS;
+after that one aggregate query (row count and checksum of the rows up to the
+highest PatientId seen, plus the current highest PatientId) tells whether it
+is still current:
+
+- nothing changed: the snapshot is kept;
+- only new patients: rows above the PatientId watermark are fetched and merged;
+- rows were updated or deleted: the table is reloaded.
+
+The table is also reloaded after PATIENT_CACHE_MAX_AGE_SECONDS, as a guard
+against checksum collisions. Writers call invalidate() so the next read
+checks the database right away. While a snapshot is fresh, patients can also
+be looked up by identification number in a hash map.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from datetime import date, datetime
+import logging
+import threading
+import time
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+# (row count, checksum) of the rows up to a PatientId, and the highest PatientId
+PatientTableState = Tuple[int, Optional[int], Optional[int]]
+
+def normalize_text_for_search(text: str) -> str:
+    """
+    Normalizes text for more flexible searches.
+    Removes accents, converts to lowercase, and removes extra spaces.
+
+    Examples:
+    - "Sánchez García" -> "sanchez garcia"
+    - "José María" -> "jose maria"
+    - "PÉREZ" -> "perez"
+    """
+    if not text:
+        return ""
+
+    # Normalize unicode (remove accents)
+    normalized = unicodedata.normalize('NFD', text)
+    # Remove diacritical marks (accents)
+    without_accents = ''.join(char for char in normalized if unicodedata.category(char) != 'Mn')
+    # Convert to lowercase and trim extra spaces
+    clean_text = without_accents.lower().strip()
+    # Normalize multiple spaces to a single space
+    clean_text = ' '.join(clean_text.split())
+
+    return clean_text
+
+def parse_birth_date(value: Any) -> Optional[date]:
+    """Parse a BirthDate column value (date, datetime or ISO string) into a date."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).strip().replace('Z', '+00:00')).date()
+    except ValueError:
+        return None
+
+def age_on(birth_date: date, today: date) -> int:
+    """Age in whole years on a given day."""
+    return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+
+class CachedPatient:
+    """A patient row with its search fields normalized once."""
+
+    __slots__ = ("patient_id", "full_name", "identification_number", "birth_date", "phone", "email",
+                 "search_name", "search_text", "search_phone", "search_email")
+
+    def __init__(self, patient_id: int, full_name: Optional[str], identification_number: Optional[str],
+                 birth_date: Any, phone: Optional[str], email: Optional[str]):
+        self.patient_id = patient_id
+        self.full_name = full_name
+        self.identification_number = identification_number
+        self.birth_date = parse_birth_date(birth_date)
+        self.phone = phone
+        self.email = email
+        self.search_name = normalize_text_for_search(full_name or '')
+        self.search_phone = normalize_text_for_search(phone or '')
+        self.search_email = normalize_text_for_search(email or '')
+        self.search_text = ' '.join(part for part in (
+            self.search_name,
+            normalize_text_for_search(identification_number or ''),
+            self.birth_date.isoformat() if self.birth_date else '',
+            self.search_phone,
+            self.search_email
+        ) if part)
+
+    def age(self, today: Optional[date] = None) -> Optional[int]:
+        """Age in years, or None without a birth date."""
+        if self.birth_date is None:
+            return None
+        return age_on(self.birth_date, today or date.today())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The patient in the dictionary format returned by DatabaseService.get_all_patients."""
+        return {
+            "full_name": self.full_name,
+            "identification_number": self.identification_number,
+            "birth_date": self.birth_date,
+            "phone": self.phone,
+            "email": self.email
+        }
+
+class PatientCache:
+    """In-process snapshot of the Patients table, refreshed incrementally."""
+
+    def __init__(self, load_rows: Callable[[Optional[int]], List[Dict[str, Any]]],
+                 load_state: Callable[[Optional[int]], PatientTableState],
+                 ttl_seconds: float, max_age_seconds: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the cache; nothing is loaded until the first read.
+
+        Args:
+            load_rows: Returns the rows with PatientId above the given id (all
+                rows for None) as dicts with patient_id, full_name,
+                identification_number, birth_date, phone and email
+            load_state: Returns (row count, checksum) of the rows with
+                PatientId up to the given id (all rows for None) and the
+                highest PatientId in the table
+            ttl_seconds: Seconds a validated snapshot is served without
+                querying the database; 0 validates on every read
+            max_age_seconds: Seconds after which the table is reloaded in full
+            clock: Monotonic time source
+        """
+        self._load_rows = load_rows
+        self._load_state = load_state
+        self.ttl_seconds = ttl_seconds
+        self.max_age_seconds = max_age_seconds
+        self._clock = clock
+        # Refreshes run under the lock so concurrent tool calls query the database once
+        self._lock = threading.Lock()
+        self._by_id: Dict[int, CachedPatient] = {}
+        self._by_identification: Dict[str, CachedPatient] = {}
+        self._patients: Optional[List[CachedPatient]] = None
+        self._watermark: Optional[int] = None
+        self._state: Tuple[int, Optional[int]] = (0, None)
+        self._loaded_at = 0.0
+        self._validated_at = 0.0
+        self._invalidated = False
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'unchanged': 0,
+            'incremental_refreshes': 0,
+            'full_refreshes': 0,
+            'invalidations': 0,
+            'lookup_hits': 0,
+            'lookup_cold': 0,
+            'rows_loaded': 0,
+            'refresh_seconds_total': 0.0,
+            'last_refresh_seconds': 0.0
+        }
+
+    def invalidate(self):
+        """Make the next read check the database, e.g. after creating or updating a patient."""
+        with self._lock:
+            self._invalidated = True
+            self.stats['invalidations'] += 1
+
+    def _is_fresh(self, now: float) -> bool:
+        return (self._patients is not None and not self._invalidated
+                and now - self._validated_at < self.ttl_seconds)
+
+    def find_by_identification(self, identification_numbers: Iterable[str]) -> Optional[Dict[str, CachedPatient]]:
+        """
+        Look patients up by identification number while the snapshot is fresh.
+
+        The snapshot is not refreshed: when it is due for a check, answering
+        with an indexed query is cheaper than validating the whole table.
+
+        Args:
+            identification_numbers: Identification numbers (exact match)
+
+        Returns:
+            The patients found, keyed by identification number, or None if
+            the snapshot is not fresh and the caller should query the database
+        """
+        with self._lock:
+            if not self._is_fresh(self._clock()):
+                self.stats['lookup_cold'] += 1
+                return None
+            self.stats['lookup_hits'] += 1
+            found = {}
+            for identification_number in identification_numbers:
+                patient = self._by_identification.get(identification_number)
+                if patient is not None:
+                    found[identification_number] = patient
+            return found
+
+    def get_patients(self) -> List[CachedPatient]:
+        """
+        Get every patient ordered by name, refreshing the snapshot if it is due.
+
+        Returns:
+            Cached patients; the list must not be modified
+        """
+        with self._lock:
+            now = self._clock()
+            if self._is_fresh(now):
+                self.stats['hits'] += 1
+                return self._patients
+
+            self.stats['misses'] += 1
+            started = time.perf_counter()
+            if self._patients is None or now - self._loaded_at >= self.max_age_seconds:
+                self._full_refresh(now)
+            else:
+                self._validate(now)
+            self._invalidated = False
+            self._validated_at = now
+
+            elapsed = time.perf_counter() - started
+            self.stats['refresh_seconds_total'] += elapsed
+            self.stats['last_refresh_seconds'] = elapsed
+            return self._patients
+
+    def _full_refresh(self, now: float):
+        # The state is read before the rows: a change in between makes the
+        # next check reload again instead of hiding the change
+        count, checksum, max_id = self._load_state(None)
+        rows = self._load_rows(None)
+        self._by_id = {}
+        self._merge(rows)
+        self._watermark = max_id
+        self._state = (count, checksum)
+        self._loaded_at = now
+        self.stats['full_refreshes'] += 1
+        logger.info(f"Patient cache loaded {len(rows)} patients")
+
+    def _validate(self, now: float):
+        count, checksum, max_id = self._load_state(self._watermark)
+        if (count, checksum) != self._state:
+            logger.info("Patients changed since the last refresh, reloading the patient cache")
+            self._full_refresh(now)
+            return
+
+        if max_id is None or (self._watermark is not None and max_id <= self._watermark):
+            self.stats['unchanged'] += 1
+            return
+
+        new_count, new_checksum, _ = self._load_state(max_id)
+        rows = self._load_rows(self._watermark)
+        self._merge(rows)
+        self._watermark = max_id
+        self._state = (new_count, new_checksum)
+        self.stats['incremental_refreshes'] += 1
+        logger.info(f"Patient cache added {len(rows)} new patients")
+
+    def _merge(self, rows: List[Dict[str, Any]]):
+        for row in rows:
+            patient = CachedPatient(
+                row['patient_id'], row.get('full_name'), row.get('identification_number'),
+                row.get('birth_date'), row.get('phone'), row.get('email')
+            )
+            self._by_id[patient.patient_id] = patient
+        self.stats['rows_loaded'] += len(rows)
+        # A new list, so callers iterating the previous snapshot are unaffected
+        self._patients = sorted(self._by_id.values(), key=lambda patient: (patient.search_name, patient.patient_id))
+        # Identification numbers are not unique in the schema; the lowest PatientId wins
+        by_identification: Dict[str, CachedPatient] = {}
+        for patient in sorted(self._patients, key=lambda patient: patient.patient_id):
+            if patient.identification_number:
+                by_identification.setdefault(patient.identification_number, patient)
+        self._by_identification = by_identification
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size, hit/miss, refresh counters and refresh timings."""
+        stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        refreshes = stats['misses']
+        stats.update({
+            'patients': len(self._by_id),
+            'ttl_seconds': self.ttl_seconds,
+            'max_age_seconds': self.max_age_seconds,
+            'hit_rate': round(stats['hits'] / lookups, 4) if lookups else 0.0,
+            'average_refresh_ms': round(stats['refresh_seconds_total'] * 1000 / refreshes, 2) if refreshes else 0.0,
+            'last_refresh_ms': round(stats['last_refresh_seconds'] * 1000, 2)
+        })
+        del stats['refresh_seconds_total'], stats['last_refresh_seconds']
+        return stats
@@ -0,0 +1,303 @@
+"""
+Patient Name Index for MedBot Assistant
+
+Accent-insensitive name search over a patient cache snapshot. Names are
+indexed in their normalize_text_for_search form, so "Úrsula Muñoz" is found
+by "ursula munoz", "URSULA" or "Muñ":
+
+- a token prefix trie over the distinct name words, stored flattened as a
+  sorted list: the words below a trie node are one contiguous bisect range;
+- a trigram index mapping every three-character substring of those words
+  (padded at the edges) to the words containing it, for matches inside words
+  and for typo-tolerant matches.
+
+A query only looks at the postings of its words or trigrams and checks the
+candidates they yield, so names are never scanned. Results are ranked: exact
+name, name starting with the query, every query word starting a name word,
+then other substrings; ties keep name order.
+
+Fuzzy search tolerates typos ("gonzales" finds "González"). The words sharing
+enough trigrams with a query word are the candidates (each edit removes at
+most three trigrams), and only those get a bounded edit distance check.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from bisect import bisect_left, bisect_right
+import logging
+import time
+from app.services.patient_cache import CachedPatient, normalize_text_for_search
+
+logger = logging.getLogger(__name__)
+
+# Sorts after every character, so prefix + _PREFIX_END bounds a prefix range
+_PREFIX_END = chr(0x10FFFF)
+
+TRIGRAM_LENGTH = 3
+
+RANK_EXACT = 0
+RANK_NAME_PREFIX = 1
+RANK_WORD_PREFIX = 2
+RANK_SUBSTRING = 3
+
+# Edits allowed per word in fuzzy search; more would match most short names
+MAX_FUZZY_DISTANCE = 2
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + TRIGRAM_LENGTH] for i in range(len(text) - TRIGRAM_LENGTH + 1)}
+
+def _padded_trigrams(word: str) -> Set[str]:
+    # Padding adds trigrams for the word edges; words never contain spaces
+    return _trigrams(f"  {word} ")
+
+def allowed_distance(word: str, max_distance: int) -> int:
+    """Edits allowed for a word: none up to 2 characters, 1 up to 5, then max_distance."""
+    return max(0, min(max_distance, MAX_FUZZY_DISTANCE, len(word) // 3))
+
+def bounded_edit_distance(a: str, b: str, max_distance: int) -> Optional[int]:
+    """
+    Levenshtein distance between two strings, if it is at most max_distance.
+
+    Returns:
+        The distance, or None as soon as it is known to exceed max_distance
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    # Only cells within max_distance of the diagonal can stay within it
+    over = max_distance + 1
+    previous = [j if j <= max_distance else over for j in range(len(b) + 1)]
+    for i, char_a in enumerate(a, 1):
+        current = [over] * (len(b) + 1)
+        current[0] = row_min = i if i <= max_distance else over
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != b[j - 1]))
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= max_distance else None
+
+class PatientNameIndex:
+    """Word prefix and trigram index over the normalized names of a patient snapshot."""
+
+    def __init__(self, patients: Sequence[CachedPatient]):
+        """
+        Build the index.
+
+        Args:
+            patients: Cache snapshot ordered by name (PatientCache.get_patients);
+                it is kept by reference and must not be modified
+        """
+        started = time.perf_counter()
+        self._patients = patients
+        word_postings: Dict[str, List[int]] = {}
+        for position, patient in enumerate(patients):
+            for word in set(patient.search_name.split()):
+                word_postings.setdefault(word, []).append(position)
+
+        self._words = sorted(word_postings)
+        self._word_postings = [word_postings[word] for word in self._words]
+        # Names repeat words a lot, so indexing distinct words keeps this small.
+        # Postings are ordered by word length, with the lengths alongside, so
+        # fuzzy search can bisect to the words of a similar length.
+        trigram_words: Dict[str, List[Tuple[int, int]]] = {}
+        for word_id, word in enumerate(self._words):
+            for trigram in _padded_trigrams(word):
+                trigram_words.setdefault(trigram, []).append((len(word), word_id))
+        self._trigram_words: Dict[str, List[int]] = {}
+        self._trigram_lengths: Dict[str, List[int]] = {}
+        for trigram, postings in trigram_words.items():
+            postings.sort()
+            self._trigram_lengths[trigram] = [length for length, _ in postings]
+            self._trigram_words[trigram] = [word_id for _, word_id in postings]
+        self.build_seconds = time.perf_counter() - started
+        logger.info(f"Patient name index built for {len(patients)} patients in {self.build_seconds * 1000:.1f} ms")
+
+    def covers(self, patients: Sequence[CachedPatient]) -> bool:
+        """Whether the index was built from this snapshot."""
+        return self._patients is patients
+
+    def _word_prefix_matches(self, prefix: str) -> Set[int]:
+        """Positions of the patients with a name word starting with prefix."""
+        start = bisect_left(self._words, prefix)
+        end = bisect_left(self._words, prefix + _PREFIX_END, start)
+        matches: Set[int] = set()
+        for postings in self._word_postings[start:end]:
+            matches.update(postings)
+        return matches
+
+    def _exact_word_matches(self, word: str) -> Set[int]:
+        """Positions of the patients with this name word."""
+        word_id = bisect_left(self._words, word)
+        if word_id < len(self._words) and self._words[word_id] == word:
+            return set(self._word_postings[word_id])
+        return set()
+
+    def _word_substring_matches(self, fragment: str) -> Set[int]:
+        """Positions of the patients with a name word containing fragment (at least three characters)."""
+        postings = []
+        for trigram in _trigrams(fragment):
+            trigram_words = self._trigram_words.get(trigram)
+            if trigram_words is None:
+                return set()
+            postings.append(trigram_words)
+        postings.sort(key=len)
+
+        word_ids = set(postings[0])
+        for trigram_words in postings[1:]:
+            word_ids.intersection_update(trigram_words)
+        matches: Set[int] = set()
+        for word_id in word_ids:
+            # Sharing every trigram does not guarantee they are contiguous
+            if fragment in self._words[word_id]:
+                matches.update(self._word_postings[word_id])
+        return matches
+
+    def _substring_matches(self, query: str) -> Set[int]:
+        """Positions of the patients whose name contains query (at least three characters)."""
+        fragments = query.split(' ')
+        if len(fragments) == 1:
+            return self._word_substring_matches(query)
+
+        # Inside a name, the last fragment starts a word, the middle ones are
+        # whole words and the first one ends a word
+        candidates = self._word_prefix_matches(fragments[-1])
+        for word in fragments[1:-1]:
+            if not candidates:
+                return candidates
+            candidates &= self._exact_word_matches(word)
+        if candidates and len(fragments[0]) >= TRIGRAM_LENGTH:
+            candidates &= self._word_substring_matches(fragments[0])
+        return {position for position in candidates if query in self._patients[position].search_name}
+
+    def search(self, name: str, limit: Optional[int] = None) -> List[CachedPatient]:
+        """
+        Find patients by name, ignoring accents, case and extra spaces.
+
+        A patient matches when every query word starts a word of their name,
+        in any order, or when the whole query appears inside their name.
+        Substrings inside words need at least three characters.
+
+        Args:
+            name: Name or part of a name
+            limit: Maximum number of patients returned; None returns all
+
+        Returns:
+            Matching patients, best match first
+        """
+        query = normalize_text_for_search(name)
+        if not query:
+            return []
+
+        word_matches: Optional[Set[int]] = None
+        # Longer words have shorter postings, so the intersection shrinks fast
+        for word in sorted(set(query.split()), key=len, reverse=True):
+            matches = self._word_prefix_matches(word)
+            word_matches = matches if word_matches is None else word_matches & matches
+            if not word_matches:
+                break
+        word_matches = word_matches or set()
+        substring_matches = self._substring_matches(query) if len(query) >= TRIGRAM_LENGTH else set()
+
+        ranked = []
+        for position in word_matches | substring_matches:
+            search_name = self._patients[position].search_name
+            if search_name == query:
+                rank = RANK_EXACT
+            elif search_name.startswith(query):
+                rank = RANK_NAME_PREFIX
+            elif position in word_matches:
+                rank = RANK_WORD_PREFIX
+            else:
+                rank = RANK_SUBSTRING
+            # Positions follow the snapshot's name order
+            ranked.append((rank, position))
+        ranked.sort()
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self._patients[position] for _, position in ranked]
+
+    def _similar_words(self, word: str, max_distance: int) -> Dict[int, int]:
+        """Name words within max_distance edits of word, as word id -> distance."""
+        if max_distance == 0:
+            word_id = bisect_left(self._words, word)
+            if word_id < len(self._words) and self._words[word_id] == word:
+                return {word_id: 0}
+            return {}
+
+        trigrams = _padded_trigrams(word)
+        # Every edit removes at most three of the word's trigrams
+        min_shared = len(trigrams) - TRIGRAM_LENGTH * max_distance
+        shared: Dict[int, int] = {}
+        if min_shared <= 0:
+            # Words with repeated trigrams give no filter, so check every word
+            shared = dict.fromkeys(range(len(self._words)), 0)
+        else:
+            min_length, max_length = len(word) - max_distance, len(word) + max_distance
+            for trigram in trigrams:
+                lengths = self._trigram_lengths.get(trigram)
+                if lengths is None:
+                    continue
+                start = bisect_left(lengths, min_length)
+                end = bisect_right(lengths, max_length, start)
+                for word_id in self._trigram_words[trigram][start:end]:
+                    shared[word_id] = shared.get(word_id, 0) + 1
+
+        similar = {}
+        for word_id, count in shared.items():
+            if count >= min_shared:
+                distance = bounded_edit_distance(word, self._words[word_id], max_distance)
+                if distance is not None:
+                    similar[word_id] = distance
+        return similar
+
+    def fuzzy_search(self, name: str, max_distance: int = MAX_FUZZY_DISTANCE,
+                     limit: Optional[int] = None) -> List[Tuple[CachedPatient, int]]:
+        """
+        Find patients by name, tolerating typos.
+
+        Every query word must be within a few edits (insertions, deletions or
+        substitutions) of a word of the patient's name, in any order. Words
+        of up to 2 characters must match exactly and words of up to 5
+        characters allow one edit, so short names do not match everything.
+
+        Args:
+            name: Name or part of a name, possibly misspelled
+            max_distance: Edits allowed per word, capped at MAX_FUZZY_DISTANCE
+            limit: Maximum number of patients returned; None returns all
+
+        Returns:
+            (patient, total edits) pairs, fewest edits first, then by name
+        """
+        words = normalize_text_for_search(name).split()
+        if not words:
+            return []
+
+        distances: Optional[Dict[int, int]] = None
+        for word in sorted(set(words), key=len, reverse=True):
+            # Fewest edits for this word, per patient still in the running
+            best: Dict[int, int] = {}
+            for word_id, distance in self._similar_words(word, allowed_distance(word, max_distance)).items():
+                for position in self._word_postings[word_id]:
+                    if (distances is None or position in distances) and distance < best.get(position, distance + 1):
+                        best[position] = distance
+            if distances is not None:
+                best = {position: distances[position] + distance for position, distance in best.items()}
+            distances = best
+            if not distances:
+                return []
+
+        ranked = sorted((total, position) for position, total in distances.items())
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(self._patients[position], total) for total, position in ranked]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index size and build time."""
+        return {
+            'patients': len(self._patients),
+            'words': len(self._words),
+            'trigrams': len(self._trigram_words),
+            'build_ms': round(self.build_seconds * 1000, 2)
+        }
@@ -0,0 +1,172 @@
+"""
+Patient Search Index for MedBot Assistant
+
+Inverted index of the terms in every searchable patient field, built once per
+patient cache snapshot so free-text searches do not normalize and scan every
+patient row. The terms of a patient are:
+
+- name: the words of the normalized name;
+- identification number: the whole number and its alphanumeric pieces;
+- phone: its digit groups and all of its digits together ("+57-300-555-0101"
+  gives 57, 300, 555, 0101 and 573005550101);
+- email: the whole address, its domain and its alphanumeric pieces;
+- birth date: the ISO date and the year.
+
+Each query term scores 1 for the patients with that exact term and
+PREFIX_MATCH_WEIGHT for those that only have a term starting with it (query
+terms of at least MIN_PREFIX_LENGTH characters). A patient's score is the sum
+over the distinct query terms, so patients matching more terms rank higher;
+ties keep name order. A whole email, date or hyphenated number found as is
+counts instead of its pieces. The top k are taken with a heap, and a query
+only touches the postings of its terms.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from bisect import bisect_left
+import heapq
+import logging
+import re
+import time
+from app.services.patient_cache import CachedPatient, normalize_text_for_search
+
+logger = logging.getLogger(__name__)
+
+_PIECES = re.compile(r"[a-z0-9]+")
+_DIGITS = re.compile(r"\d+")
+# Punctuation trimmed from whole terms such as "gmail.com," or "(1990-05-15)"
+_TRIM = "\"'()[]{}<>,;:!?¿¡."
+
+# Sorts after every character, so prefix + _PREFIX_END bounds a prefix range
+_PREFIX_END = chr(0x10FFFF)
+
+PREFIX_MATCH_WEIGHT = 0.5
+MIN_PREFIX_LENGTH = 3
+
+def search_terms(text: str) -> Set[str]:
+    """
+    Terms of an already normalized text: the alphanumeric pieces of each
+    word, plus the whole word when it has several pieces (emails, dates,
+    domains, hyphenated numbers).
+    """
+    terms = set()
+    for word in text.split():
+        pieces = _PIECES.findall(word)
+        terms.update(pieces)
+        if len(pieces) > 1:
+            terms.add(word.strip(_TRIM))
+    return terms
+
+def patient_terms(patient: CachedPatient) -> Set[str]:
+    """Index terms of every searchable field of a patient."""
+    terms = search_terms(patient.search_name)
+    # Identification numbers are plain alphanumerics, so lowercasing is enough
+    terms.update(search_terms((patient.identification_number or '').lower()))
+    if patient.search_phone:
+        digit_groups = _DIGITS.findall(patient.search_phone)
+        terms.update(digit_groups)
+        terms.add(''.join(digit_groups))
+    if patient.search_email:
+        terms.update(search_terms(patient.search_email))
+        _, _, domain = patient.search_email.rpartition('@')
+        terms.add(domain)
+    if patient.birth_date:
+        terms.add(patient.birth_date.isoformat())
+        terms.add(str(patient.birth_date.year))
+    terms.discard('')
+    return terms
+
+class PatientSearchIndex:
+    """Term -> patients inverted index over the searchable fields of a patient snapshot."""
+
+    def __init__(self, patients: Sequence[CachedPatient]):
+        """
+        Build the index.
+
+        Args:
+            patients: Cache snapshot ordered by name (PatientCache.get_patients);
+                it is kept by reference and must not be modified
+        """
+        started = time.perf_counter()
+        self._patients = patients
+        postings: Dict[str, List[int]] = {}
+        for position, patient in enumerate(patients):
+            for term in patient_terms(patient):
+                postings.setdefault(term, []).append(position)
+
+        # Sorted so the terms starting with a prefix are one bisect range
+        self._terms = sorted(postings)
+        self._postings = [postings[term] for term in self._terms]
+        self.build_seconds = time.perf_counter() - started
+        logger.info(f"Patient search index built for {len(patients)} patients in {self.build_seconds * 1000:.1f} ms")
+
+    def covers(self, patients: Sequence[CachedPatient]) -> bool:
+        """Whether the index was built from this snapshot."""
+        return self._patients is patients
+
+    def _has_term(self, term: str) -> bool:
+        term_id = bisect_left(self._terms, term)
+        return term_id < len(self._terms) and self._terms[term_id] == term
+
+    def _query_terms(self, query: str) -> Set[str]:
+        """Terms of a query, like search_terms, but a whole email, date or number found as is replaces its pieces."""
+        terms = set()
+        for word in normalize_text_for_search(query).split():
+            pieces = _PIECES.findall(word)
+            whole = word.strip(_TRIM)
+            if len(pieces) > 1 and self._has_term(whole):
+                # Its pieces (such as "com" or "gmail") would only add noise and long postings
+                terms.add(whole)
+                continue
+            terms.update(pieces)
+            if len(pieces) > 1:
+                terms.add(whole)
+        return terms
+
+    def _term_postings(self, term: str) -> Iterable[Tuple[float, List[int]]]:
+        """(weight, postings) of the index terms a query term matches."""
+        start = bisect_left(self._terms, term)
+        if len(term) < MIN_PREFIX_LENGTH:
+            if self._has_term(term):
+                yield 1.0, self._postings[start]
+            return
+        end = bisect_left(self._terms, term + _PREFIX_END, start)
+        for term_id in range(start, end):
+            yield (1.0 if self._terms[term_id] == term else PREFIX_MATCH_WEIGHT), self._postings[term_id]
+
+    def search(self, query: str, top_k: Optional[int] = None) -> List[Tuple[CachedPatient, float]]:
+        """
+        Rank patients by how many query terms their fields match.
+
+        Args:
+            query: Free text, e.g. "maria 1990 gmail"; words that are in no
+                patient field (such as "patients" or "born") are ignored
+            top_k: Maximum number of patients returned; None returns all
+
+        Returns:
+            (patient, score) pairs, highest score first
+        """
+        scores: Dict[int, float] = {}
+        for term in self._query_terms(query):
+            # A query term counts once per patient, with its best match
+            best: Dict[int, float] = {}
+            for weight, postings in self._term_postings(term):
+                for position in postings:
+                    if weight > best.get(position, 0.0):
+                        best[position] = weight
+            for position, weight in best.items():
+                scores[position] = scores.get(position, 0.0) + weight
+
+        if top_k is None:
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        else:
+            ranked = heapq.nsmallest(top_k, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self._patients[position], score) for position, score in ranked]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index size and build time."""
+        return {
+            'patients': len(self._patients),
+            'terms': len(self._terms),
+            'postings': sum(len(postings) for postings in self._postings),
+            'build_ms': round(self.build_seconds * 1000, 2)
+        }
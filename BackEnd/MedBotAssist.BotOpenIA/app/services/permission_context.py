@@ -3,7 +3,7 @@ Permission context service for sharing user permissions across the agent and too
 """
 
 from typing import List, Optional
-import threading
+from contextvars import ContextVar
 from dataclasses import dataclass
 
 @dataclass
@@ -20,26 +20,29 @@ class UserContext:
 
 class PermissionContextService:
     """
-    Thread-local service to store and access user permissions during tool execution.
+    Context-local service to store and access user permissions during tool execution.
     
     This allows tools to check user permissions without having to pass them 
-    through the entire execution chain.
+    through the entire execution chain. The context is a ContextVar, so it
+    follows the agent's async run and reaches the synchronous tools that
+    LangChain runs in executor threads (they run in a copy of the context),
+    while concurrent requests on the event loop stay isolated.
     """
     
     def __init__(self):
-        self._local = threading.local()
+        self._context: ContextVar[Optional[UserContext]] = ContextVar('user_context', default=None)
     
     def set_user_context(self, username: str, permissions: List[str], jwt_token: Optional[str] = None) -> None:
-        # Set the current user context for this thread.
-        self._local.context = UserContext(
+        # Set the current user context for this request.
+        self._context.set(UserContext(
             username=username,
             permissions=permissions,
             jwt_token=jwt_token
-        )
+        ))
     
     def get_user_context(self) -> Optional[UserContext]:
-        # Get the current user context for this thread.
-        return getattr(self._local, 'context', None)
+        # Get the current user context for this request.
+        return self._context.get()
     
     def has_permission(self, permission_name: str) -> bool:
         # Check if the current user has a specific permission.
@@ -65,8 +68,7 @@ class PermissionContextService:
     
     def clear_context(self) -> None:
         # Clear the current user context.
-        if hasattr(self._local, 'context'):
-            del self._local.context
+        self._context.set(None)
 
 # Global instance
 permission_context = PermissionContextService()
@@ -0,0 +1,210 @@
+"""
+Query Embedding Cache for MedBot Assistant
+
+Bounded LRU cache of search query embeddings keyed by the normalized query
+text (Unicode NFKC, case-folded, whitespace collapsed), so frequent questions
+such as "insulin administration" are embedded once instead of on every search.
+Entries expire after a TTL. Concurrent lookups of the same query that miss the
+cache share a single in-flight embeddings request (single-flight), and the
+misses of a multi-query lookup are sent in one request.
+"""
+
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import logging
+import re
+import threading
+import time
+import unicodedata
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_query(query: str) -> str:
+    """Cache key and embedded text of a query: NFKC, case-folded, single spaces."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", query)).strip().casefold()
+
+class QueryEmbeddingCache:
+    """LRU/TTL cache of query embeddings with single-flight misses."""
+
+    def __init__(self, embed: Callable[[List[str]], Awaitable[List[List[float]]]], max_entries: int,
+                 ttl_seconds: float = 0, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the cache.
+
+        Args:
+            embed: Coroutine function embedding a list of normalized queries in one request
+            max_entries: Maximum number of embeddings kept; 0 disables caching
+                (concurrent identical queries still share a request)
+            ttl_seconds: Seconds an embedding stays valid; 0 keeps it until evicted
+            clock: Monotonic time source
+        """
+        self._embed = embed
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        # normalized query -> (embedding, expiry time or None)
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, Optional[float]]]" = OrderedDict()
+        # The agent's synchronous tools read and fill the cache too
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: str) -> Optional[np.ndarray]:
+        """Get a live entry and mark it as recently used, without counting a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            embedding, expires_at = entry
+            if expires_at is not None and self._clock() >= expires_at:
+                del self._entries[key]
+                self.expired += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def _store(self, key: str, embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        # Shared by every caller of the same query, so it must not be modified
+        vector.setflags(write=False)
+        if self.max_entries <= 0:
+            return vector
+        expires_at = self._clock() + self.ttl_seconds if self.ttl_seconds > 0 else None
+        with self._lock:
+            self._entries[key] = (vector, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return vector
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        """
+        Get the cached embedding of a query.
+
+        Args:
+            query: Query text, normalized before the lookup
+
+        Returns:
+            Read-only float32 embedding, or None on a miss
+        """
+        embedding = self._lookup(normalize_query(query))
+        if embedding is None:
+            self.misses += 1
+        return embedding
+
+    def put(self, query: str, embedding: List[float]) -> np.ndarray:
+        """Store the embedding of a query computed by the caller."""
+        return self._store(normalize_query(query), embedding)
+
+    async def embed(self, query: str) -> np.ndarray:
+        """Get the embedding of one query from the cache or the embeddings API."""
+        return (await self.embed_many([query]))[0]
+
+    async def embed_many(self, queries: List[str]) -> List[np.ndarray]:
+        """
+        Get the embeddings of several queries.
+
+        Cached queries are answered directly, queries already being embedded
+        for another caller wait for that request, and the remaining misses are
+        embedded together in a single request.
+
+        Args:
+            queries: Query texts
+
+        Returns:
+            One read-only float32 embedding per query, in query order
+
+        Raises:
+            Whatever the embed function raised, for this caller and every
+            caller waiting on the same queries
+        """
+        keys = [normalize_query(query) for query in queries]
+        results: List[Optional[np.ndarray]] = [None] * len(keys)
+        waiting: Dict[int, asyncio.Future] = {}
+        owned: Dict[str, asyncio.Future] = {}
+
+        for position, key in enumerate(keys):
+            embedding = self._lookup(key)
+            if embedding is not None:
+                results[position] = embedding
+            elif key in owned or key in self._in_flight:
+                waiting[position] = owned.get(key) or self._in_flight[key]
+                self.coalesced += 1
+            else:
+                future = asyncio.get_running_loop().create_future()
+                self._in_flight[key] = owned[key] = future
+                waiting[position] = future
+                self.misses += 1
+
+        if owned:
+            await self._fetch(owned)
+
+        for position, future in waiting.items():
+            results[position] = await self._wait(keys[position], future)
+        return results
+
+    async def _fetch(self, owned: Dict[str, asyncio.Future]):
+        """Embed the queries this caller owns and resolve their futures."""
+        try:
+            embeddings = await self._embed(list(owned))
+            if len(embeddings) != len(owned):
+                raise ValueError(f"Expected {len(owned)} query embeddings, got {len(embeddings)}")
+            for (key, future), embedding in zip(owned.items(), embeddings):
+                future.set_result(self._store(key, embedding))
+        except asyncio.CancelledError:
+            # Callers waiting on a cancelled owner retry on their own
+            for future in owned.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in owned.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # Marks the exception as retrieved when nobody else waits
+                    future.exception()
+            raise
+        finally:
+            for key, future in owned.items():
+                if self._in_flight.get(key) is future:
+                    del self._in_flight[key]
+
+    async def _wait(self, key: str, future: asyncio.Future) -> np.ndarray:
+        """Wait for a shared request; cancelling one waiter leaves it running for the others."""
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if future.cancelled():
+                return await self.embed(key)
+            raise
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size, hit/miss, single-flight and expiry counters."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,242 @@
+"""
+Structure-aware text chunker for MedBot Assistant
+
+Extractors turn documents into a stream of TextBlock objects (headings and
+paragraphs, with their page when known). The chunker packs consecutive blocks
+into chunks of about chunk_size words without crossing section boundaries,
+splitting only oversized paragraphs at sentence boundaries, and records where
+each chunk came from (pages, character offsets and section heading).
+"""
+
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+import re
+
+HEADING = 'heading'
+PARAGRAPH = 'paragraph'
+
+# Heading heuristics for plain text and PDF lines
+MAX_HEADING_WORDS = 12
+NUMBERED_HEADING = re.compile(r"^(\d+(\.\d+)*\.?|[IVXLC]+\.)\s+\S")
+MARKDOWN_HEADING = re.compile(r"^#{1,6}\s+")
+SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+")
+
+class TextBlock(NamedTuple):
+    """A heading or paragraph extracted from a document."""
+    text: str
+    kind: str = PARAGRAPH
+    page: Optional[int] = None
+
+class Chunk:
+    """A chunk of text with its position in the source document."""
+
+    __slots__ = ("text", "section", "page_start", "page_end", "char_start", "char_end")
+
+    def __init__(self, text: str, section: str, page_start: Optional[int], page_end: Optional[int],
+                 char_start: int, char_end: int):
+        self.text = text
+        self.section = section
+        self.page_start = page_start
+        self.page_end = page_end
+        self.char_start = char_start
+        self.char_end = char_end
+
+def _looks_like_heading(line: str) -> bool:
+    """Short, unpunctuated lines that are numbered or in upper case."""
+    words = line.split()
+    if not words or len(words) > MAX_HEADING_WORDS or line[-1] in '.,;:':
+        return False
+    letters = [char for char in line if char.isalpha()]
+    return bool(NUMBERED_HEADING.match(line)) or (len(letters) > 2 and line.upper() == line)
+
+def blocks_from_text(text: str, page: Optional[int] = None) -> List[TextBlock]:
+    """
+    Split extracted plain text into heading and paragraph blocks.
+
+    Paragraphs end at blank lines, or at a line ending a sentence when the
+    text has no blank lines (as PDF extraction often returns). Markdown
+    headings and short numbered or upper-case lines are headings.
+
+    Args:
+        text: Extracted text
+        page: Page number of the text, if known
+
+    Returns:
+        Blocks in document order
+    """
+    blocks: List[TextBlock] = []
+    paragraph: List[str] = []
+    split_on_sentences = '\n\n' not in text.replace('\r\n', '\n')
+
+    def flush():
+        if paragraph:
+            blocks.append(TextBlock(' '.join(paragraph), PARAGRAPH, page))
+            paragraph.clear()
+
+    for raw_line in text.splitlines():
+        line = ' '.join(raw_line.split())
+        if not line:
+            flush()
+            continue
+        if MARKDOWN_HEADING.match(line) or _looks_like_heading(line):
+            flush()
+            blocks.append(TextBlock(MARKDOWN_HEADING.sub('', line), HEADING, page))
+            continue
+        paragraph.append(line)
+        if split_on_sentences and line[-1] in '.!?':
+            flush()
+    flush()
+    return blocks
+
+class StructuredChunker:
+    """
+    Streaming chunker that packs paragraphs into word-bounded chunks.
+
+    A heading closes the current chunk (unless it is still small) so chunks
+    stay within one section. Overlap, when configured, carries the trailing
+    sentences of a chunk into the next chunk of the same section.
+    """
+
+    def __init__(self, chunk_size: int = 200, chunk_overlap: int = 0):
+        """
+        Initialize the chunker.
+
+        Args:
+            chunk_size: Target maximum words per chunk
+            chunk_overlap: Maximum words carried over between chunks of a section
+        """
+        self.chunk_size = max(chunk_size, 1)
+        self.chunk_overlap = max(min(chunk_overlap, self.chunk_size // 2), 0)
+        # Chunks smaller than this absorb the following section
+        self.min_chunk_words = self.chunk_size // 4
+
+    def _pieces(self, block: TextBlock, offset: int) -> Iterator[tuple]:
+        """Split a block into (text, words, start, end) pieces of at most chunk_size words."""
+        words = len(block.text.split())
+        if words <= self.chunk_size:
+            yield block.text, words, offset, offset + len(block.text)
+            return
+
+        position = 0
+        for sentence in SENTENCE_END.split(block.text):
+            start = block.text.index(sentence, position)
+            position = start + len(sentence)
+            sentence_words = sentence.split()
+            if len(sentence_words) <= self.chunk_size:
+                yield sentence, len(sentence_words), offset + start, offset + position
+                continue
+            # A single sentence longer than a chunk is cut by words
+            cursor = start
+            for i in range(0, len(sentence_words), self.chunk_size):
+                part = ' '.join(sentence_words[i:i + self.chunk_size])
+                part_start = block.text.index(sentence_words[i], cursor)
+                cursor = part_start + len(sentence_words[i])
+                yield part, len(sentence_words[i:i + self.chunk_size]), offset + part_start, offset + part_start + len(part)
+
+    def stream(self) -> "ChunkStream":
+        """Start chunking a document whose blocks arrive incrementally."""
+        return ChunkStream(self)
+
+    def chunk(self, blocks: Iterable[TextBlock]) -> Iterator[Chunk]:
+        """
+        Chunk a stream of blocks.
+
+        Character offsets refer to the document text formed by joining the
+        block texts with newlines.
+
+        Args:
+            blocks: Headings and paragraphs in document order
+
+        Yields:
+            Chunks in document order
+        """
+        stream = self.stream()
+        for block in blocks:
+            yield from stream.add(block)
+        yield from stream.finish()
+
+class ChunkStream:
+    """Chunking state of one document, fed one block at a time."""
+
+    def __init__(self, chunker: StructuredChunker):
+        self.chunker = chunker
+        self._pieces: List[tuple] = []  # (text, words, start, end, page, block text, block offset)
+        self._words = 0
+        self._section = ''
+        self._chunk_section = ''
+        self._offset = 0
+
+    def _build(self) -> Chunk:
+        pieces = self._pieces
+        pages = [piece[4] for piece in pieces if piece[4] is not None]
+        parts = [pieces[0][0]]
+        for previous, piece in zip(pieces, pieces[1:]):
+            if piece[6] == previous[6]:
+                # Keep the original whitespace between pieces of one block
+                parts.append(piece[5][previous[3] - piece[6]:piece[2] - piece[6]])
+            else:
+                parts.append('\n')
+            parts.append(piece[0])
+        return Chunk(
+            text=''.join(parts),
+            section=self._chunk_section,
+            page_start=pages[0] if pages else None,
+            page_end=pages[-1] if pages else None,
+            char_start=pieces[0][2],
+            char_end=pieces[-1][3]
+        )
+
+    def _carry_over(self) -> List[tuple]:
+        carried: List[tuple] = []
+        carried_words = 0
+        for piece in reversed(self._pieces):
+            if carried_words + piece[1] > self.chunker.chunk_overlap:
+                break
+            carried.insert(0, piece)
+            carried_words += piece[1]
+        return carried
+
+    def add(self, block: TextBlock) -> List[Chunk]:
+        """
+        Add the next block of the document.
+
+        Returns:
+            Chunks completed by this block, in document order
+        """
+        text = block.text.strip()
+        if not text:
+            return []
+        block = block._replace(text=text)
+        chunker = self.chunker
+        completed = []
+
+        if block.kind == HEADING:
+            if self._pieces and self._words >= chunker.min_chunk_words:
+                completed.append(self._build())
+                self._pieces, self._words = [], 0
+            self._section = text
+            if not self._pieces:
+                self._chunk_section = self._section
+
+        for piece_text, piece_words, start, end in chunker._pieces(block, self._offset):
+            if self._pieces and self._words + piece_words > chunker.chunk_size:
+                completed.append(self._build())
+                self._pieces = self._carry_over() if block.kind != HEADING else []
+                self._words = sum(piece[1] for piece in self._pieces)
+                if self._words + piece_words > chunker.chunk_size:
+                    self._pieces, self._words = [], 0
+                self._chunk_section = self._section
+            if not self._pieces:
+                self._chunk_section = self._section
+            self._pieces.append((piece_text, piece_words, start, end, block.page, text, self._offset))
+            self._words += piece_words
+
+        self._offset += len(text) + 1
+        return completed
+
+    def finish(self) -> List[Chunk]:
+        """Close the document, returning its last chunk if any."""
+        if not self._pieces:
+            return []
+        last = self._build()
+        self._pieces, self._words = [], 0
+        return [last]
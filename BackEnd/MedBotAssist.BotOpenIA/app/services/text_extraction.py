@@ -0,0 +1,135 @@
+"""
+Document text extraction for MedBot Assistant
+
+Module-level extraction functions that turn PDF, DOCX, HTML and plain text
+files into heading and paragraph blocks. They only depend on the parsing
+libraries so they can run in a process pool, away from the event loop. PDFs
+are read from a file path and parsed page by page, so a large document can be
+extracted in page ranges while earlier pages are already being chunked and
+embedded.
+"""
+
+from typing import Iterator, List, Optional
+from io import BytesIO
+import os
+import threading
+
+import PyPDF2
+import docx
+from bs4 import BeautifulSoup
+
+from app.services.text_chunker import TextBlock, HEADING, PARAGRAPH, blocks_from_text
+
+SUPPORTED_FILE_TYPES = "PDF, DOCX, DOC, TXT, MD, CSV, HTML, HTM"
+
+# Parsed PDF kept per worker thread so consecutive page ranges skip
+# re-parsing; PdfReader is not thread-safe, so threads never share one
+_cached_pdf = threading.local()
+
+class UnsupportedFileType(ValueError):
+    """Raised for files whose type cannot be extracted."""
+
+def detect_file_kind(file_name: str, content_type: str) -> str:
+    """
+    Get the extractor for a file from its extension or content type.
+
+    Returns:
+        One of 'pdf', 'docx', 'text' or 'html'
+
+    Raises:
+        UnsupportedFileType: If no extractor handles the file
+    """
+    file_extension = file_name.lower().split('.')[-1] if '.' in file_name else ''
+    content_type = (content_type or '').lower()
+
+    if file_extension == 'pdf' or 'pdf' in content_type:
+        return 'pdf'
+    if file_extension in ['docx', 'doc'] or 'word' in content_type:
+        return 'docx'
+    if file_extension in ['txt', 'md', 'csv'] or 'text' in content_type:
+        return 'text'
+    if file_extension in ['html', 'htm'] or 'html' in content_type:
+        return 'html'
+    raise UnsupportedFileType(f"File type '.{file_extension}' is not supported. Supported: {SUPPORTED_FILE_TYPES}")
+
+def _pdf_reader(path: str) -> PyPDF2.PdfReader:
+    """Open a PDF, reusing the reader of this thread's previous call for the same file."""
+    file_stat = os.stat(path)
+    key = (path, file_stat.st_size, file_stat.st_mtime_ns)
+    cached = getattr(_cached_pdf, 'entry', None)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    reader = PyPDF2.PdfReader(path)
+    _cached_pdf.entry = (key, reader)
+    return reader
+
+def pdf_page_count(path: str) -> int:
+    """Number of pages of a PDF file."""
+    return len(_pdf_reader(path).pages)
+
+def iter_pdf_blocks(path: str, start_page: int = 0, end_page: Optional[int] = None) -> Iterator[TextBlock]:
+    """
+    Parse a PDF page by page.
+
+    Args:
+        path: PDF file path
+        start_page: First page, zero-based
+        end_page: Page after the last one; None reads to the end
+
+    Yields:
+        Blocks of each page in order, tagged with one-based page numbers
+    """
+    pages = _pdf_reader(path).pages
+    end_page = len(pages) if end_page is None else min(end_page, len(pages))
+    for page_index in range(start_page, end_page):
+        yield from blocks_from_text(pages[page_index].extract_text() or "", page=page_index + 1)
+
+def extract_pdf_pages(path: str, start_page: int, end_page: int) -> List[TextBlock]:
+    """Blocks of a page range of a PDF, as one picklable task result."""
+    return list(iter_pdf_blocks(path, start_page, end_page))
+
+def extract_docx_blocks(file_content: bytes) -> List[TextBlock]:
+    """Blocks of a DOCX file, using paragraph styles for headings."""
+    document = docx.Document(BytesIO(file_content))
+    blocks = []
+    for paragraph in document.paragraphs:
+        text = paragraph.text.strip()
+        if not text:
+            continue
+        style = (paragraph.style.name if paragraph.style is not None else '').lower()
+        is_heading = style.startswith(('heading', 'title', 'título', 'titulo'))
+        blocks.append(TextBlock(text, HEADING if is_heading else PARAGRAPH))
+    return blocks
+
+def extract_html_blocks(file_content: bytes) -> List[TextBlock]:
+    """Blocks of an HTML file, using h1-h6 elements as headings."""
+    soup = BeautifulSoup(file_content, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    headings = {' '.join(h.get_text(' ').split()) for h in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])}
+
+    blocks = []
+    for line in soup.get_text(separator='\n').splitlines():
+        text = ' '.join(line.split())
+        if text:
+            blocks.append(TextBlock(text, HEADING if text in headings else PARAGRAPH))
+    return blocks
+
+def extract_blocks(file_content: bytes, file_kind: str) -> List[TextBlock]:
+    """
+    Blocks of a non-PDF file.
+
+    Args:
+        file_content: Raw file bytes
+        file_kind: Extractor returned by detect_file_kind
+
+    Returns:
+        Blocks in document order
+    """
+    if file_kind == 'docx':
+        return extract_docx_blocks(file_content)
+    if file_kind == 'html':
+        return extract_html_blocks(file_content)
+    if file_kind == 'text':
+        return blocks_from_text(file_content.decode('utf-8', errors='ignore'))
+    raise UnsupportedFileType(f"No block extractor for '{file_kind}' files")
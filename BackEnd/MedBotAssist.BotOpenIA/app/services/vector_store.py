@@ -0,0 +1,710 @@
+"""
+In-memory vector store for MedBot Assistant
+
+Keeps every chunk embedding in one contiguous, L2-normalized float32 matrix with
+a parallel array of chunk ids, so a similarity query is a single matrix-vector
+product followed by an argpartition top-k selection. The matrix can be kept as
+float16 or per-row-scaled int8 to fit more chunks per pod, optionally re-ranking
+the best candidates in full precision. Large stores can route queries through an
+approximate IVF index instead of scanning every row. Per-field inverted indexes
+of metadata records let filtered searches (by filename, file type, etag or
+date) score only the matching rows. Chunk texts and metadata are kept in a
+columnar ChunkStore rather than one object per chunk. The store can be saved to
+a directory as NumPy files plus a JSON sidecar and memory-mapped back on load.
+"""
+
+from typing import List, Dict, Any, Optional, Set, Tuple
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import logging
+import os
+import sys
+import numpy as np
+
+from app.services.ann_index import IVFIndex
+from app.services.chunk_store import ChunkDocuments, ChunkStore, VectorInMemoryDocument
+
+logger = logging.getLogger(__name__)
+
+EMBEDDINGS_FILE = "embeddings.npy"
+
+# Chunks sampled, and bytes per row entry in a set, to estimate the legacy layout
+LEGACY_SAMPLE_SIZE = 256
+LEGACY_POSTING_BYTES = 64
+
+STORAGE_DTYPES = {
+    'float32': np.float32,
+    'float16': np.float16,
+    'int8': np.int8
+}
+
+# Rows converted to float32 at a time when scoring a compressed matrix
+SCORING_BLOCK_ROWS = 4096
+
+# Metadata fields with an inverted index of records, usable as search filters
+FILTERABLE_FIELDS = ('filename', 'file_type', 'etag', 'last_modified', 'vectorization_timestamp')
+
+RANGE_OPERATORS = ('gt', 'gte', 'lt', 'lte')
+
+def quantize(vectors: np.ndarray, storage: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Convert float32 rows to the storage dtype.
+
+    Returns:
+        Tuple of (matrix, scales); scales holds the per-row int8 scale and is
+        None for float storage
+    """
+    if storage == 'int8':
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        matrix = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return matrix, scales.astype(np.float32)
+    return vectors.astype(STORAGE_DTYPES[storage]), None
+
+def _comparable(value: Any) -> Any:
+    """Parse ISO and HTTP date strings so date ranges compare chronologically."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            try:
+                value = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return value
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+def _matches(value: Any, condition: Any) -> bool:
+    """Whether a metadata value satisfies one filter condition."""
+    if isinstance(condition, dict):
+        unknown = set(condition) - set(RANGE_OPERATORS)
+        if unknown:
+            raise ValueError(f"Unsupported range operators: {', '.join(sorted(unknown))}")
+        value = _comparable(value)
+        try:
+            return all((
+                'gt' not in condition or value > _comparable(condition['gt']),
+                'gte' not in condition or value >= _comparable(condition['gte']),
+                'lt' not in condition or value < _comparable(condition['lt']),
+                'lte' not in condition or value <= _comparable(condition['lte'])
+            ))
+        except TypeError:
+            # Missing or unparseable values never match a range
+            return False
+    if isinstance(condition, (list, tuple, set)):
+        return value in condition
+    return value == condition
+
+def dequantize(matrix: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+    """Convert stored rows back to float32."""
+    vectors = matrix.astype(np.float32)
+    if scales is not None:
+        vectors *= scales[:, None]
+    return vectors
+
+class InMemoryVectorStore:
+    """
+    Contiguous embedding matrix plus chunk documents.
+
+    Rows are normalized on insert, so cosine similarity against a normalized
+    query reduces to a dot product. The matrix grows by doubling its capacity,
+    which keeps appends amortized O(1) per chunk.
+    """
+
+    def __init__(self, initial_capacity: int = 1024, storage: str = 'float32', rerank_candidates: int = 0,
+                 index: Optional[IVFIndex] = None):
+        """
+        Initialize an empty store.
+
+        Args:
+            initial_capacity: Number of rows allocated on the first insert
+            storage: Matrix dtype: 'float32', 'float16' or 'int8' (per-row scaled)
+            rerank_candidates: With compressed storage, number of best candidates
+                re-scored in full precision; 0 disables re-ranking. Re-ranking
+                keeps a float32 copy of the rows (memory-mapped when loaded
+                from a snapshot).
+            index: Optional approximate index; searches stay exact until the
+                store reaches the index's min_rows
+        """
+        if storage not in STORAGE_DTYPES:
+            raise ValueError(f"Unsupported vector storage '{storage}'. Supported: {', '.join(STORAGE_DTYPES)}")
+
+        self.initial_capacity = initial_capacity
+        self.storage = storage
+        self.rerank_candidates = rerank_candidates if storage != 'float32' else 0
+        # Chunk ids, texts and metadata by row; documents materializes them by id
+        self.chunks = ChunkStore(initial_capacity)
+        self.documents = ChunkDocuments(self.chunks)
+        self._matrix: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._full: Optional[np.ndarray] = None
+        self._size = 0
+        self.index = index
+        # field -> value -> metadata records holding that value, for filtered
+        # searches; rebuilt when the chunk store's records change
+        self._postings: Dict[str, Dict[Any, Set[int]]] = {}
+        self._postings_version: Optional[int] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def dimension(self) -> Optional[int]:
+        """Embedding dimension, or None until the first insert."""
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """Populated rows of the embedding matrix in float32 precision."""
+        if self._matrix is None:
+            return np.empty((0, 0), dtype=np.float32)
+        if self._full is not None:
+            return self._full[:self._size]
+        if self.storage == 'float32':
+            return self._matrix[:self._size]
+        return dequantize(self._matrix[:self._size], None if self._scales is None else self._scales[:self._size])
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the populated rows of the embedding arrays."""
+        if self._matrix is None:
+            return 0
+        total = self._matrix[:self._size].nbytes
+        if self._scales is not None:
+            total += self._scales[:self._size].nbytes
+        if self._full is not None:
+            total += self._full[:self._size].nbytes
+        return total
+
+    def get_memory_stats(self) -> Dict[str, Any]:
+        """
+        Approximate memory held per chunk, with an estimate for the old layout.
+
+        legacy_bytes_per_chunk estimates the previous one-object-per-chunk
+        layout (document object, text string, metadata dict and a row entry
+        per filterable field) from a sample of the stored chunks, so the gain
+        of the columnar layout can be compared on the same data.
+
+        Returns:
+            Dictionary with byte counts, bytes_per_chunk and chunks_per_gib
+        """
+        stats: Dict[str, Any] = {'embedding_bytes': self.nbytes}
+        stats.update(self.chunks.get_memory_stats())
+        count = stats['chunks']
+        stats['total_bytes'] = (stats['embedding_bytes'] + stats['row_bytes'] + stats['text_bytes']
+                                + stats['id_bytes'] + stats['record_bytes'])
+        stats['bytes_per_chunk'] = round(stats['total_bytes'] / count, 1) if count else 0
+        stats['chunks_per_gib'] = int(2 ** 30 / stats['bytes_per_chunk']) if count else 0
+
+        legacy = 0
+        sample = range(0, count, max(count // LEGACY_SAMPLE_SIZE, 1))
+        for row in sample:
+            doc = self.chunks.document(row)
+            legacy += sys.getsizeof(doc) + sys.getsizeof(doc.content) + sys.getsizeof(doc.metadata)
+            legacy += sum(sys.getsizeof(value) for value in doc.metadata.values())
+            legacy += LEGACY_POSTING_BYTES * sum(1 for field in FILTERABLE_FIELDS if field in doc.metadata)
+        per_chunk = legacy / len(sample) if count else 0
+        stats['legacy_bytes_per_chunk'] = round(per_chunk + (stats['embedding_bytes'] + stats['id_bytes']) / count, 1) if count else 0
+        return stats
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """L2-normalize rows in place, leaving zero vectors untouched."""
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors /= norms
+        return vectors
+
+    def _allocate(self, capacity: int, dimension: int):
+        """Allocate the row arrays with the given capacity, copying populated rows."""
+        matrix = np.zeros((capacity, dimension), dtype=STORAGE_DTYPES[self.storage])
+        scales = np.ones(capacity, dtype=np.float32) if self.storage == 'int8' else None
+        full = np.zeros((capacity, dimension), dtype=np.float32) if self.rerank_candidates else None
+
+        if self._matrix is not None and self._size:
+            matrix[:self._size] = self._matrix[:self._size]
+            if scales is not None:
+                scales[:self._size] = self._scales[:self._size]
+            if full is not None:
+                full[:self._size] = self._full[:self._size]
+
+        self._matrix, self._scales, self._full = matrix, scales, full
+
+    def _ensure_capacity(self, rows_needed: int, dimension: int):
+        """Grow the matrix geometrically so it can hold rows_needed rows."""
+        if self._matrix is None:
+            self._allocate(max(self.initial_capacity, rows_needed), dimension)
+            return
+
+        if dimension != self._matrix.shape[1]:
+            raise ValueError(f"Embedding dimension {dimension} does not match store dimension {self._matrix.shape[1]}")
+
+        capacity = self._matrix.shape[0]
+        # A memory-mapped snapshot is read-only, so the first append copies it
+        writeable = self._matrix.flags.writeable and (self._full is None or self._full.flags.writeable)
+        if rows_needed <= capacity and writeable:
+            return
+
+        capacity = max(capacity, 1)
+        while capacity < rows_needed:
+            capacity *= 2
+
+        self._allocate(capacity, dimension)
+        logger.debug(f"Vector store matrix grown to {capacity} rows")
+
+    def _set_rows(self, rows: List[int], vectors: np.ndarray):
+        """Write normalized float32 vectors into the given rows."""
+        matrix, scales = quantize(vectors, self.storage)
+        self._matrix[rows] = matrix
+        if scales is not None:
+            self._scales[rows] = scales
+        if self._full is not None:
+            self._full[rows] = vectors
+
+    def add_documents(self, ids: List[str], contents: List[str], embeddings: List[List[float]],
+                      metadatas: List[Dict[str, Any]]) -> int:
+        """
+        Append a batch of chunks to the store.
+
+        Chunks whose id is already stored overwrite their existing row.
+
+        Args:
+            ids: Chunk ids
+            contents: Chunk texts
+            embeddings: Chunk embeddings, all with the same dimension
+            metadatas: Chunk metadata dictionaries
+
+        Returns:
+            Number of chunks stored
+        """
+        if not ids:
+            return 0
+
+        vectors = self._normalize(np.array(embeddings, dtype=np.float32).reshape(len(ids), -1))
+        self._ensure_capacity(self._size + len(ids), vectors.shape[1])
+
+        rows = [self.chunks.put(doc_id, content, metadata) for doc_id, content, metadata in zip(ids, contents, metadatas)]
+        self._size = len(self.chunks)
+
+        self._set_rows(rows, vectors)
+        if self.index is not None:
+            if self.index.needs_training(self._size):
+                self.index.train(self.embeddings)
+            else:
+                self.index.assign(rows, vectors)
+        return len(ids)
+
+    def remove_documents(self, ids: List[str]) -> int:
+        """
+        Remove chunks and compact the matrix so populated rows stay contiguous.
+
+        Args:
+            ids: Chunk ids to remove; unknown ids are ignored
+
+        Returns:
+            Number of chunks removed
+        """
+        doomed = {doc_id for doc_id in ids if doc_id in self.chunks}
+        if not doomed:
+            return 0
+
+        keep_rows = [row for row, doc_id in enumerate(self.chunks.ids) if doc_id not in doomed]
+        kept = self._matrix[keep_rows]
+        kept_scales = None if self._scales is None else self._scales[keep_rows]
+        kept_full = None if self._full is None else self._full[keep_rows]
+
+        self._size = 0
+        self._ensure_capacity(len(keep_rows), self._matrix.shape[1])
+        self._matrix[:len(keep_rows)] = kept
+        if kept_scales is not None:
+            self._scales[:len(keep_rows)] = kept_scales
+        if kept_full is not None:
+            self._full[:len(keep_rows)] = kept_full
+
+        self.chunks.keep(keep_rows)
+        self._size = len(self.chunks)
+        if self.index is not None:
+            self.index.keep(keep_rows)
+
+        return len(doomed)
+
+    def copy(self) -> "InMemoryVectorStore":
+        """
+        Independent copy of the store.
+
+        Populated rows and the chunk store are copied (a memory-mapped
+        snapshot is read into memory), so changes to either store never show
+        in the other.
+        """
+        clone = InMemoryVectorStore(self.initial_capacity, self.storage, self.rerank_candidates,
+                                    index=None if self.index is None else self.index.copy())
+        if self._matrix is not None:
+            clone._matrix = np.array(self._matrix[:self._size])
+            clone._scales = None if self._scales is None else np.array(self._scales[:self._size])
+            clone._full = None if self._full is None else np.array(self._full[:self._size])
+        clone.chunks = self.chunks.copy()
+        clone.documents = ChunkDocuments(clone.chunks)
+        clone._size = self._size
+        return clone
+
+    def _record_postings(self) -> Dict[str, Dict[Any, Set[int]]]:
+        """Filterable metadata values -> records holding them, rebuilt when records change."""
+        if self._postings_version != self.chunks.records_version:
+            postings: Dict[str, Dict[Any, Set[int]]] = {field: {} for field in FILTERABLE_FIELDS}
+            for record_id, record in enumerate(self.chunks.records):
+                for field, values in postings.items():
+                    if field in record:
+                        values.setdefault(record[field], set()).add(record_id)
+            self._postings = postings
+            self._postings_version = self.chunks.records_version
+        return self._postings
+
+    def filter_rows(self, filters: Dict[str, Any]) -> np.ndarray:
+        """
+        Rows whose metadata satisfies every filter, using the inverted indexes.
+
+        Each filter value is either a single value (equality), a list of
+        accepted values, or a dict of range bounds ('gt', 'gte', 'lt', 'lte').
+        Date strings in ISO or HTTP format are compared as dates. Conditions
+        are evaluated once per distinct value, not once per row; the matching
+        metadata records are then turned into rows with one vectorized scan.
+
+        Args:
+            filters: Field name to condition
+
+        Returns:
+            Sorted array of matching rows
+
+        Raises:
+            ValueError: If a field is not in FILTERABLE_FIELDS
+        """
+        postings = self._record_postings()
+        matched: Optional[Set[int]] = None
+        for field, condition in filters.items():
+            if field not in postings:
+                raise ValueError(f"Cannot filter on '{field}'. Filterable fields: {', '.join(FILTERABLE_FIELDS)}")
+
+            field_records: Set[int] = set()
+            for value, records in postings[field].items():
+                if _matches(value, condition):
+                    field_records |= records
+            matched = field_records if matched is None else matched & field_records
+            if not matched:
+                return np.empty(0, dtype=np.int64)
+
+        if matched is None:
+            return np.arange(self._size)
+        records = np.fromiter(matched, dtype=np.int32, count=len(matched))
+        return np.flatnonzero(np.isin(self.chunks.record_column, records))
+
+    def find_ids(self, filters: Dict[str, Any]) -> List[str]:
+        """Ids of the chunks whose metadata satisfies the filters."""
+        return [self.chunks.id_at(row) for row in self.filter_rows(filters)]
+
+    def neighbors(self, doc_id: str, window: int = 1) -> List[VectorInMemoryDocument]:
+        """
+        A chunk and the chunks up to window positions before and after it in
+        the same file, in document order.
+
+        Chunks of a file are stored in consecutive rows, so neighbours are
+        looked up by row and checked against their chunk_index; the file's
+        postings are used if the rows are not contiguous.
+
+        Args:
+            doc_id: Id of a stored chunk
+            window: Neighbouring chunks on each side
+
+        Returns:
+            Documents ordered by chunk_index, including the chunk itself
+        """
+        chunks = self.chunks
+        doc_row = chunks.row_of(doc_id)
+        if doc_row is None:
+            raise KeyError(doc_id)
+        filename = chunks.field(doc_row, 'filename')
+        chunk_index = chunks.field(doc_row, 'chunk_index')
+        if chunk_index is None or window <= 0:
+            return [chunks.document(doc_row)]
+
+        wanted = range(chunk_index - window, chunk_index + window + 1)
+        found = {}
+        for row in range(max(doc_row - window, 0), min(doc_row + window + 1, self._size)):
+            if chunks.field(row, 'filename') == filename and chunks.field(row, 'chunk_index') == chunk_index + row - doc_row:
+                found[chunk_index + row - doc_row] = row
+
+        if len(found) < len(wanted):
+            for row in self.filter_rows({'filename': filename}).tolist():
+                if chunks.field(row, 'chunk_index') in wanted:
+                    found[chunks.field(row, 'chunk_index')] = row
+
+        return [chunks.document(found[index]) for index in sorted(found)]
+
+    def search(self, query_embedding: List[float], top_k: int = 5,
+               filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Return the top_k chunks by cosine similarity to the query.
+
+        Args:
+            query_embedding: Query vector
+            top_k: Number of results to return
+            filters: Optional metadata filters (see filter_rows); only matching
+                rows are scored
+
+        Returns:
+            List of documents with similarity scores, best first
+        """
+        if self._size == 0 or top_k <= 0:
+            return []
+
+        query = self._normalize(np.array(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+        k = min(top_k, self._size)
+
+        if filters:
+            # Exact scan restricted to the rows matching the filters
+            rows = self.filter_rows(filters)
+            if rows.size == 0:
+                return []
+        elif self.index is not None and self.index.is_active(self._size):
+            # Score only the rows of the clusters closest to the query
+            rows = self.index.candidates(query, min_candidates=self._shortlist_size(k))
+        else:
+            rows = None
+
+        return self._rank(query, rows, self._score(query, rows), k)
+
+    def score_ids(self, query_embedding: List[float], ids: List[str]) -> np.ndarray:
+        """
+        Cosine similarity of specific chunks to the query.
+
+        Args:
+            query_embedding: Query vector
+            ids: Ids of stored chunks
+
+        Returns:
+            One similarity per id, in order
+        """
+        if not ids:
+            return np.empty(0, dtype=np.float32)
+        query = self._normalize(np.array(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+        rows = np.array([self.chunks.row_of(doc_id) for doc_id in ids], dtype=np.int64)
+        if self._full is not None:
+            return self._full[rows] @ query
+        return self._score(query, rows)
+
+    def search_batch(self, query_embeddings: List[List[float]], top_k: int = 5,
+                     filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Return the top_k chunks for each of several queries.
+
+        Exact searches score every query with a single matrix-matrix product;
+        with an active approximate index each query probes its own clusters.
+
+        Args:
+            query_embeddings: Query vectors
+            top_k: Number of results per query
+            filters: Optional metadata filters applied to every query
+
+        Returns:
+            One list of documents with similarity scores per query, best first
+        """
+        if not len(query_embeddings):
+            return []
+        if self._size == 0 or top_k <= 0:
+            return [[] for _ in query_embeddings]
+        if not filters and self.index is not None and self.index.is_active(self._size):
+            return [self.search(query, top_k=top_k) for query in query_embeddings]
+
+        queries = self._normalize(np.array(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1))
+        k = min(top_k, self._size)
+
+        rows = None
+        if filters:
+            rows = self.filter_rows(filters)
+            if rows.size == 0:
+                return [[] for _ in query_embeddings]
+
+        scores = self._score(queries.T, rows)
+        return [self._rank(query, rows, scores[:, i], k) for i, query in enumerate(queries)]
+
+    def _shortlist_size(self, k: int) -> int:
+        """Candidates kept from the first scoring pass."""
+        return max(k, self.rerank_candidates) if self._full is not None else k
+
+    def _rank(self, query: np.ndarray, rows: Optional[np.ndarray], scores: np.ndarray, k: int) -> List[Dict[str, Any]]:
+        """
+        Turn the scores of one query into its top-k results.
+
+        Args:
+            query: Normalized query vector
+            rows: Rows the scores belong to, or None when every row was scored
+            scores: Similarity of each scored row
+            k: Number of results
+
+        Returns:
+            List of documents with similarity scores, best first
+        """
+        positions = self._top_rows(scores, min(self._shortlist_size(k), scores.shape[0]))
+        ranked = positions if rows is None else rows[positions]
+        scores = scores[positions]
+
+        if self._full is not None and self.rerank_candidates:
+            # Shortlist on the compressed matrix, then re-score in full precision
+            scores = self._full[ranked] @ query
+            order = self._top_rows(scores, k)
+            ranked, scores = ranked[order], scores[order]
+
+        # Texts and metadata are materialized only for the returned rows
+        results = []
+        for row, score in zip(ranked[:k].tolist(), scores[:k]):
+            results.append({
+                'id': self.chunks.id_at(row),
+                'content': self.chunks.content(row),
+                'metadata': self.chunks.metadata(row),
+                'similarity_score': float(score)
+            })
+        return results
+
+    def _score(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Similarity of every row, or of the given rows, to normalized queries.
+
+        Args:
+            queries: One query vector, or a (dimension, n) matrix of query columns
+            rows: Rows to score; None scores the whole matrix
+
+        Returns:
+            Scores with one entry per row (one column per query for a matrix)
+        """
+        if rows is not None:
+            scores = self._matrix[rows].astype(np.float32, copy=False) @ queries
+            scales = None if self._scales is None else self._scales[rows]
+        elif self.storage == 'float32':
+            return self._matrix[:self._size] @ queries
+        else:
+            # Compressed rows are widened to float32 block by block to bound
+            # the temporary memory
+            scores = np.empty((self._size,) + queries.shape[1:], dtype=np.float32)
+            for start in range(0, self._size, SCORING_BLOCK_ROWS):
+                end = min(start + SCORING_BLOCK_ROWS, self._size)
+                scores[start:end] = self._matrix[start:end].astype(np.float32) @ queries
+            scales = self._scales[:self._size] if self._scales is not None else None
+
+        if scales is not None:
+            scores *= scales if queries.ndim == 1 else scales[:, None]
+        return scores
+
+    @staticmethod
+    def _top_rows(scores: np.ndarray, k: int) -> np.ndarray:
+        """Rows of the k highest scores, best first."""
+        if k < scores.shape[0]:
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(scores.shape[0])
+        return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+    def clear(self):
+        """Remove every chunk and release the matrix."""
+        self.chunks.clear()
+        self._matrix = None
+        self._scales = None
+        self._full = None
+        self._size = 0
+        if self.index is not None:
+            self.index.clear()
+
+    def save(self, directory: str):
+        """
+        Write the store to a directory.
+
+        Embeddings go to a float32 .npy file that load() memory-maps (rows of
+        compressed stores without re-ranking are dequantized); the chunk store
+        writes its row array and text arena next to it, with ids and interned
+        metadata in a JSON sidecar. A trained index is saved alongside.
+
+        Args:
+            directory: Target directory, created if missing
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        np.save(os.path.join(directory, EMBEDDINGS_FILE), np.ascontiguousarray(self.embeddings, dtype=np.float32))
+        self.chunks.save(directory)
+        if self.index is not None:
+            self.index.save(directory)
+
+    def load(self, directory: str) -> bool:
+        """
+        Replace the store contents with a snapshot written by save().
+
+        With float32 storage the embedding matrix is memory-mapped read-only
+        and copied into a writable array only when new chunks are appended.
+        Compressed storage quantizes the mapped rows into memory, keeping the
+        mapping as the full-precision source for re-ranking. Chunk texts are
+        memory-mapped as well and decoded only for returned results.
+
+        Args:
+            directory: Directory holding the snapshot
+
+        Returns:
+            True if the snapshot was loaded, False if it is missing or inconsistent
+        """
+        embeddings_path = os.path.join(directory, EMBEDDINGS_FILE)
+        if not os.path.exists(embeddings_path):
+            return False
+
+        try:
+            matrix = np.load(embeddings_path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read vector store snapshot from {directory}: {e}")
+            return False
+
+        chunks = ChunkStore(self.chunks.initial_capacity)
+        if not chunks.load(directory):
+            return False
+        if matrix.ndim != 2 or matrix.shape[0] != len(chunks):
+            logger.warning(f"Vector store snapshot in {directory} is inconsistent: {matrix.shape[0]} embeddings for {len(chunks)} chunks")
+            return False
+
+        self.clear()
+        self.chunks = chunks
+        self.documents = ChunkDocuments(chunks)
+        self._size = len(chunks)
+        if not self._size:
+            return True
+
+        if self.storage == 'float32':
+            self._matrix = matrix
+        else:
+            self._matrix, self._scales = quantize(np.asarray(matrix, dtype=np.float32), self.storage)
+            self._full = matrix if self.rerank_candidates else None
+
+        if self.index is not None:
+            if not self.index.load(directory, self._size, matrix.shape[1]) and self.index.needs_training(self._size):
+                self.index.train(self.embeddings)
+        return True
+
+    def map_embeddings(self, directory: str) -> bool:
+        """
+        Serve a float32 store from the embedding file save() wrote.
+
+        The matrix is swapped for a read-only memory map of the file, whose
+        pages the OS shares between every process mapping it, instead of
+        private memory. The store must not have changed since it was saved.
+
+        Args:
+            directory: Directory the store was saved to
+
+        Returns:
+            True if the matrix is now memory-mapped
+        """
+        if self.storage != 'float32' or not self._size:
+            return False
+        try:
+            matrix = np.load(os.path.join(directory, EMBEDDINGS_FILE), mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not map vector store snapshot in {directory}: {e}")
+            return False
+        if matrix.shape != (self._size, self.dimension):
+            return False
+        self._matrix = matrix
+        return True
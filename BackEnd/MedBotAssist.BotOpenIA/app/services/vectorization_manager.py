@@ -5,36 +5,61 @@ This service handles vectorization of files from Azure Blob Storage using OpenAI
 and in-memory vector storage for fast retrieval.
 """
 
-from typing import List, Dict, Any, Optional, Tuple
+from typing import AsyncIterator, List, Dict, Any, Mapping, Optional, Tuple
+import asyncio
+import heapq
+import json
 import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import weakref
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import aclosing
 from datetime import datetime
-from io import BytesIO
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 
 # Document processing
-import PyPDF2
-import docx
-from bs4 import BeautifulSoup
 
 # OpenAI embeddings
 from openai import AsyncOpenAI
 
 # Project imports
 from app.services.blob_service import BlobService
+from app.services.vector_store import InMemoryVectorStore, VectorInMemoryDocument
+from app.services.ann_index import IVFIndex
+from app.services.keyword_index import BM25Index
+from app.services.index_generation import IndexGeneration
+from app.services.text_chunker import Chunk, StructuredChunker, TextBlock
+from app.services.text_extraction import detect_file_kind, extract_blocks, extract_pdf_pages, pdf_page_count
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.embedding_cache import EmbeddingCache, embedding_cache_key
+from app.services.query_embedding_cache import QueryEmbeddingCache
+from app.services.ingestion_jobs import IngestionJob, IngestionJobManager
+from app.services.worker_coordination import FileLock, SharedIndexLock, LEADER_LOCK_FILE, WRITE_LOCK_FILE
 from app.core.config import settings
 from fastapi import HTTPException, status
 
 logger = logging.getLogger(__name__)
 
-class VectorInMemoryDocument:
-    """Represents a vectorized document chunk in memory."""
-    
-    def __init__(self, id: str, content: str, embedding: List[float], metadata: Dict[str, Any]):
-        self.id = id
-        self.content = content
-        self.embedding = np.array(embedding)
-        self.metadata = metadata
+# Bump when the on-disk snapshot layout changes so old snapshots are rebuilt
+INDEX_FORMAT_VERSION = 3
+MANIFEST_FILE = "index_manifest.json"
+EMBEDDING_CACHE_FILE = "embedding_cache.npz"
+
+# Reciprocal-rank fusion constant; larger values flatten the rank weights
+RRF_K = 60
+# Candidates taken from each ranking per requested hybrid result
+HYBRID_CANDIDATES_PER_RESULT = 4
+
+# Index readiness: 'cold' until warm_up is started, 'warming' while the
+# startup load or auto-vectorization runs, then 'ready' or 'unavailable'
+INDEX_COLD = 'cold'
+INDEX_WARMING = 'warming'
+INDEX_READY = 'ready'
+INDEX_UNAVAILABLE = 'unavailable'
 
 class VectorizationManager:
     """
@@ -51,67 +76,749 @@ class VectorizationManager:
             chunk_overlap: Overlap between chunks
         """
         self.chunk_size = chunk_size or settings.CHUNK_SIZE
-        self.chunk_overlap = chunk_overlap or settings.CHUNK_OVERLAP
+        self.chunk_overlap = settings.CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
+        self.chunker = StructuredChunker(self.chunk_size, self.chunk_overlap)
+        
+        # Published index generation: in-memory vector store, BM25 index over
+        # the same chunks (for exact-term and hybrid search) and vectorization
+        # log. Writers build a new generation and swap it in; see _publish()
+        self._generation = IndexGeneration(0, self._create_vector_store())
+        # Replaced generations, kept alive only by searches still using them
+        self._retired_generations = weakref.WeakSet()
+        
+        # Multi-worker mode: one worker (the ingestion leader, chosen by a file
+        # lock) builds the index; every worker maps the saved snapshot and
+        # picks up newer versions of it. See app/services/worker_coordination.py
+        self.shared_index = settings.VECTOR_INDEX_SHARED and settings.PERSIST_VECTOR_INDEX
+        if settings.VECTOR_INDEX_SHARED and not settings.PERSIST_VECTOR_INDEX:
+            logger.warning("VECTOR_INDEX_SHARED needs PERSIST_VECTOR_INDEX; each worker keeps its own index")
+        self._leader_lock = FileLock(os.path.join(settings.VECTOR_DB_PATH, LEADER_LOCK_FILE)) if self.shared_index else None
+        # Manifest file identity last seen, to skip re-reading an unchanged manifest
+        self._manifest_stamp: Optional[tuple] = None
+        
+        # Serializes operations that rewrite the store (revectorize, sync,
+        # startup); in multi-worker mode it also excludes the other workers
+        if self.shared_index:
+            self._ingestion_lock = SharedIndexLock(os.path.join(settings.VECTOR_DB_PATH, WRITE_LOCK_FILE), on_acquire=self.refresh_shared_index)
+        else:
+            self._ingestion_lock = asyncio.Lock()
+        # Background revectorize/sync jobs, run one at a time under the same lock
+        self.jobs = IngestionJobManager(self._ingestion_lock)
+        
+        # Startup warm-up runs in the background; see warm_up()
+        self.index_state = INDEX_COLD
+        self.warm_up_result: Optional[Dict[str, Any]] = None
+        self._warm_up_started: Optional[float] = None
+        self._warm_up_finished: Optional[float] = None
+        self._warm_up_task: Optional[asyncio.Task] = None
         
-        # In-memory storage for vectorized documents
-        self.documents: Dict[str, VectorInMemoryDocument] = {}
-        self.vectorization_log: Dict[str, Dict[str, Any]] = {}
+        # Bounds for concurrent ingestion: in-flight downloads and text
+        # extraction workers (embedding requests are bounded by the batcher)
+        self._download_semaphore = asyncio.Semaphore(settings.INGESTION_MAX_CONCURRENT_DOWNLOADS)
+        self._extraction_executor = self._create_extraction_executor()
+        # Caps files held in memory between download and storage
+        self._max_files_in_flight = (
+            settings.INGESTION_MAX_CONCURRENT_DOWNLOADS
+            + settings.INGESTION_EXTRACTION_WORKERS
+            + settings.INGESTION_MAX_CONCURRENT_EMBEDDINGS
+        )
         
         # Initialize services
         self.blob_service = BlobService()
         self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.embedding_batcher = EmbeddingBatcher(self.openai_client)
+        self.embedding_cache = EmbeddingCache(
+            max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+            path=os.path.join(settings.VECTOR_DB_PATH, EMBEDDING_CACHE_FILE) if settings.PERSIST_VECTOR_INDEX else None
+        )
+        self.query_embeddings = QueryEmbeddingCache(
+            self._embed_queries,
+            max_entries=settings.QUERY_EMBEDDING_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.QUERY_EMBEDDING_CACHE_TTL_SECONDS
+        )
         
         logger.info("VectorizationManager initialized with in-memory vector storage")
     
+    @staticmethod
+    def _create_extraction_executor() -> Executor:
+        """Build the pool selected by INGESTION_EXTRACTION_EXECUTOR for text extraction."""
+        workers = max(settings.INGESTION_EXTRACTION_WORKERS, 1)
+        if settings.INGESTION_EXTRACTION_EXECUTOR.lower() == 'thread':
+            return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vector-extract")
+        # Workers start from a clean interpreter rather than forking the running server
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method))
+    
+    def _create_vector_store(self) -> InMemoryVectorStore:
+        """Build an empty vector store with the configured storage and index."""
+        return InMemoryVectorStore(
+            storage=settings.VECTOR_STORAGE_DTYPE,
+            rerank_candidates=settings.VECTOR_RERANK_CANDIDATES,
+            index=self._create_ann_index()
+        )
+    
+    @staticmethod
+    def _create_ann_index() -> Optional[IVFIndex]:
+        """Build the approximate index selected by VECTOR_INDEX_TYPE, if any."""
+        index_type = settings.VECTOR_INDEX_TYPE.lower()
+        if index_type == 'ivf':
+            return IVFIndex(
+                n_lists=settings.VECTOR_IVF_LISTS,
+                n_probe=settings.VECTOR_IVF_PROBES,
+                min_rows=settings.VECTOR_ANN_MIN_DOCUMENTS
+            )
+        if index_type != 'exact':
+            logger.warning(f"Unknown VECTOR_INDEX_TYPE '{settings.VECTOR_INDEX_TYPE}', using exact search")
+        return None
+    
+    @property
+    def generation(self) -> IndexGeneration:
+        """
+        The published index generation.
+        
+        Code that reads the index more than once (e.g. search then fetch
+        documents) should take this reference once and use it throughout, so
+        all reads see the same generation.
+        """
+        return self._generation
+    
+    @property
+    def vector_store(self) -> InMemoryVectorStore:
+        """Vector store of the published generation (read-only)."""
+        return self._generation.vector_store
+    
+    @property
+    def keyword_index(self) -> BM25Index:
+        """Keyword index of the published generation (read-only)."""
+        return self._generation.keyword_index
+    
+    @property
+    def vectorization_log(self) -> Dict[str, Dict[str, Any]]:
+        """Vectorization log of the published generation (read-only)."""
+        return self._generation.vectorization_log
+    
+    @property
+    def documents(self) -> Mapping[str, VectorInMemoryDocument]:
+        """Vectorized chunks keyed by chunk id."""
+        return self._generation.vector_store.documents
+    
     def get_document_count(self) -> int:
         """Get the number of vectorized documents."""
-        return len(self.documents)
+        return len(self._generation)
+    
+    @property
+    def index_version(self) -> int:
+        """Number of the published generation; it changes whenever the index does."""
+        return self._generation.number
+    
+    @property
+    def index_etag(self) -> str:
+        """HTTP ETag of the published generation, for conditional requests."""
+        return self._generation.etag
+    
+    def get_file_catalog(self) -> Dict[str, Any]:
+        """
+        Per-file catalog of the published generation.
+        
+        Read from the vectorization log, which is updated as files are
+        vectorized and removed, instead of scanning every chunk.
+        
+        Returns:
+            Dictionary with index_version, etag and files (filename,
+            file_type, chunks_count, etag, size, last_modified, vectorized_at)
+        """
+        generation = self._generation
+        return {
+            'index_version': generation.number,
+            'etag': generation.etag,
+            'files': generation.get_file_catalog(),
+            'total_documents': len(generation)
+        }
+    
+    @staticmethod
+    def _complete_catalog(generation: IndexGeneration):
+        """Fill catalog fields missing from older snapshots from each file's first chunk."""
+        for filename, entry in generation.vectorization_log.items():
+            if 'file_type' in entry and 'file_size' in entry:
+                continue
+            chunk_ids = generation.vector_store.find_ids({'filename': filename})
+            if chunk_ids:
+                metadata = generation.vector_store.documents[chunk_ids[0]].metadata
+                entry.setdefault('file_type', metadata.get('file_type', 'unknown'))
+                entry.setdefault('file_size', metadata.get('file_size'))
+    
+    def _new_generation(self) -> IndexGeneration:
+        """Empty generation to build a whole index into."""
+        return IndexGeneration(self._generation.number + 1, self._create_vector_store())
+    
+    def _derive_generation(self) -> IndexGeneration:
+        """Copy of the published generation to apply incremental changes to."""
+        return self._generation.derive(self._generation.number + 1)
+    
+    def _publish(self, generation: IndexGeneration):
+        """
+        Make a generation visible to searches with a single reference swap.
+        
+        Searches that already took the previous generation finish on it; it is
+        freed when the last of them returns.
+        """
+        previous = self._generation
+        self._generation = generation
+        self._retired_generations.add(previous)
+        logger.info(f"Published index generation {generation.number}: {len(generation)} documents, {len(generation.vectorization_log)} files")
+    
+    async def _publish_and_save(self, generation: IndexGeneration):
+        """
+        Publish a generation and write its snapshot in a worker thread.
+        
+        Once the generation is live, the ingestion can no longer be cancelled:
+        a cancellation that arrives during the save is absorbed and the save
+        is still awaited, so the caller keeps the ingestion lock until the
+        snapshot and manifest are written and the job reports what it did.
+        """
+        self._publish(generation)
+        save = asyncio.ensure_future(asyncio.to_thread(self.save_index, generation))
+        while True:
+            try:
+                await asyncio.shield(save)
+                return
+            except asyncio.CancelledError:
+                logger.warning(f"Ignoring cancellation while saving published index generation {generation.number}")
+                task = asyncio.current_task()
+                if task is not None:
+                    task.uncancel()
     
     def clear_all_documents(self):
         """Clear all vectorized documents from memory."""
-        self.documents.clear()
-        self.vectorization_log.clear()
+        self._publish(self._new_generation())
+        self.save_index()
         logger.info("All documents cleared from memory")
     
-    def search_similar(self, query_embedding: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
+    async def clear_index(self):
+        """Clear all vectorized documents under the ingestion lock."""
+        async with self._ingestion_lock:
+            self.clear_all_documents()
+    
+    def get_vectorization_stats(self) -> Dict[str, Any]:
+        """Get document, file, index, embedding request and embedding cache statistics."""
+        generation = self._generation
+        return {
+            'generation': generation.number,
+            'retired_generations_in_use': len(self._retired_generations),
+            'shared_index': self.shared_index,
+            'ingestion_leader': self.is_ingestion_leader,
+            'total_documents': len(generation),
+            'total_files': len(generation.vectorization_log),
+            'vector_storage': generation.vector_store.storage,
+            'embedding_bytes': generation.vector_store.nbytes,
+            'memory': generation.vector_store.get_memory_stats(),
+            'keyword_index': generation.keyword_index.get_stats(),
+            'vector_index': generation.vector_store.index.get_stats() if generation.vector_store.index else {'type': 'exact'},
+            'embedding_requests': self.embedding_batcher.get_stats(),
+            'embedding_cache': self.embedding_cache.get_stats(),
+            'query_embedding_cache': self.query_embeddings.get_stats()
+        }
+    
+    @property
+    def is_index_warming(self) -> bool:
+        """True while the startup load or auto-vectorization is running."""
+        return self.index_state == INDEX_WARMING
+    
+    def start_warm_up(self) -> asyncio.Task:
         """
-        Search for similar documents using cosine similarity.
+        Start warm_up as a background task; must be called from the event loop.
+        
+        The index is marked as warming before this returns, so requests served
+        right after startup already see it.
+        """
+        if self._warm_up_task is None:
+            self.index_state = INDEX_WARMING
+            self._warm_up_task = asyncio.create_task(self.warm_up())
+        return self._warm_up_task
+    
+    async def warm_up(self) -> Dict[str, Any]:
+        """
+        Load the persisted index or auto-vectorize the container, tracking readiness.
+        
+        Returns:
+            The auto_vectorize_on_startup result
+        """
+        self.index_state = INDEX_WARMING
+        self._warm_up_started = time.time()
+        result = await self.auto_vectorize_on_startup()
+        self.warm_up_result = {key: value for key, value in result.items() if key not in ('processed_files', 'failed_files')}
+        self._warm_up_finished = time.time()
+        # Auto-vectorization that ingested nothing because every file failed
+        # leaves no documents to search, like a failed load
+        all_files_failed = result.get('files_processed') == 0 and result.get('files_failed', 0) > 0
+        self.index_state = INDEX_UNAVAILABLE if result.get('status') == 'error' or all_files_failed else INDEX_READY
+        logger.info(f"Vector index {self.index_state} after {self._warm_up_finished - self._warm_up_started:.1f}s warm-up")
+        return result
+    
+    def get_readiness(self) -> Dict[str, Any]:
+        """
+        Readiness of the instructive index, for the /ready probe.
+        
+        Returns:
+            Readiness details; 'status' is 'warming' until the warm-up has
+            finished (also before it starts), 'ready' once the index is loaded
+            and 'unavailable' when the warm-up failed, including when every
+            file failed to auto-vectorize
+        """
+        readiness_status = {
+            INDEX_COLD: 'warming',
+            INDEX_WARMING: 'warming',
+            INDEX_READY: 'ready',
+            INDEX_UNAVAILABLE: 'unavailable'
+        }[self.index_state]
+        warm_up_seconds = None
+        if self._warm_up_started is not None:
+            warm_up_seconds = round((self._warm_up_finished or time.time()) - self._warm_up_started, 1)
+        return {
+            'status': readiness_status,
+            'index_state': self.index_state,
+            'index_version': self._generation.number,
+            'ingestion_leader': self.is_ingestion_leader,
+            'document_count': self.get_document_count(),
+            'total_files': len(self.vectorization_log),
+            'warm_up_seconds': warm_up_seconds,
+            'warm_up': self.warm_up_result
+        }
+    
+    def remove_file(self, filename: str, target: Optional[IndexGeneration] = None) -> int:
+        """
+        Remove every chunk of a file and its vectorization log entry.
+        
+        Args:
+            filename: Name of the blob file
+            target: Unpublished generation to remove it from; when omitted, a
+                copy of the published generation is changed and published
+            
+        Returns:
+            Number of chunks removed
+        """
+        generation = target if target is not None else self._derive_generation()
+        removed = self._remove_chunks(generation, self._get_file_chunk_ids(generation, filename))
+        generation.vectorization_log.pop(filename, None)
+        if target is None:
+            self._publish(generation)
+        logger.info(f"Removed {removed} chunks of '{filename}' from memory")
+        return removed
+    
+    @staticmethod
+    def _get_file_chunk_ids(generation: IndexGeneration, filename: str) -> List[str]:
+        """Get the ids of the stored chunks of a file."""
+        return generation.vector_store.find_ids({'filename': filename})
+    
+    @staticmethod
+    def _remove_chunks(generation: IndexGeneration, chunk_ids: List[str]) -> int:
+        """Remove chunks from the vector store and the keyword index."""
+        for chunk_id in chunk_ids:
+            generation.keyword_index.remove(chunk_id)
+        return generation.vector_store.remove_documents(chunk_ids)
+    
+    @staticmethod
+    def _rebuild_keyword_index(generation: IndexGeneration):
+        """Index every stored chunk for keyword search."""
+        generation.keyword_index.clear()
+        for chunk_id, doc in generation.vector_store.documents.items():
+            generation.keyword_index.add(chunk_id, doc.content)
+    
+    def save_index(self, generation: Optional[IndexGeneration] = None) -> bool:
+        """
+        Persist the vector store and vectorization log to VECTOR_DB_PATH.
+        
+        Each save goes to a fresh snapshot directory and the manifest is
+        swapped in last with os.replace, so a crash mid-save leaves the
+        previous snapshot intact. Older snapshot directories are then removed.
+        Ingestion runs it with asyncio.to_thread after publishing, still
+        under the ingestion lock, so the write does not stall the event loop
+        (see _publish_and_save).
+        
+        Args:
+            generation: Generation to save; defaults to the published one
+        
+        Returns:
+            True if the snapshot was written
+        """
+        if not settings.PERSIST_VECTOR_INDEX:
+            return False
+        
+        generation = generation or self._generation
+        try:
+            snapshot = f"snapshot-{time.time_ns()}"
+            generation.vector_store.save(os.path.join(settings.VECTOR_DB_PATH, snapshot))
+            generation.token = snapshot
+            
+            manifest = {
+                'format_version': INDEX_FORMAT_VERSION,
+                'snapshot': snapshot,
+                'embedding_model': settings.OPENAI_EMBEDDING_MODEL,
+                'chunk_size': self.chunk_size,
+                'chunk_overlap': self.chunk_overlap,
+                'version': generation.number,
+                'document_count': len(generation),
+                'dimension': generation.vector_store.dimension,
+                'vectorization_log': generation.vectorization_log,
+                'saved_at': datetime.now().isoformat()
+            }
+            manifest_path = os.path.join(settings.VECTOR_DB_PATH, MANIFEST_FILE)
+            with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            os.replace(manifest_path + ".tmp", manifest_path)
+            
+            if self.shared_index:
+                # Serve the saved file so this worker shares its pages with the
+                # others, and do not reload the version it just wrote
+                generation.vector_store.map_embeddings(os.path.join(settings.VECTOR_DB_PATH, snapshot))
+                self._manifest_stamp = self._stat_manifest()
+            
+            for entry in os.listdir(settings.VECTOR_DB_PATH):
+                if entry.startswith("snapshot-") and entry != snapshot:
+                    shutil.rmtree(os.path.join(settings.VECTOR_DB_PATH, entry), ignore_errors=True)
+            
+            self.embedding_cache.save()
+            
+            logger.info(f"Vector index version {generation.number} saved to {settings.VECTOR_DB_PATH}: {manifest['document_count']} documents")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error saving vector index to {settings.VECTOR_DB_PATH}: {e}")
+            return False
+    
+    def load_index(self, newer_than: Optional[int] = None) -> bool:
+        """
+        Load the snapshot written by save_index(), memory-mapping the embeddings.
+        
+        The snapshot is ignored when it was built with a different format
+        version, embedding model or chunking configuration, or when its files
+        disagree on the number of documents.
+        
+        The snapshot is loaded into a new generation, published only once it
+        is complete. The generation takes the version number of the snapshot.
+        
+        Args:
+            newer_than: Skip the snapshot unless its version is higher
+        
+        Returns:
+            True if the snapshot was loaded into memory
+        """
+        if not settings.PERSIST_VECTOR_INDEX:
+            return False
+        
+        manifest_path = os.path.join(settings.VECTOR_DB_PATH, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            logger.info(f"No persisted vector index found in {settings.VECTOR_DB_PATH}")
+            return False
+        
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            
+            expected = {
+                'format_version': INDEX_FORMAT_VERSION,
+                'embedding_model': settings.OPENAI_EMBEDDING_MODEL,
+                'chunk_size': self.chunk_size,
+                'chunk_overlap': self.chunk_overlap
+            }
+            for key, value in expected.items():
+                if manifest.get(key) != value:
+                    logger.info(f"Persisted vector index is stale ({key}: {manifest.get(key)} != {value}), ignoring it")
+                    return False
+            
+            # Snapshots saved before versioning count as the first version
+            version = manifest.get('version', 1)
+            if newer_than is not None and version <= newer_than:
+                return False
+            
+            generation = self._new_generation()
+            generation.number = version
+            # Workers loading the same snapshot agree on its ETag
+            generation.token = manifest.get('snapshot', generation.token)
+            if not generation.vector_store.load(os.path.join(settings.VECTOR_DB_PATH, manifest.get('snapshot', ''))):
+                return False
+            
+            if len(generation) != manifest.get('document_count'):
+                logger.warning("Persisted vector index does not match its manifest, ignoring it")
+                return False
+            
+            generation.vectorization_log = manifest.get('vectorization_log', {})
+            self._complete_catalog(generation)
+            self._rebuild_keyword_index(generation)
+            self._publish(generation)
+            logger.info(f"Loaded persisted vector index version {generation.number} from {settings.VECTOR_DB_PATH}: {len(generation)} documents")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error loading vector index from {settings.VECTOR_DB_PATH}: {e}")
+            return False
+    
+    @property
+    def is_ingestion_leader(self) -> bool:
+        """True if this worker builds the index (always, outside multi-worker mode)."""
+        return self._leader_lock is None or self._leader_lock.is_held
+    
+    def claim_ingestion_leadership(self) -> bool:
+        """
+        Become the ingestion leader if no other worker is.
+        
+        Returns:
+            True if this worker is the ingestion leader
+        """
+        if self.is_ingestion_leader:
+            return True
+        if self._leader_lock.try_acquire():
+            logger.info(f"Worker {os.getpid()} is now the vector index ingestion leader")
+            return True
+        return False
+    
+    @staticmethod
+    def _stat_manifest() -> Optional[tuple]:
+        """Identity of the manifest file; os.replace on save changes it."""
+        try:
+            manifest_stat = os.stat(os.path.join(settings.VECTOR_DB_PATH, MANIFEST_FILE))
+        except OSError:
+            return None
+        return (manifest_stat.st_ino, manifest_stat.st_mtime_ns, manifest_stat.st_size)
+    
+    async def refresh_shared_index(self) -> bool:
+        """
+        Load the shared snapshot if another worker saved a newer version.
+        
+        Only reads the manifest when the file changed since the last check.
+        
+        Returns:
+            True if a newer generation was loaded and published
+        """
+        if not self.shared_index:
+            return False
+        stamp = self._stat_manifest()
+        if stamp is None or stamp == self._manifest_stamp:
+            return False
+        self._manifest_stamp = stamp
+        return await asyncio.to_thread(self.load_index, self._generation.number)
+    
+    async def run_shared_index_refresh(self, interval_seconds: float):
+        """
+        Follow the shared index forever, every interval_seconds.
+        
+        Loads versions saved by other workers and takes over ingestion
+        leadership if the leader has exited. Meant to be started as a
+        background task in multi-worker mode; errors are logged and the loop
+        keeps going.
+        
+        Args:
+            interval_seconds: Seconds between manifest checks
+        """
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                self.claim_ingestion_leadership()
+                # Writers catch up when they take the lock; warm-up polls on its own
+                if not self._ingestion_lock.locked() and not self.is_index_warming:
+                    await self.refresh_shared_index()
+            except Exception as e:
+                logger.error(f"Shared vector index refresh failed: {e}")
+    
+    def search_similar(self, query_embedding: List[float], top_k: int = 5,
+                       filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Search for similar documents using cosine similarity against the
+        store's normalized embedding matrix.
         
         Args:
             query_embedding: Query vector (1536 dimensions)
             top_k: Number of results to return
+            filters: Optional metadata filters, e.g. {'filename': 'insulin.pdf'},
+                {'file_type': ['application/pdf']} or
+                {'last_modified': {'gte': '2024-01-01'}}; only matching chunks
+                are scored
             
         Returns:
             List of similar documents with scores
         """
-        if not self.documents:
-            return []
+        return self._generation.vector_store.search(query_embedding, top_k=top_k, filters=filters)
+    
+    def search_similar_batch(self, query_embeddings: List[List[float]], top_k: int = 5,
+                             filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Search for the documents most similar to each of several query vectors,
+        scoring them together with one matrix-matrix product.
+        
+        Args:
+            query_embeddings: Query vectors
+            top_k: Number of results per query
+            filters: Optional metadata filters applied to every query
+            
+        Returns:
+            One list of similar documents with scores per query
+        """
+        return self._generation.vector_store.search_batch(query_embeddings, top_k=top_k, filters=filters)
+    
+    def search_keywords(self, query: str, top_k: int = 5,
+                        filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Search chunks by exact terms with BM25, without any embedding request.
+        
+        Args:
+            query: Query text
+            top_k: Number of results to return
+            filters: Optional metadata filters (see search_similar)
+            
+        Returns:
+            List of matching documents with 'bm25_score', best first
+        """
+        generation = self._generation
+        allowed_ids = set(generation.vector_store.find_ids(filters)) if filters else None
+        results = []
+        for chunk_id, score in generation.keyword_index.search(query, top_k=top_k, allowed_ids=allowed_ids):
+            doc = generation.vector_store.documents[chunk_id]
+            results.append({
+                'id': doc.id,
+                'content': doc.content,
+                'metadata': doc.metadata,
+                'bm25_score': score
+            })
+        return results
+    
+    def search_hybrid(self, query: str, query_embedding: List[float], top_k: int = 5,
+                      filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Combine vector similarity and BM25 rankings with reciprocal-rank fusion.
         
-        query_vec = np.array(query_embedding).reshape(1, -1)
-        similarities = []
+        Each ranking contributes 1 / (RRF_K + rank) for the chunks it returns,
+        so chunks ranked well by both come first, and exact-term matches that
+        embeddings rank poorly still surface.
         
-        for doc_id, doc in self.documents.items():
-            doc_vec = doc.embedding.reshape(1, -1)
-            similarity = cosine_similarity(query_vec, doc_vec)[0][0]
+        Args:
+            query: Query text, used for BM25
+            query_embedding: Query vector, used for similarity
+            top_k: Number of results to return
+            filters: Optional metadata filters (see search_similar)
             
-            similarities.append({
-                'id': doc_id,
+        Returns:
+            List of documents with 'similarity_score', 'bm25_score' and
+            'rrf_score', best first
+        """
+        generation = self._generation
+        store = generation.vector_store
+        candidates = max(top_k, 1) * HYBRID_CANDIDATES_PER_RESULT
+        vector_results = store.search(query_embedding, top_k=candidates, filters=filters)
+        allowed_ids = set(store.find_ids(filters)) if filters else None
+        keyword_results = generation.keyword_index.search(query, top_k=candidates, allowed_ids=allowed_ids)
+        
+        fused: Dict[str, float] = {}
+        for rank, result in enumerate(vector_results, start=1):
+            fused[result['id']] = fused.get(result['id'], 0.0) + 1.0 / (RRF_K + rank)
+        for rank, (chunk_id, _) in enumerate(keyword_results, start=1):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank)
+        top = heapq.nlargest(top_k, fused.items(), key=lambda item: item[1])
+        
+        similarities = {result['id']: result['similarity_score'] for result in vector_results}
+        missing = [chunk_id for chunk_id, _ in top if chunk_id not in similarities]
+        if missing:
+            # Keyword-only hits get their similarity so thresholds still apply
+            similarities.update(zip(missing, store.score_ids(query_embedding, missing)))
+        bm25_scores = dict(keyword_results)
+        
+        results = []
+        for chunk_id, rrf_score in top:
+            doc = store.documents[chunk_id]
+            results.append({
+                'id': doc.id,
                 'content': doc.content,
                 'metadata': doc.metadata,
-                'similarity_score': float(similarity)
+                'similarity_score': float(similarities[chunk_id]),
+                'bm25_score': bm25_scores.get(chunk_id, 0.0),
+                'rrf_score': rrf_score
             })
+        return results
+    
+    def expand_with_neighbors(self, results: List[Dict[str, Any]], window: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Add the text of neighbouring chunks to search results.
+        
+        Each result gets a 'context' with its chunk and up to window chunks
+        before and after it in the same file. Chunks already included in the
+        context of a better-ranked result are not repeated, so a result whose
+        whole window is already covered gets an empty context.
+        
+        Args:
+            results: Search results, best first
+            window: Neighbouring chunks on each side; defaults to INSTRUCTIVE_CONTEXT_WINDOW
+            
+        Returns:
+            The same results with 'context' and 'context_chunk_ids' added
+        """
+        window = settings.INSTRUCTIVE_CONTEXT_WINDOW if window is None else window
+        store = self._generation.vector_store
+        included = set()
+        for result in results:
+            # Results from a generation replaced since the search keep their own text
+            if result['id'] not in store.documents:
+                result['context'], result['context_chunk_ids'] = result['content'], [result['id']]
+                continue
+            neighbors = [doc for doc in store.neighbors(result['id'], window) if doc.id not in included]
+            included.update(doc.id for doc in neighbors)
+            result['context'] = '\n'.join(doc.content for doc in neighbors)
+            result['context_chunk_ids'] = [doc.id for doc in neighbors]
+        return results
+    
+    async def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed search queries in a single embeddings request, in query order."""
+        response = await self.openai_client.embeddings.create(
+            model=settings.OPENAI_EMBEDDING_MODEL,
+            input=queries
+        )
+        data = sorted(response.data, key=lambda d: getattr(d, 'index', 0))
+        return [d.embedding for d in data]
+    
+    async def embed_query(self, query: str) -> np.ndarray:
+        """
+        Get the embedding of a search query without blocking the event loop.
+        
+        Repeated queries are answered from the query embedding cache, and
+        concurrent identical queries share one embeddings request.
         
-        # Sort by similarity score (descending)
-        similarities.sort(key=lambda x: x['similarity_score'], reverse=True)
+        Args:
+            query: Query text
+            
+        Returns:
+            Read-only float32 query embedding
+        """
+        return await self.query_embeddings.embed(query)
+    
+    async def search_queries(self, queries: List[str], top_k: int = 5,
+                             filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Embed several text queries and search them as a batch. Queries missing
+        from the query embedding cache are embedded in a single request.
+        
+        Args:
+            queries: Query texts
+            top_k: Number of results per query
+            filters: Optional metadata filters applied to every query
+            
+        Returns:
+            One list of similar documents with scores per query, in query order
+        """
+        if not queries:
+            return []
         
-        return similarities[:top_k]
-    async def vectorize_file(self, blob_name: str, sas_token: str) -> Dict[str, Any]:
+        embeddings = await self.query_embeddings.embed_many(queries)
+        return self.search_similar_batch(embeddings, top_k=top_k, filters=filters)
+
+    async def vectorize_file(self, blob_name: str, sas_token: str,
+                             target: Optional[IndexGeneration] = None) -> Dict[str, Any]:
         """
         Vectorize a single file from blob storage and store in memory.
         
         Args:
             blob_name: Name of the blob file to vectorize
             sas_token: SAS token for blob access
+            target: Unpublished generation to store the chunks in; when
+                omitted, a copy of the published generation is changed and
+                published (callers should hold the ingestion lock)
             
         Returns:
             Dictionary with vectorization results
@@ -120,77 +827,82 @@ class VectorizationManager:
             logger.info(f"Starting vectorization of file: {blob_name}")
             
             # 1. Download file from blob storage
-            file_content, metadata = await self.blob_service.download_blob(blob_name, sas_token)
+            async with self._download_semaphore:
+                file_content, metadata = await self.blob_service.download_blob(blob_name, sas_token)
             
             if not file_content:
                 raise ValueError(f"No content retrieved for file {blob_name}")
             
             logger.info(f"Downloaded file {blob_name}: {len(file_content)} bytes")
             
-            # 2. Extract text from file
+            # 2-4. Extract off the event loop, chunk and embed as page ranges arrive
             content_type = metadata.get('content_type', 'application/octet-stream')
-            text_content = self._extract_text_from_file(file_content, blob_name, content_type)
-            
-            if not text_content or text_content.strip() == "":
-                raise ValueError(f"No readable text content extracted from {blob_name}")
-            
-            logger.info(f"Extracted {len(text_content)} characters from {blob_name}")
-            
-            # 3. Chunk the text
-            chunks = self._chunk_text(text_content)
+            chunks, embeddings = await self._extract_and_embed(file_content, blob_name, content_type)
             
             if not chunks:
-                raise ValueError(f"No chunks generated from {blob_name}")
-            
-            logger.info(f"Generated {len(chunks)} chunks from {blob_name}")
+                raise ValueError(f"No readable text content extracted from {blob_name}")
             
-            # 4. Generate embeddings
-            embeddings = await self._generate_embeddings(chunks)
+            text_length = chunks[-1].char_end
+            logger.info(f"Generated {len(chunks)} chunks from {text_length} characters of {blob_name}")
             
             if not embeddings or len(embeddings) != len(chunks):
                 raise ValueError(f"Embedding generation failed for {blob_name}")
+            chunk_texts = [chunk.text for chunk in chunks]
             
-            # 5. Store in memory
-            chunks_stored = 0
-            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                chunk_id = f"{blob_name}_{i}_{hash(chunk[:50])}"
-                chunk_metadata = {
+            # 5. Store in memory, replacing chunks from a previous version of the file
+            generation = target if target is not None else self._derive_generation()
+            self._remove_chunks(generation, self._get_file_chunk_ids(generation, blob_name))
+            vectorization_timestamp = datetime.now().isoformat()
+            chunk_ids = []
+            chunk_metadatas = []
+            for i, chunk in enumerate(chunks):
+                chunk_ids.append(f"{blob_name}_{i}_{embedding_cache_key(settings.OPENAI_EMBEDDING_MODEL, chunk.text)[:16]}")
+                chunk_metadatas.append({
                     'filename': blob_name,
                     'file_type': content_type,
                     'chunk_index': i,
                     'total_chunks': len(chunks),
+                    'section': chunk.section,
+                    'page_start': chunk.page_start,
+                    'page_end': chunk.page_end,
+                    'char_start': chunk.char_start,
+                    'char_end': chunk.char_end,
                     'file_size': len(file_content),
                     'etag': metadata.get('etag', ''),
                     'last_modified': metadata.get('last_modified', ''),
-                    'vectorization_timestamp': datetime.now().isoformat()
-                }
-                
-                # Store document in memory
-                self.documents[chunk_id] = VectorInMemoryDocument(
-                    id=chunk_id,
-                    content=chunk,
-                    embedding=embedding,
-                    metadata=chunk_metadata
-                )
-                chunks_stored += 1
+                    'vectorization_timestamp': vectorization_timestamp
+                })
+            
+            chunks_stored = generation.vector_store.add_documents(
+                ids=chunk_ids,
+                contents=chunk_texts,
+                embeddings=embeddings,
+                metadatas=chunk_metadatas
+            )
+            for chunk_id, chunk_text in zip(chunk_ids, chunk_texts):
+                generation.keyword_index.add(chunk_id, chunk_text)
             
             # 6. Update vectorization log
-            self.vectorization_log[blob_name] = {
+            generation.vectorization_log[blob_name] = {
                 'etag': metadata.get('etag', ''),
                 'last_modified': metadata.get('last_modified', ''),
+                'file_type': content_type,
+                'file_size': len(file_content),
                 'chunks_processed': chunks_stored,
                 'vectorization_timestamp': datetime.now().isoformat()
             }
+            if target is None:
+                self._publish(generation)
             
-            logger.info(f"Successfully vectorized {blob_name}: {chunks_stored} chunks stored. Total documents: {len(self.documents)}")
+            logger.info(f"Successfully vectorized {blob_name}: {chunks_stored} chunks stored. Total documents: {len(generation)}")
             
             return {
                 'success': True,
                 'file_name': blob_name,
                 'chunks_processed': chunks_stored,
                 'file_size': len(file_content),
-                'text_length': len(text_content),
-                'total_documents': len(self.documents),
+                'text_length': text_length,
+                'total_documents': len(generation),
                 'vectorization_timestamp': datetime.now().isoformat()
             }
             
@@ -201,107 +913,142 @@ class VectorizationManager:
                 detail=f"Error vectorizing file {blob_name}: {str(e)}"
             )
 
-    def _extract_text_from_file(self, file_content: bytes, file_name: str, content_type: str) -> str:
-        """Extract text from various file types."""
-        try:
-            file_extension = file_name.lower().split('.')[-1] if '.' in file_name else ''
-            
-            # PDF files
-            if file_extension == 'pdf' or 'pdf' in content_type.lower():
-                return self._extract_from_pdf(file_content)
-            
-            # Word documents
-            elif file_extension in ['docx', 'doc'] or 'word' in content_type.lower():
-                return self._extract_from_docx(file_content)
-            
-            # Text files
-            elif file_extension in ['txt', 'md', 'csv'] or 'text' in content_type.lower():
-                return file_content.decode('utf-8', errors='ignore')
-            
-            # HTML files
-            elif file_extension in ['html', 'htm'] or 'html' in content_type.lower():
-                return self._extract_from_html(file_content)
-            
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                    detail=f"File type '.{file_extension}' is not supported. Supported: PDF, DOCX, DOC, TXT, MD, CSV, HTML, HTM"
-                )
-                
-        except Exception as e:
-            logger.error(f"Error extracting text from {file_name}: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail=f"Could not extract text from file '{file_name}': {str(e)}"
-            )
+    def shutdown(self):
+        """Stop the text extraction pool and hand over ingestion leadership."""
+        self._extraction_executor.shutdown(wait=False, cancel_futures=True)
+        if self._leader_lock is not None:
+            self._leader_lock.release()
     
-    def _extract_from_pdf(self, file_content: bytes) -> str:
-        """Extract text from PDF file."""
+    async def _run_extraction(self, function, *args):
+        """Run an extraction function in the extraction pool, replacing the pool if a worker died."""
+        executor = self._extraction_executor
         try:
-            pdf_reader = PyPDF2.PdfReader(BytesIO(file_content))
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text.strip()
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail=f"Error extracting PDF content: {str(e)}"
-            )
+            return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+        except BrokenExecutor:
+            if self._extraction_executor is executor:
+                logger.warning("Text extraction pool is broken; starting a new one")
+                executor.shutdown(wait=False)
+                self._extraction_executor = self._create_extraction_executor()
+            raise
     
-    def _extract_from_docx(self, file_content: bytes) -> str:
-        """Extract text from DOCX file."""
+    async def _iter_blocks(self, file_content: bytes, file_name: str, content_type: str) -> AsyncIterator[List[TextBlock]]:
+        """
+        Extract the headings and paragraphs of a file in the extraction pool.
+        
+        PDFs are written to a temporary file and parsed in ranges of
+        PDF_PAGES_PER_TASK pages, the next range being parsed while the
+        current one is consumed. Other files are extracted in one task.
+        
+        Yields:
+            Lists of blocks in document order
+        """
         try:
-            doc = docx.Document(BytesIO(file_content))
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text.strip()
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail=f"Error extracting DOCX content: {str(e)}"
-            )
-    
-    def _extract_from_html(self, file_content: bytes) -> str:
-        """Extract text from HTML file."""
+            file_kind = detect_file_kind(file_name, content_type)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+        
         try:
-            soup = BeautifulSoup(file_content, 'html.parser')
-            for script in soup(["script", "style"]):
-                script.decompose()
-            return soup.get_text(separator='\n').strip()
+            if file_kind != 'pdf':
+                yield await self._run_extraction(extract_blocks, file_content, file_kind)
+                return
+            
+            # Workers read the file instead of receiving its bytes with every page range
+            descriptor, path = tempfile.mkstemp(suffix='.pdf')
+            pending = None
+            try:
+                with os.fdopen(descriptor, 'wb') as pdf_file:
+                    pdf_file.write(file_content)
+                page_count = await self._run_extraction(pdf_page_count, path)
+                pages_per_task = max(settings.PDF_PAGES_PER_TASK, 1)
+                for start_page in range(0, page_count, pages_per_task):
+                    upcoming = asyncio.ensure_future(
+                        self._run_extraction(extract_pdf_pages, path, start_page, start_page + pages_per_task)
+                    )
+                    previous, pending = pending, upcoming
+                    if previous is not None:
+                        yield await previous
+                if pending is not None:
+                    last, pending = pending, None
+                    yield await last
+            finally:
+                if pending is not None:
+                    pending.cancel()
+                os.remove(path)
+        except HTTPException:
+            raise
         except Exception as e:
+            logger.error(f"Error extracting text from {file_name}: {e}")
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail=f"Error extracting HTML content: {str(e)}"
+                detail=f"Could not extract text from file '{file_name}': {str(e)}"
             )
     
-    def _chunk_text(self, text: str) -> List[str]:
-        """Split text into chunks with overlap."""
-        words = text.split()
-        chunks = []
+    async def _extract_and_embed(self, file_content: bytes, file_name: str, content_type: str) -> Tuple[List[Chunk], List[List[float]]]:
+        """
+        Extract, chunk and embed a file as a pipeline.
         
-        for i in range(0, len(words), self.chunk_size - self.chunk_overlap):
-            chunk_words = words[i:i + self.chunk_size]
-            chunk_text = ' '.join(chunk_words)
-            if chunk_text.strip():
-                chunks.append(chunk_text.strip())
+        Chunks completed by each extracted page range are sent for embedding
+        right away, so embedding requests overlap with parsing the rest of
+        the document.
         
-        if not chunks and text.strip():
-            chunks.append(text.strip())
+        Returns:
+            The chunks of the file and their embeddings, in the same order
+        """
+        stream = self.chunker.stream()
+        chunks: List[Chunk] = []
+        embedding_tasks: List[asyncio.Task] = []
+        
+        def embed(ready: List[Chunk]):
+            if ready:
+                chunks.extend(ready)
+                embedding_tasks.append(asyncio.create_task(self._generate_embeddings([chunk.text for chunk in ready])))
         
-        return chunks
+        try:
+            async with aclosing(self._iter_blocks(file_content, file_name, content_type)) as batches:
+                async for blocks in batches:
+                    ready: List[Chunk] = []
+                    for block in blocks:
+                        ready.extend(stream.add(block))
+                    embed(ready)
+            embed(stream.finish())
+            embedding_batches = await asyncio.gather(*embedding_tasks)
+        except BaseException:
+            for task in embedding_tasks:
+                task.cancel()
+            await asyncio.gather(*embedding_tasks, return_exceptions=True)
+            raise
+        
+        return chunks, [embedding for batch in embedding_batches for embedding in batch]
     
     async def _generate_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings using OpenAI (1536 dimensions)."""
+        """
+        Generate embeddings using OpenAI (1536 dimensions).
+        
+        Texts already in the embedding cache are served from it; only the
+        distinct misses go through the shared EmbeddingBatcher, which packs
+        them with chunks of other files into token-bounded requests and
+        retries failed sub-batches.
+        """
         try:
-            response = await self.openai_client.embeddings.create(
-                model=settings.OPENAI_EMBEDDING_MODEL,
-                input=texts
-            )
+            if not self.embedding_cache.is_loaded:
+                # The first lookup reads the persisted cache; keep it off the event loop
+                await asyncio.to_thread(self.embedding_cache.load)
+            keys = [embedding_cache_key(settings.OPENAI_EMBEDDING_MODEL, text) for text in texts]
+            embeddings = [self.embedding_cache.get(key) for key in keys]
+            cached = sum(1 for embedding in embeddings if embedding is not None)
+            
+            missing = {}
+            for key, text, embedding in zip(keys, texts, embeddings):
+                if embedding is None:
+                    missing.setdefault(key, text)
+            
+            if missing:
+                fresh = dict(zip(missing.keys(), await self.embedding_batcher.embed(list(missing.values()))))
+                for key, embedding in fresh.items():
+                    self.embedding_cache.put(key, embedding)
+                embeddings = [fresh[key] if embedding is None else embedding for key, embedding in zip(keys, embeddings)]
             
-            embeddings = [embedding.embedding for embedding in response.data]
-            logger.info(f"Generated {len(embeddings)} embeddings with {len(embeddings[0])} dimensions")
+            logger.info(f"Generated {len(embeddings)} embeddings with {len(embeddings[0])} dimensions ({cached} from cache)")
             return embeddings
             
         except Exception as e:
@@ -311,6 +1058,76 @@ class VectorizationManager:
                 detail=f"Error generating embeddings: {str(e)}"
             )
 
+    async def _vectorize_files(self, blob_names: List[str], sas_token: str, action: str, target: IndexGeneration,
+                               job: Optional[IngestionJob] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], int]:
+        """
+        Vectorize many files concurrently within the configured ingestion limits.
+        
+        Args:
+            blob_names: Names of the blob files to vectorize
+            sas_token: SAS token for blob access
+            action: Verb used in progress logs (e.g. "Processing")
+            target: Unpublished generation the chunks are stored in
+            job: Background job to report per-file progress to
+            
+        Returns:
+            Tuple of (processed_files, failed_files, total_chunks), with the
+            file lists in the same order as blob_names
+        """
+        file_slots = asyncio.Semaphore(self._max_files_in_flight)
+        started = 0
+        if job is not None:
+            job.set_files(blob_names)
+        
+        async def _vectorize_one(blob_name: str) -> Dict[str, Any]:
+            nonlocal started
+            async with file_slots:
+                started += 1
+                logger.info(f"{action} file {started}/{len(blob_names)}: '{blob_name}'")
+                if job is not None:
+                    job.file_started(blob_name)
+                try:
+                    result = await self.vectorize_file(blob_name, sas_token, target)
+                    outcome = {
+                        "name": blob_name,
+                        "chunks": result.get('chunks_processed', 0),
+                        "size": result.get('file_size', '0')
+                    }
+                except Exception as e:
+                    logger.error(f"Failed to process '{blob_name}': {e}")
+                    outcome = {
+                        "name": blob_name,
+                        "error": str(e)
+                    }
+                if job is not None:
+                    job.file_finished(blob_name, outcome.get("chunks", 0), outcome.get("error"))
+                return outcome
+        
+        outcomes = await asyncio.gather(*(_vectorize_one(blob_name) for blob_name in blob_names))
+        
+        processed_files = [outcome for outcome in outcomes if "error" not in outcome]
+        failed_files = [outcome for outcome in outcomes if "error" in outcome]
+        total_chunks = sum(outcome["chunks"] for outcome in processed_files)
+        
+        return processed_files, failed_files, total_chunks
+
+    def submit_ingestion_job(self, kind: str, sas_token: str, requested_by: Optional[str] = None) -> IngestionJob:
+        """
+        Run a revectorization or sync in the background.
+        
+        Args:
+            kind: 'revectorize' or 'sync'
+            sas_token: SAS token for blob access
+            requested_by: User that submitted the job
+            
+        Returns:
+            The queued job, or the active job of the same kind
+        """
+        runners = {'revectorize': self._revectorize, 'sync': self._sync}
+        if kind not in runners:
+            raise ValueError(f"Unknown ingestion job kind '{kind}'. Supported: {', '.join(runners)}")
+        return self.jobs.submit(kind, lambda job: runners[kind](sas_token, job), requested_by)
+    
     async def revectorize_all(self, sas_token: str) -> Dict[str, Any]:
         """
         Clear all vectors and revectorize all files in the blob container.
@@ -321,16 +1138,19 @@ class VectorizationManager:
         Returns:
             Dictionary with operation summary
         """
+        async with self._ingestion_lock:
+            return await self._revectorize(sas_token)
+    
+    async def _revectorize(self, sas_token: str, job: Optional[IngestionJob] = None) -> Dict[str, Any]:
+        """Revectorize the whole container; the caller holds the ingestion lock."""
         try:
             logger.info("Starting complete revectorization process")
             
-            # 1. Clear existing data
-            self.clear_all_documents()
-            
-            # 2. List all blobs in the container
+            # 1. List all blobs in the container
             blobs = await self.blob_service.list_blobs(sas_token)
             
             if not blobs:
+                self.clear_all_documents()
                 return {
                     "status": "success",
                     "message": "No files found in blob container",
@@ -339,47 +1159,43 @@ class VectorizationManager:
                     "total_chunks": 0
                 }
             
-            # 3. Process each blob
-            processed_files = []
-            failed_files = []
-            total_chunks = 0
-            
+            # 2. Process the blobs concurrently into a new, empty generation;
+            # searches keep using the current one until it is published
             logger.info(f"Processing {len(blobs)} files...")
             
-            for blob in blobs:
-                blob_name = blob.get('name', '')
-                if not blob_name:
-                    continue
-                
-                try:
-                    logger.info(f"Processing file {len(processed_files) + len(failed_files) + 1}/{len(blobs)}: '{blob_name}'")
-                    
-                    result = await self.vectorize_file(blob_name, sas_token)
-                    
-                    processed_files.append({
-                        "name": blob_name,
-                        "chunks": result.get('chunks_processed', 0),
-                        "size": result.get('file_size', '0')
-                    })
-                    
-                    total_chunks += result.get('chunks_processed', 0)
-                    
-                except Exception as e:
-                    logger.error(f"Failed to process '{blob_name}': {e}")
-                    failed_files.append({
-                        "name": blob_name,
-                        "error": str(e)
-                    })
+            generation = self._new_generation()
+            blob_names = [blob.get('name', '') for blob in blobs if blob.get('name')]
+            processed_files, failed_files, total_chunks = await self._vectorize_files(blob_names, sas_token, "Processing", generation, job)
             
             logger.info(f"Revectorization completed: {len(processed_files)} successful, {len(failed_files)} failed")
             
+            if not processed_files:
+                # Every file failed (e.g. OpenAI outage or bad SAS token): an
+                # empty generation must not replace the working index
+                logger.error(f"Revectorization failed for all {len(failed_files)} files; keeping index generation {self._generation.number}")
+                return {
+                    "status": "error",
+                    "message": f"Revectorization failed for all {len(failed_files)} files. The current index was kept.",
+                    "files_processed": 0,
+                    "files_failed": len(failed_files),
+                    "total_chunks": 0,
+                    "total_documents": self.get_document_count(),
+                    "processed_files": [],
+                    "failed_files": failed_files,
+                    "timestamp": datetime.now().isoformat()
+                }
+            
+            # 3. Swap the rebuilt index in, then write it in a thread so the
+            # event loop keeps serving; the ingestion lock is held until saved
+            await self._publish_and_save(generation)
+            
             return {
                 "status": "completed",
                 "message": f"Revectorization completed. Processed {len(processed_files)} files, {len(failed_files)} failed.",
                 "files_processed": len(processed_files),
                 "files_failed": len(failed_files),
                 "total_chunks": total_chunks,
-                "total_documents": len(self.documents),
+                "total_documents": self.get_document_count(),
                 "processed_files": processed_files,
                 "failed_files": failed_files,
                 "timestamp": datetime.now().isoformat()
@@ -392,18 +1208,157 @@ class VectorizationManager:
                 detail=f"Error during revectorization: {str(e)}"
             )
 
+    @staticmethod
+    def _normalize_etag(etag: Optional[str]) -> str:
+        """Strip the quotes that some Azure APIs keep around etags."""
+        return (etag or '').strip('"')
+    
+    async def sync_with_container(self, sas_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Incrementally sync the vector store with the blob container.
+        
+        The container listing is diffed against the vectorization log by etag:
+        new and changed blobs are (re)vectorized, chunks of deleted blobs are
+        dropped and unchanged blobs are left alone.
+        
+        Args:
+            sas_token: SAS token for blob access. When omitted, the listing and
+                the SAS token come from the configured connection string, as in
+                auto-vectorization.
+            
+        Returns:
+            Dictionary with operation summary
+        """
+        async with self._ingestion_lock:
+            return await self._sync(sas_token)
+    
+    async def _sync(self, sas_token: Optional[str] = None, job: Optional[IngestionJob] = None) -> Dict[str, Any]:
+        """Sync the store with the container; the caller holds the ingestion lock."""
+        try:
+            logger.info("Starting incremental vector sync")
+            
+            # 1. List all blobs in the container
+            if sas_token:
+                blobs = await self.blob_service.list_blobs(sas_token)
+            else:
+                sas_token = self.blob_service.generate_sas_token()
+                if not sas_token:
+                    raise Exception("Failed to generate SAS token for blob access")
+                blobs = await self.blob_service.list_blobs_async()
+            
+            # 2. Diff the listing against the vectorization log
+            vectorization_log = self._generation.vectorization_log
+            listing = {blob['name']: blob for blob in blobs or [] if blob.get('name')}
+            new_files = [name for name in listing if name not in vectorization_log]
+            changed_files = [
+                name for name in listing
+                if name in vectorization_log
+                and self._normalize_etag(listing[name].get('etag')) != self._normalize_etag(vectorization_log[name].get('etag'))
+            ]
+            deleted_files = [name for name in vectorization_log if name not in listing]
+            unchanged_files = len(listing) - len(new_files) - len(changed_files)
+            
+            logger.info(f"Sync diff: {len(new_files)} new, {len(changed_files)} changed, {len(deleted_files)} deleted, {unchanged_files} unchanged")
+            
+            # 3. Apply the changes to a copy of the published generation
+            generation = self._derive_generation() if deleted_files or new_files or changed_files else None
+            
+            # Drop chunks of deleted blobs
+            removed_chunks = 0
+            for blob_name in deleted_files:
+                removed_chunks += self.remove_file(blob_name, generation)
+            
+            # 4. Vectorize new and changed blobs
+            processed_files, failed_files, total_chunks = await self._vectorize_files(new_files + changed_files, sas_token, "Syncing", generation, job)
+            for processed in processed_files:
+                processed["change"] = "new" if processed["name"] in new_files else "changed"
+            
+            # 5. Swap the updated index in
+            if deleted_files or processed_files:
+                await self._publish_and_save(generation)
+            
+            logger.info(f"Vector sync completed: {len(processed_files)} vectorized, {len(failed_files)} failed, {len(deleted_files)} removed")
+            
+            return {
+                "status": "completed",
+                "message": f"Sync completed. Vectorized {len(processed_files)} files, removed {len(deleted_files)}, {unchanged_files} unchanged, {len(failed_files)} failed.",
+                "files_new": len(new_files),
+                "files_changed": len(changed_files),
+                "files_deleted": len(deleted_files),
+                "files_unchanged": unchanged_files,
+                "files_processed": len(processed_files),
+                "files_failed": len(failed_files),
+                "total_chunks": total_chunks,
+                "chunks_removed": removed_chunks,
+                "total_documents": self.get_document_count(),
+                "processed_files": processed_files,
+                "deleted_files": deleted_files,
+                "failed_files": failed_files,
+                "timestamp": datetime.now().isoformat()
+            }
+            
+        except Exception as e:
+            logger.error(f"Error during vector sync: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error during vector sync: {str(e)}"
+            )
+    
+    async def run_periodic_sync(self, interval_minutes: int):
+        """
+        Run sync_with_container forever, every interval_minutes.
+        
+        Meant to be started as a background task; errors are logged and the
+        loop keeps going. In multi-worker mode only the ingestion leader syncs.
+        
+        Args:
+            interval_minutes: Minutes between sync runs
+        """
+        logger.info(f"Periodic vector sync enabled every {interval_minutes} minutes")
+        while True:
+            await asyncio.sleep(interval_minutes * 60)
+            if not self.is_ingestion_leader:
+                continue
+            try:
+                result = await self.sync_with_container()
+                logger.info(f"Periodic vector sync: {result['message']}")
+            except Exception as e:
+                logger.error(f"Periodic vector sync failed: {e}")
+
     async def auto_vectorize_on_startup(self) -> Dict[str, Any]:
         """
         Auto-vectorize all files from Azure Blob Storage on server startup
-        if the VectorInMemory database is empty.
+        if the VectorInMemory database is empty and no valid persisted index
+        exists in VECTOR_DB_PATH.
+        
+        This method is run in the background by warm_up when the server
+        starts. It processes all files in the configured blob container.
         
-        This method is called automatically when the server starts and the
-        vector database is empty. It processes all files in the configured
-        blob container.
+        Runs under the ingestion lock, so it never interleaves with jobs or
+        the periodic sync. In multi-worker mode only the ingestion leader
+        builds the index; the other workers wait for it to save a version
+        and load that instead, taking over if the leader exits first.
         
         Returns:
             Dictionary with auto-vectorization results
         """
+        while self.shared_index and settings.AUTO_VECTORIZE_ON_STARTUP and not self.claim_ingestion_leadership():
+            if await self.refresh_shared_index():
+                logger.info(f"Loaded {self.get_document_count()} documents from shared vector index version {self._generation.number}")
+                return {
+                    "status": "skipped",
+                    "message": f"Loaded {self.get_document_count()} documents from the shared vector index built by the ingestion leader",
+                    "document_count": self.get_document_count(),
+                    "files_loaded": len(self.vectorization_log),
+                    "index_version": self._generation.number
+                }
+            await asyncio.sleep(settings.VECTOR_INDEX_REFRESH_SECONDS)
+        
+        async with self._ingestion_lock:
+            return await self._auto_vectorize()
+    
+    async def _auto_vectorize(self) -> Dict[str, Any]:
+        """Body of auto_vectorize_on_startup; the caller holds the ingestion lock."""
         try:
             # Check if auto-vectorization is enabled
             if not settings.AUTO_VECTORIZE_ON_STARTUP:
@@ -413,6 +1368,17 @@ class VectorizationManager:
                     "message": "Auto-vectorization on startup is disabled in configuration"
                 }
             
+            # Restore the persisted index instead of re-embedding the container
+            # (parsing the snapshot runs in a thread so the event loop keeps serving)
+            if self.get_document_count() == 0 and await asyncio.to_thread(self.load_index) and self.get_document_count() > 0:
+                logger.info(f"Loaded {self.get_document_count()} documents from persisted vector index. Skipping auto-vectorization.")
+                return {
+                    "status": "skipped",
+                    "message": f"Loaded {self.get_document_count()} documents from persisted vector index",
+                    "document_count": self.get_document_count(),
+                    "files_loaded": len(self.vectorization_log)
+                }
+            
             # Check if vector database is empty
             if self.get_document_count() > 0:
                 logger.info(f"Vector database already contains {self.get_document_count()} documents. Skipping auto-vectorization.")
@@ -441,6 +1407,9 @@ class VectorizationManager:
             blobs = await self.blob_service.list_blobs_async()
             if not blobs:
                 logger.info("No files found in Azure Blob Storage container")
+                if self.shared_index:
+                    # Save an empty version so the other workers finish warming up
+                    self.clear_all_documents()
                 return {
                     "status": "completed",
                     "message": "No files found in Azure Blob Storage container",
@@ -455,44 +1424,37 @@ class VectorizationManager:
             
             logger.info(f"Found {len(blobs)} files in Azure Blob Storage. Starting auto-vectorization...")
             
-            processed_files = []
-            failed_files = []
-            total_chunks = 0
-            
-            for blob in blobs:
-                blob_name = blob.get('name', '')
-                if not blob_name:
-                    continue
-                
-                try:
-                    logger.info(f"Auto-vectorizing file {len(processed_files) + len(failed_files) + 1}/{len(blobs)}: '{blob_name}'")
-                    
-                    result = await self.vectorize_file(blob_name, sas_token)
-                    
-                    processed_files.append({
-                        "name": blob_name,
-                        "chunks": result.get('chunks_processed', 0),
-                        "size": result.get('file_size', '0')
-                    })
-                    
-                    total_chunks += result.get('chunks_processed', 0)
-                    
-                except Exception as e:
-                    logger.error(f"Failed to auto-vectorize '{blob_name}': {e}")
-                    failed_files.append({
-                        "name": blob_name,
-                        "error": str(e)
-                    })
+            generation = self._new_generation()
+            blob_names = [blob.get('name', '') for blob in blobs if blob.get('name')]
+            processed_files, failed_files, total_chunks = await self._vectorize_files(blob_names, sas_token, "Auto-vectorizing", generation)
             
             logger.info(f"Auto-vectorization completed: {len(processed_files)} successful, {len(failed_files)} failed, {total_chunks} total chunks")
             
+            if not processed_files:
+                # Every file failed: an empty snapshot would be loaded as a
+                # valid index on the next start, so nothing is published or saved
+                logger.error(f"Auto-vectorization failed for all {len(failed_files)} files; no index was published")
+                return {
+                    "status": "error",
+                    "message": f"Auto-vectorization failed for all {len(failed_files)} files. No index was published.",
+                    "files_processed": 0,
+                    "files_failed": len(failed_files),
+                    "total_chunks": 0,
+                    "total_documents": self.get_document_count(),
+                    "processed_files": [],
+                    "failed_files": failed_files,
+                    "timestamp": datetime.now().isoformat()
+                }
+            
+            await self._publish_and_save(generation)
+            
             return {
                 "status": "completed",
                 "message": f"Auto-vectorization completed on startup. Processed {len(processed_files)} files with {total_chunks} chunks.",
                 "files_processed": len(processed_files),
                 "files_failed": len(failed_files),
                 "total_chunks": total_chunks,
-                "total_documents": len(self.documents),
+                "total_documents": self.get_document_count(),
                 "processed_files": processed_files,
                 "failed_files": failed_files,
                 "timestamp": datetime.now().isoformat()
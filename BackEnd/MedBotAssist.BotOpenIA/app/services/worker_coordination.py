@@ -0,0 +1,141 @@
+"""
+Multi-worker coordination for MedBot Assistant
+
+With several uvicorn/gunicorn workers every process has its own
+VectorizationManager. When VECTOR_INDEX_SHARED is enabled the workers share the
+persisted index instead of each building one, coordinating through lock files
+next to it:
+
+- leader.lock is held for the life of one worker, the ingestion leader, which
+  loads or builds the index at startup and runs the periodic sync. When it
+  exits the OS releases the lock and another worker takes over.
+- write.lock is held by whichever worker is changing the index (the leader, or
+  a worker serving a revectorize, sync or clear request), so the snapshot has a
+  single writer across processes.
+
+The locks are advisory OS file locks (flock, or msvcrt on Windows), released
+automatically if a worker dies.
+"""
+
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+import logging
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+LEADER_LOCK_FILE = "leader.lock"
+WRITE_LOCK_FILE = "write.lock"
+
+# Seconds between attempts to take a lock held by another worker
+LOCK_POLL_SECONDS = 0.2
+
+def _lock_file(lock_file):
+    """Lock an open file without blocking; raises OSError if another process holds it."""
+    if fcntl is not None:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+
+def _unlock_file(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+class FileLock:
+    """Exclusive lock on a file, shared by the processes that open the same path."""
+
+    def __init__(self, path: str):
+        """
+        Initialize the lock; nothing is opened until it is acquired.
+
+        Args:
+            path: Lock file path, created if missing
+        """
+        self.path = path
+        self._file = None
+
+    @property
+    def is_held(self) -> bool:
+        return self._file is not None
+
+    def try_acquire(self) -> bool:
+        """
+        Take the lock if no other holder has it.
+
+        Returns:
+            True if this object holds the lock
+        """
+        if self._file is not None:
+            return True
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        lock_file = open(self.path, "a+")
+        try:
+            _lock_file(lock_file)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            _unlock_file(self._file)
+        except OSError as e:
+            logger.warning(f"Could not unlock {self.path}: {e}")
+        finally:
+            self._file.close()
+            self._file = None
+
+class SharedIndexLock:
+    """
+    asyncio lock that also holds a file lock, for index writers across processes.
+
+    Works as a drop-in for the asyncio.Lock serializing ingestion: tasks of
+    this process queue on the asyncio lock, then wait for the file lock while
+    another worker writes. Once both are held, on_acquire runs so the writer
+    can catch up with the version the previous writer saved.
+    """
+
+    def __init__(self, path: str, on_acquire: Optional[Callable[[], Awaitable[Any]]] = None):
+        """
+        Initialize the lock.
+
+        Args:
+            path: Lock file path
+            on_acquire: Coroutine function awaited after both locks are taken
+        """
+        self._lock = asyncio.Lock()
+        self._file_lock = FileLock(path)
+        self._on_acquire = on_acquire
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    async def __aenter__(self):
+        await self._lock.acquire()
+        try:
+            while not self._file_lock.try_acquire():
+                await asyncio.sleep(LOCK_POLL_SECONDS)
+            if self._on_acquire is not None:
+                await self._on_acquire()
+        except BaseException:
+            self._file_lock.release()
+            self._lock.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        self._file_lock.release()
+        self._lock.release()
@@ -1,4 +1,4 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes import agent, blob, vectorization
 import uvicorn
@@ -56,23 +56,27 @@ async def root():
 async def health_check():
     return {"status": "healthy", "message": "API is operational"}
 
-@app.on_event("startup")
-async def startup_event():
-    """
-    Event handler that runs when the FastAPI application starts.
-    Performs auto-vectorization if the vector database is empty.
+@app.get("/ready")
+async def readiness_check(response: Response):
     """
-    logger.info("FastAPI application starting up...")
+    Readiness probe for the instructive index.
     
+    /health only says the process is live. /ready answers 200 once the
+    vector index is loaded, and 503 before the warm-up starts, while the index
+    is still being loaded or built ("warming") and when the warm-up failed
+    ("unavailable"), which includes auto-vectorization where every file
+    failed. Patient tools work in every case.
+    """
+    from app.services.vectorization_manager import get_vectorization_manager
+    readiness = get_vectorization_manager().get_readiness()
+    if readiness["status"] in ("warming", "unavailable"):
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return readiness
+
+async def log_warm_up(warm_up: asyncio.Task):
+    """Log the outcome of the background index warm-up."""
     try:
-        # Import here to avoid circular imports
-        from app.services.vectorization_manager import get_vectorization_manager
-        
-        # Get the singleton instance
-        vectorization_manager = get_vectorization_manager()
-        
-        # Check if auto-vectorization should run
-        result = await vectorization_manager.auto_vectorize_on_startup()
+        result = await warm_up
         
         if result["status"] == "completed":
             files_processed = result.get('files_processed', 0)
@@ -82,15 +86,55 @@ async def startup_event():
             logger.info(f"⏭️ Auto-vectorization skipped: {result['message']}")
         elif result["status"] == "disabled":
             logger.info("🔒 Auto-vectorization is disabled in configuration")
+        elif result["status"] == "error":
+            logger.error(f"❌ Vector index unavailable: {result['message']}")
         else:
             logger.warning(f"⚠️ Auto-vectorization issue: {result['message']}")
             
     except Exception as e:
         logger.error(f"❌ Error during startup auto-vectorization: {e}")
-        # Don't fail the startup, just log the error
+        # Don't fail the application, just log the error
+
+# Background tasks started on startup, referenced so they are not garbage collected
+background_tasks = set()
+
+@app.on_event("startup")
+async def startup_event():
+    """
+    Event handler that runs when the FastAPI application starts.
+    Starts loading the vector index (or auto-vectorizing the container if it
+    is empty) in the background, so requests are served right away; /ready
+    reports when the index is warm.
+    """
+    logger.info("FastAPI application starting up...")
+    
+    # Import here to avoid circular imports
+    from app.core.config import settings
+    from app.services.vectorization_manager import get_vectorization_manager
+    
+    try:
+        # The index is marked as warming before the first request is served
+        warm_up = get_vectorization_manager().start_warm_up()
+        background_tasks.add(asyncio.create_task(log_warm_up(warm_up)))
+    except Exception as e:
+        logger.error(f"❌ Error starting vector index warm-up: {e}")
+    
+    # Multi-worker mode: follow the index versions saved by the ingestion leader
+    if get_vectorization_manager().shared_index:
+        background_tasks.add(asyncio.create_task(get_vectorization_manager().run_shared_index_refresh(settings.VECTOR_INDEX_REFRESH_SECONDS)))
+    
+    # Keep the vector store in sync with the blob container in the background
+    if settings.VECTOR_SYNC_INTERVAL_MINUTES > 0 and settings.AZURE_STORAGE_CONNECTION_STRING:
+        background_tasks.add(asyncio.create_task(get_vectorization_manager().run_periodic_sync(settings.VECTOR_SYNC_INTERVAL_MINUTES)))
     
     logger.info("FastAPI application startup completed")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the text extraction workers and release the ingestion leader lock."""
+    from app.services.vectorization_manager import get_vectorization_manager
+    get_vectorization_manager().shutdown()
+
 if __name__ == "__main__":
     # For development - includes hot reload and better logging
     uvicorn.run(
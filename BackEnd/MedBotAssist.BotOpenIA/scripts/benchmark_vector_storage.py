@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark de almacenamiento comprimido del índice vectorial
+
+Compara float32, float16 e int8 (con y sin re-ranking en precisión completa)
+midiendo bytes por chunk, latencia de búsqueda y recall@k frente a la búsqueda
+exacta en float32, y el índice aproximado IVF con distintos números de sondas. Usa el índice persistido en VECTOR_DB_PATH si existe; si no,
+genera embeddings sintéticos agrupados en temas.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.vector_store import InMemoryVectorStore
+from app.services.ann_index import IVFIndex
+
+def load_embeddings(rows: int, dimension: int, seed: int) -> np.ndarray:
+    """Embeddings del índice persistido, o sintéticos si no hay snapshot."""
+    manifest_path = os.path.join(settings.VECTOR_DB_PATH, "index_manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        store = InMemoryVectorStore()
+        if store.load(os.path.join(settings.VECTOR_DB_PATH, manifest.get("snapshot", ""))) and len(store):
+            print(f"📂 Using persisted index: {len(store)} chunks")
+            return np.asarray(store.embeddings, dtype=np.float32)
+
+    print(f"🧪 Using {rows} synthetic embeddings with {dimension} dimensions")
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(max(rows // 50, 1), dimension))
+    assignments = rng.integers(0, topics.shape[0], size=rows)
+    return (topics[assignments] + rng.normal(scale=0.6, size=(rows, dimension))).astype(np.float32)
+
+def run_benchmark(embeddings: np.ndarray, queries: np.ndarray, top_k: int, rerank: int, probes: list):
+    ids = [str(i) for i in range(embeddings.shape[0])]
+    metadatas = [{"filename": "benchmark"} for _ in ids]
+
+    exact = InMemoryVectorStore()
+    exact.add_documents(ids, ids, embeddings, metadatas)
+    expected = [{r["id"] for r in exact.search(q, top_k=top_k)} for q in queries]
+
+    configurations = [("float32", 0, 0), ("float16", 0, 0), ("int8", 0, 0)]
+    if rerank:
+        configurations += [("float16", rerank, 0), ("int8", rerank, 0)]
+    configurations += [("float32", 0, n_probe) for n_probe in probes]
+    configurations += [("int8", rerank, n_probe) for n_probe in probes]
+
+    print(f"\n{'storage':<10}{'rerank':>8}{'index':>10}{'bytes/chunk':>14}{'ms/query':>11}{f'recall@{top_k}':>12}")
+    print("-" * 65)
+    index = None
+    for storage, rerank_candidates, n_probe in configurations:
+        if n_probe:
+            # Train once and share the clusters between configurations
+            index = index or IVFIndex(min_rows=0)
+            index.n_probe = n_probe
+        store = InMemoryVectorStore(storage=storage, rerank_candidates=rerank_candidates,
+                                    index=index if n_probe else None)
+        store.add_documents(ids, ids, embeddings, metadatas)
+
+        start = time.perf_counter()
+        found = [{r["id"] for r in store.search(q, top_k=top_k)} for q in queries]
+        elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        recall = np.mean([len(f & e) / len(e) for f, e in zip(found, expected)])
+        label = f"ivf/{n_probe}" if n_probe else "exact"
+        print(f"{storage:<10}{rerank_candidates:>8}{label:>10}{store.nbytes / len(store):>14.0f}{elapsed_ms:>11.3f}{recall:>12.4f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compressed vector storage")
+    parser.add_argument("--rows", type=int, default=20000, help="Synthetic chunks when no index is persisted")
+    parser.add_argument("--dimension", type=int, default=1536, help="Synthetic embedding dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--top-k", type=int, default=5, help="Results per query")
+    parser.add_argument("--rerank", type=int, default=50, help="Candidates re-ranked in full precision (0 to skip)")
+    parser.add_argument("--probes", type=int, nargs="*", default=[4, 8, 16], help="IVF probe counts to compare")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print("📊 Vector Storage Benchmark")
+    print("=" * 65)
+
+    embeddings = load_embeddings(args.rows, args.dimension, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    picks = rng.integers(0, embeddings.shape[0], size=args.queries)
+    queries = embeddings[picks] + rng.normal(scale=0.3, size=(args.queries, embeddings.shape[1])).astype(np.float32)
+
+    run_benchmark(embeddings, queries, args.top_k, args.rerank, args.probes)
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 Script de debug para verificar el estado de ChromaDB y documentos vectorizados
 """
 
+import asyncio
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -17,7 +18,7 @@ import chromadb
 from chromadb.config import Settings
 from app.agents.tools.instructive_search_tools import InstructiveSearchTools
 
-def debug_chromadb():
+async def debug_chromadb():
     print("🔍 CHROMADB DEBUG SCRIPT")
     print("=" * 50)
     
@@ -86,7 +87,7 @@ def debug_chromadb():
         
         if available.get('success') and available.get('total_files', 0) > 0:
             print("   Probando búsqueda de contenido...")
-            search_result = tools.search_instructive_information("medical procedure")
+            search_result = await tools.search_instructive_information("medical procedure")
             print(f"   Búsqueda exitosa: {search_result.get('success', False)}")
             print(f"   Resultados encontrados: {search_result.get('total_found', 0)}")
         
@@ -96,4 +97,4 @@ def debug_chromadb():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    debug_chromadb()
+    asyncio.run(debug_chromadb())
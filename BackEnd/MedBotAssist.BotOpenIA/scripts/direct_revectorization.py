@@ -63,7 +63,7 @@ async def direct_revectorization():
             tools = InstructiveSearchTools()
             
             # Probar búsqueda
-            search_result = tools.search_instructive_information("caldo de hueso")
+            search_result = await tools.search_instructive_information("caldo de hueso")
             print(f"   Search result success: {search_result.get('success', False)}")
             if search_result.get('success'):
                 print(f"   Results found: {len(search_result.get('results', []))}")
@@ -13,6 +13,21 @@ Test files:
 - test_import_structure.py: Import structure validation tests
 - test_modular_structure.py: Modular architecture tests
 - test_normalization.py: Data normalization tests
+- test_vector_store.py: In-memory vector store tests
+- test_embedding_batcher.py: Embedding request batching and retry tests
+- test_embedding_cache.py: Content-addressed embedding cache tests
+- test_ann_index.py: Approximate (IVF) vector index tests
+- test_keyword_index.py: BM25 keyword index tests
+- test_text_chunker.py: Structure-aware chunker tests
+- test_text_extraction.py: Document block extraction tests
+- test_ingestion_jobs.py: Background ingestion job manager tests
+- test_worker_coordination.py: Multi-worker index lock tests
+- test_index_generation.py: Index generation and file catalog tests
+- test_chunk_store.py: Columnar chunk storage tests
+- test_query_embedding_cache.py: Query embedding LRU/TTL cache and single-flight tests
+- test_patient_cache.py: Patient cache refresh and change detection tests
+- test_patient_name_index.py: Accent-insensitive and fuzzy patient name index tests
+- test_patient_search_index.py: Ranked multi-field patient term index tests
 
 Usage:
 Run individual tests from the project root:
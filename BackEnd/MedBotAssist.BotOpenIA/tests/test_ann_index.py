@@ -0,0 +1,82 @@
+# test_ann_index.py
+
+import tempfile
+import unittest
+import numpy as np
+from app.services.ann_index import IVFIndex
+from app.services.vector_store import InMemoryVectorStore
+
+def _clustered_vectors(rows, dimension=32, topics=20, seed=3):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, dimension))
+    labels = rng.integers(0, topics, size=rows)
+    return (centers[labels] + rng.normal(scale=0.3, size=(rows, dimension))).astype(np.float32)
+
+def _store(vectors, min_rows=100, n_probe=3):
+    store = InMemoryVectorStore(index=IVFIndex(n_lists=10, n_probe=n_probe, min_rows=min_rows))
+    ids = [f'id{i}' for i in range(len(vectors))]
+    store.add_documents(ids, ids, vectors, [{'filename': 'f.pdf', 'chunk_index': i} for i in range(len(ids))])
+    return store
+
+class TestIVFIndex(unittest.TestCase):
+    def setUp(self):
+        self.vectors = _clustered_vectors(500)
+        self.queries = self.vectors[::25] + np.random.default_rng(4).normal(scale=0.1, size=(20, 32)).astype(np.float32)
+
+    def test_small_store_uses_exact_search(self):
+        store = _store(self.vectors[:50])
+
+        self.assertFalse(store.index.is_trained)
+        self.assertEqual(store.search(self.queries[0], top_k=1)[0]['id'], 'id0')
+
+    def test_matches_exact_search_on_clustered_data(self):
+        store = _store(self.vectors)
+        exact = InMemoryVectorStore()
+        ids = [f'id{i}' for i in range(500)]
+        exact.add_documents(ids, ids, self.vectors, [{} for _ in ids])
+
+        self.assertTrue(store.index.is_active(len(store)))
+        for query in self.queries:
+            expected = [r['id'] for r in exact.search(query, top_k=5)]
+            found = [r['id'] for r in store.search(query, top_k=5)]
+            self.assertEqual(found, expected)
+
+    def test_incremental_add_and_delete(self):
+        store = _store(self.vectors[:400])
+        store.add_documents(['new'], ['new'], [self.vectors[450]], [{'filename': 'g.pdf'}])
+        store.remove_documents([f'id{i}' for i in range(0, 400, 2)])
+
+        self.assertTrue(store.index.is_active(len(store)))
+        self.assertEqual(store.search(self.vectors[450], top_k=1)[0]['id'], 'new')
+        self.assertEqual(store.search(self.vectors[1], top_k=1)[0]['id'], 'id1')
+        self.assertNotEqual(store.search(self.vectors[0], top_k=1)[0]['id'], 'id0')
+
+    def test_copied_store_keeps_index_independent(self):
+        store = _store(self.vectors[:400])
+        copy = store.copy()
+        copy.add_documents(['new'], ['new'], [self.vectors[450]], [{'filename': 'g.pdf'}])
+        copy.remove_documents(['id1'])
+
+        self.assertTrue(copy.index.is_active(len(copy)))
+        self.assertEqual(copy.search(self.vectors[450], top_k=1)[0]['id'], 'new')
+        self.assertEqual(store.search(self.vectors[1], top_k=1)[0]['id'], 'id1')
+        self.assertNotIn('new', [r['id'] for r in store.search(self.vectors[450], top_k=5)])
+
+    def test_probes_more_lists_to_fill_top_k(self):
+        store = _store(self.vectors, n_probe=1)
+
+        self.assertEqual(len(store.search(self.queries[0], top_k=200)), 200)
+
+    def test_index_saved_with_snapshot(self):
+        store = _store(self.vectors)
+
+        with tempfile.TemporaryDirectory() as directory:
+            store.save(directory)
+            loaded = InMemoryVectorStore(index=IVFIndex(n_probe=3, min_rows=100))
+            self.assertTrue(loaded.load(directory))
+
+            self.assertEqual(loaded.index.get_stats()['lists'], 10)
+            self.assertEqual(loaded.search(self.queries[3], top_k=3), store.search(self.queries[3], top_k=3))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+# test_chunk_store.py
+
+import tempfile
+import unittest
+import numpy as np
+from app.services.chunk_store import ChunkDocuments, ChunkStore
+from app.services.vector_store import InMemoryVectorStore
+
+def _metadata(filename, chunk_index, **extra):
+    metadata = {'filename': filename, 'file_type': 'application/pdf', 'etag': 'e1', 'chunk_index': chunk_index,
+                'section': 'Dosage', 'page_start': 2, 'page_end': 3, 'char_start': 10, 'char_end': 90}
+    metadata.update(extra)
+    return metadata
+
+class TestChunkStore(unittest.TestCase):
+    def setUp(self):
+        self.chunks = ChunkStore(initial_capacity=2)
+        for index in range(3):
+            self.chunks.put(f'a_{index}', f'texto {index} ñandú', _metadata('a.pdf', index))
+        self.chunks.put('b_0', 'beta', _metadata('b.pdf', 0, section=None, page_start=2 ** 40))
+
+    def test_metadata_round_trips(self):
+        self.assertEqual(self.chunks.content(1), 'texto 1 ñandú')
+        self.assertEqual(self.chunks.metadata(1), _metadata('a.pdf', 1))
+        self.assertEqual(self.chunks.metadata(3), _metadata('b.pdf', 0, section=None, page_start=2 ** 40))
+        self.assertEqual(self.chunks.field(2, 'chunk_index'), 2)
+        self.assertIsNone(self.chunks.field(2, 'missing'))
+
+    def test_file_metadata_is_interned_once(self):
+        self.assertEqual(len(self.chunks.records), 2)
+        self.assertEqual(self.chunks.record_column.tolist(), [0, 0, 0, 1])
+
+    def test_overwrite_keeps_row(self):
+        row = self.chunks.put('a_1', 'nuevo', _metadata('a.pdf', 1, etag='e2'))
+
+        self.assertEqual(row, 1)
+        self.assertEqual(len(self.chunks), 4)
+        self.assertEqual(self.chunks.document(1).content, 'nuevo')
+        self.assertEqual(self.chunks.field(1, 'etag'), 'e2')
+
+    def test_keep_compacts_rows_and_records(self):
+        version = self.chunks.records_version
+        self.chunks.keep([3])
+
+        self.assertEqual(self.chunks.ids, ['b_0'])
+        self.assertEqual(self.chunks.row_of('b_0'), 0)
+        self.assertNotIn('a_0', self.chunks)
+        self.assertEqual(len(self.chunks.records), 1)
+        self.assertGreater(self.chunks.records_version, version)
+        self.assertEqual(self.chunks.content(0), 'beta')
+
+    def test_copy_is_independent(self):
+        clone = self.chunks.copy()
+        clone.put('c_0', 'gamma', _metadata('c.pdf', 0))
+        clone.keep([0, 4])
+
+        self.assertEqual(len(self.chunks), 4)
+        self.assertEqual(self.chunks.content(3), 'beta')
+        self.assertEqual(clone.ids, ['a_0', 'c_0'])
+
+    def test_save_and_load_memory_maps(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.chunks.save(directory)
+            loaded = ChunkStore()
+            self.assertTrue(loaded.load(directory))
+
+            self.assertEqual(loaded.ids, self.chunks.ids)
+            self.assertEqual(loaded.metadata(3), self.chunks.metadata(3))
+            self.assertEqual(loaded.content(0), 'texto 0 ñandú')
+            self.assertIsInstance(loaded._text, np.memmap)
+
+            # Appending to a mapped store copies it into memory first
+            loaded.put('c_0', 'gamma', _metadata('c.pdf', 0))
+            self.assertEqual(loaded.content(4), 'gamma')
+            del loaded
+
+    def test_save_does_not_compact_the_store(self):
+        self.chunks.put('a_1', 'nuevo', _metadata('a.pdf', 1, etag='e2'))
+        text, used = self.chunks._text, self.chunks._text_used
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.chunks.save(directory)
+            loaded = ChunkStore()
+            self.assertTrue(loaded.load(directory))
+
+            # Published stores are read by searches while they are saved
+            self.assertIs(self.chunks._text, text)
+            self.assertEqual(self.chunks._text_used, used)
+            self.assertGreater(self.chunks._text_garbage, 0)
+            self.assertLess(loaded._text_used, used)
+            self.assertEqual([loaded.content(row) for row in range(4)],
+                             [self.chunks.content(row) for row in range(4)])
+            self.assertEqual(loaded.metadata(1), self.chunks.metadata(1))
+            del loaded
+
+    def test_documents_view(self):
+        documents = ChunkDocuments(self.chunks)
+
+        self.assertEqual(len(documents), 4)
+        self.assertEqual(documents['a_2'].row, 2)
+        self.assertEqual(documents['a_2'].metadata['section'], 'Dosage')
+        with self.assertRaises(KeyError):
+            documents['missing']
+
+class TestVectorStoreMemoryStats(unittest.TestCase):
+    def test_stats_report_bytes_per_chunk(self):
+        store = InMemoryVectorStore()
+        store.add_documents(['a_0', 'a_1'], ['alpha', 'beta'], [[1.0, 0.0], [0.0, 1.0]],
+                            [_metadata('a.pdf', 0), _metadata('a.pdf', 1)])
+        stats = store.get_memory_stats()
+
+        self.assertEqual(stats['chunks'], 2)
+        self.assertEqual(stats['embedding_bytes'], 16)
+        self.assertGreater(stats['bytes_per_chunk'], 0)
+        self.assertLess(stats['bytes_per_chunk'], stats['legacy_bytes_per_chunk'])
+        self.assertEqual(InMemoryVectorStore().get_memory_stats()['bytes_per_chunk'], 0)
+
+    def test_filters_follow_removed_records(self):
+        store = InMemoryVectorStore()
+        store.add_documents(['a_0', 'b_0', 'a_1'], ['alpha', 'beta', 'gamma'], [[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]],
+                            [_metadata('a.pdf', 0), _metadata('b.pdf', 0), _metadata('a.pdf', 1)])
+        self.assertEqual(store.find_ids({'filename': 'a.pdf'}), ['a_0', 'a_1'])
+
+        store.remove_documents(['a_0'])
+        self.assertEqual(store.find_ids({'filename': 'a.pdf'}), ['a_1'])
+        store.add_documents(['a_0'], ['alpha'], [[1.0, 0.0]], [_metadata('a.pdf', 0, etag='e2')])
+        self.assertEqual(store.find_ids({'etag': 'e2'}), ['a_0'])
+        self.assertEqual(store.find_ids({'etag': 'e1', 'filename': 'a.pdf'}), ['a_1'])
+
+if __name__ == '__main__':
+    unittest.main()
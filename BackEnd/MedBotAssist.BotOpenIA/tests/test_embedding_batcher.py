@@ -0,0 +1,94 @@
+# test_embedding_batcher.py
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+from app.services.embedding_batcher import EmbeddingBatcher
+
+class InputRejected(Exception):
+    status_code = 400
+
+class FakeEmbeddings:
+    """Fake embeddings API that rejects inputs containing 'flaky' once."""
+
+    def __init__(self):
+        self.requests = []
+        self.failed_once = set()
+
+    async def create(self, model, input):
+        self.requests.append(list(input))
+        for text in input:
+            if 'flaky' in text and text not in self.failed_once:
+                self.failed_once.add(text)
+                raise InputRejected("invalid input")
+        return SimpleNamespace(data=[
+            SimpleNamespace(index=i, embedding=[float(len(text)), 1.0]) for i, text in enumerate(input)
+        ])
+
+def make_batcher(client, **kwargs):
+    batcher = EmbeddingBatcher(client, model='test-model', retry_base_delay=0, linger_ms=5, **kwargs)
+    # Use the character-based token estimate so tests need no tiktoken data
+    batcher._encoding_loaded = True
+    return batcher
+
+class TestEmbeddingBatcher(unittest.TestCase):
+    def setUp(self):
+        self.embeddings = FakeEmbeddings()
+        self.client = SimpleNamespace(embeddings=self.embeddings)
+
+    def test_concurrent_callers_share_requests(self):
+        batcher = make_batcher(self.client)
+
+        async def run():
+            return await asyncio.gather(batcher.embed(['aa', 'bbb']), batcher.embed(['c']))
+
+        first, second = asyncio.run(run())
+
+        self.assertEqual(first, [[2.0, 1.0], [3.0, 1.0]])
+        self.assertEqual(second, [[1.0, 1.0]])
+        self.assertEqual(len(self.embeddings.requests), 1)
+
+    def test_batches_respect_token_budget(self):
+        batcher = make_batcher(self.client, max_batch_tokens=10)
+
+        result = asyncio.run(batcher.embed(['x' * 16] * 5))
+
+        self.assertEqual(len(result), 5)
+        # Each text counts as 5 tokens, so at most two fit per request
+        self.assertTrue(all(len(request) <= 2 for request in self.embeddings.requests))
+        self.assertEqual(batcher.get_stats()['inputs'], 5)
+
+    def test_only_failed_sub_batch_is_retried(self):
+        batcher = make_batcher(self.client)
+
+        result = asyncio.run(batcher.embed(['ok one', 'ok two', 'ok three', 'flaky']))
+
+        self.assertEqual(len(result), 4)
+        stats = batcher.get_stats()
+        self.assertEqual(stats['retries'], 1)
+        # The rejected batch is split in halves and each half is sent again
+        self.assertEqual(self.embeddings.requests[1:], [['ok one', 'ok two'], ['ok three', 'flaky']])
+
+    def test_transient_error_retries_whole_batch(self):
+        attempts = []
+
+        async def create(model, input):
+            attempts.append(list(input))
+            if len(attempts) == 1:
+                raise RuntimeError("connection reset")
+            return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[1.0]) for i in range(len(input))])
+
+        batcher = make_batcher(SimpleNamespace(embeddings=SimpleNamespace(create=create)))
+
+        self.assertEqual(len(asyncio.run(batcher.embed(['a', 'b', 'c']))), 3)
+        self.assertEqual(attempts, [['a', 'b', 'c'], ['a', 'b', 'c']])
+
+    def test_gives_up_after_max_retries(self):
+        batcher = make_batcher(self.client, max_retries=0)
+
+        with self.assertRaises(InputRejected):
+            asyncio.run(batcher.embed(['flaky input']))
+        self.assertEqual(batcher.get_stats()['failed_inputs'], 1)
+
+if __name__ == "__main__":
+    unittest.main()
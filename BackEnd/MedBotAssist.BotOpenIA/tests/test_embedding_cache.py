@@ -0,0 +1,65 @@
+# test_embedding_cache.py
+
+import asyncio
+import os
+import tempfile
+import unittest
+import numpy as np
+from app.services.embedding_cache import EmbeddingCache, embedding_cache_key
+
+class TestEmbeddingCache(unittest.TestCase):
+    def test_key_is_stable_and_model_specific(self):
+        key = embedding_cache_key('text-embedding-3-small', 'insulin dose')
+
+        self.assertEqual(key, embedding_cache_key('text-embedding-3-small', 'insulin dose'))
+        self.assertNotEqual(key, embedding_cache_key('text-embedding-3-large', 'insulin dose'))
+        self.assertEqual(len(key), 64)
+
+    def test_hits_misses_and_lru_eviction(self):
+        cache = EmbeddingCache(max_entries=2)
+        cache.put('a', [1.0, 0.0])
+        cache.put('b', [0.0, 1.0])
+        self.assertIsNotNone(cache.get('a'))
+        cache.put('c', [1.0, 1.0])
+
+        self.assertIsNone(cache.get('b'))
+        np.testing.assert_array_equal(cache.get('c'), np.array([1.0, 1.0], dtype=np.float32))
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (2, 1, 1))
+
+    def test_disabled_cache_stores_nothing(self):
+        cache = EmbeddingCache(max_entries=0)
+        cache.put('a', [1.0])
+
+        self.assertEqual(len(cache), 0)
+
+    def test_persists_mixed_dimensions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.npz')
+            cache = EmbeddingCache(max_entries=10, path=path)
+            cache.put('small', [1.0, 2.0])
+            cache.put('large', [1.0, 2.0, 3.0])
+            cache.save()
+
+            reloaded = EmbeddingCache(max_entries=10, path=path)
+            np.testing.assert_array_equal(reloaded.get('large'), np.array([1.0, 2.0, 3.0], dtype=np.float32))
+            self.assertEqual(len(reloaded), 2)
+
+    def test_load_runs_off_the_event_loop(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.npz')
+            cache = EmbeddingCache(max_entries=10, path=path)
+            cache.put('a', [1.0, 2.0])
+            cache.save()
+
+            reloaded = EmbeddingCache(max_entries=10, path=path)
+            self.assertFalse(reloaded.is_loaded)
+            asyncio.run(asyncio.to_thread(reloaded.load))
+
+            self.assertTrue(reloaded.is_loaded)
+            self.assertEqual(len(reloaded), 1)
+            self.assertEqual(reloaded.get_stats()['misses'], 0)
+            np.testing.assert_array_equal(reloaded.get('a'), np.array([1.0, 2.0], dtype=np.float32))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+# test_index_generation.py
+
+import unittest
+from app.services.index_generation import IndexGeneration
+from app.services.vector_store import InMemoryVectorStore
+
+def _generation():
+    generation = IndexGeneration(3, InMemoryVectorStore())
+    generation.vector_store.add_documents(['b_0', 'a_0'], ['beta', 'alpha'], [[0.0, 1.0], [1.0, 0.0]],
+                                          [{'filename': 'b.pdf'}, {'filename': 'a.txt'}])
+    generation.keyword_index.add('b_0', 'beta')
+    generation.keyword_index.add('a_0', 'alpha')
+    generation.vectorization_log['b.pdf'] = {'etag': 'e2', 'file_type': 'application/pdf', 'file_size': 2048,
+                                             'chunks_processed': 1, 'vectorization_timestamp': '2025-01-02T00:00:00'}
+    generation.vectorization_log['a.txt'] = {'etag': 'e1', 'chunks_processed': 1}
+    return generation
+
+class TestIndexGeneration(unittest.TestCase):
+    def test_file_catalog_is_read_from_the_log(self):
+        catalog = _generation().get_file_catalog()
+
+        self.assertEqual([entry['filename'] for entry in catalog], ['a.txt', 'b.pdf'])
+        self.assertEqual(catalog[1], {
+            'filename': 'b.pdf', 'file_type': 'application/pdf', 'chunks_count': 1, 'etag': 'e2',
+            'size': 2048, 'last_modified': '', 'vectorized_at': '2025-01-02T00:00:00'
+        })
+        self.assertEqual(catalog[0]['file_type'], 'unknown')
+
+    def test_etag_changes_with_number_and_token(self):
+        generation = _generation()
+        same_number = IndexGeneration(3, InMemoryVectorStore())
+
+        self.assertTrue(generation.etag.startswith('"3-') and generation.etag.endswith('"'))
+        self.assertNotEqual(generation.etag, same_number.etag)
+        self.assertEqual(IndexGeneration(3, InMemoryVectorStore(), token='snap').etag, '"3-snap"')
+
+    def test_derived_generation_is_independent(self):
+        generation = _generation()
+        derived = generation.derive(4)
+        derived.vector_store.remove_documents(['a_0'])
+        derived.keyword_index.remove('a_0')
+        derived.vectorization_log.pop('a.txt')
+        derived.vectorization_log['b.pdf']['chunks_processed'] = 7
+
+        self.assertEqual(derived.number, 4)
+        self.assertNotEqual(derived.etag, generation.etag)
+        self.assertEqual(len(generation), 2)
+        self.assertEqual(generation.keyword_index.search('alpha')[0][0], 'a_0')
+        self.assertEqual([entry['chunks_count'] for entry in generation.get_file_catalog()], [1, 1])
+        self.assertEqual([entry['filename'] for entry in derived.get_file_catalog()], ['b.pdf'])
+
+if __name__ == "__main__":
+    unittest.main()
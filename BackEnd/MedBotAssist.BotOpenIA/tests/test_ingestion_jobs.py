@@ -0,0 +1,77 @@
+# test_ingestion_jobs.py
+
+import asyncio
+import unittest
+from app.services.ingestion_jobs import IngestionJobManager, RUNNING, COMPLETED, FAILED, CANCELLED
+
+class TestIngestionJobManager(unittest.TestCase):
+    def test_jobs_report_progress_and_run_one_at_a_time(self):
+        async def scenario():
+            manager = IngestionJobManager(asyncio.Lock())
+            release = asyncio.Event()
+            seen_running = []
+
+            async def revectorize(job):
+                job.set_files(['a.pdf', 'b.pdf', 'c.pdf'])
+                job.file_started('a.pdf')
+                job.file_finished('a.pdf', chunks=4)
+                job.file_started('b.pdf')
+                job.file_finished('b.pdf', error='boom')
+                seen_running.append(job.get_progress())
+                await release.wait()
+                job.file_finished('c.pdf', chunks=2)
+                return {'files_processed': 2}
+
+            async def sync(job):
+                return {'files_processed': 0}
+
+            first = manager.submit('revectorize', revectorize, requested_by='ana')
+            second = manager.submit('sync', sync)
+            self.assertIs(manager.submit('revectorize', revectorize), first)
+            await asyncio.sleep(0.01)
+
+            self.assertEqual(first.status, RUNNING)
+            self.assertEqual(second.status, 'queued')
+            release.set()
+            await manager.wait(second.id)
+            return first, second, seen_running[0]
+
+        first, second, progress = asyncio.run(scenario())
+
+        self.assertEqual((progress['files_total'], progress['files_done'], progress['files_failed']), (3, 1, 1))
+        self.assertEqual(progress['chunks'], 4)
+        self.assertIsNotNone(progress['eta_seconds'])
+        self.assertEqual(first.status, COMPLETED)
+        self.assertEqual(first.result, {'files_processed': 2})
+        self.assertEqual(first.files['b.pdf'], {'status': 'failed', 'error': 'boom'})
+        self.assertEqual(first.to_dict()['progress']['percent'], 100.0)
+        self.assertEqual(second.status, COMPLETED)
+        self.assertGreaterEqual(second.started_at, first.finished_at)
+
+    def test_cancel_and_failure(self):
+        async def scenario():
+            manager = IngestionJobManager(asyncio.Lock())
+
+            async def forever(job):
+                await asyncio.Event().wait()
+
+            async def broken(job):
+                raise RuntimeError('listing failed')
+
+            running = manager.submit('revectorize', forever)
+            failing = manager.submit('sync', broken)
+            await asyncio.sleep(0.01)
+            manager.cancel(running.id)
+            await manager.wait(failing.id)
+            self.assertIsNone(manager.cancel('missing'))
+            return running, failing
+
+        running, failing = asyncio.run(scenario())
+
+        self.assertEqual(running.status, CANCELLED)
+        self.assertTrue(running.cancel_requested)
+        self.assertEqual(failing.status, FAILED)
+        self.assertEqual(failing.error, 'listing failed')
+
+if __name__ == "__main__":
+    unittest.main()
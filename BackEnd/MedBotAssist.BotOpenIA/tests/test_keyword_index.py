@@ -0,0 +1,59 @@
+# test_keyword_index.py
+
+import unittest
+from app.services.keyword_index import BM25Index, tokenize
+
+class TestTokenize(unittest.TestCase):
+    def test_normalizes_case_accents_and_compound_tokens(self):
+        self.assertEqual(tokenize("Administración de 10 mg/kg"), ['administracion', 'de', '10', 'mg/kg', 'mg', 'kg'])
+        self.assertEqual(tokenize("dosis 0,5 ml, luego"), ['dosis', '0,5', '0', '5', 'ml', 'luego'])
+
+class TestBM25Index(unittest.TestCase):
+    def setUp(self):
+        self.index = BM25Index()
+        self.index.add('a', "Insulin glargine is given once daily at bedtime")
+        self.index.add('b', "Insulin lispro is given before meals")
+        self.index.add('c', "Paracetamol 15 mg/kg every 6 hours")
+        self.index.add('d', "Wound care: clean the wound daily")
+
+    def test_ranks_rare_exact_terms_first(self):
+        results = self.index.search("insulin glargine", top_k=2)
+
+        self.assertEqual([doc_id for doc_id, _ in results], ['a', 'b'])
+        self.assertGreater(results[0][1], results[1][1])
+        self.assertEqual(self.index.search("15 mg/kg", top_k=5)[0][0], 'c')
+        self.assertEqual(self.index.search("heparin"), [])
+
+    def test_allowed_ids_restrict_results(self):
+        results = self.index.search("insulin", top_k=5, allowed_ids={'b', 'c'})
+
+        self.assertEqual([doc_id for doc_id, _ in results], ['b'])
+
+    def test_replace_and_remove_update_postings(self):
+        self.index.add('a', "Heparin infusion protocol")
+        self.index.remove('b')
+        self.index.remove('missing')
+
+        self.assertEqual(self.index.search("insulin"), [])
+        self.assertEqual(self.index.search("heparin")[0][0], 'a')
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.get_stats()['postings'], sum(len(set(tokenize(t))) for t in (
+            "Heparin infusion protocol", "Paracetamol 15 mg/kg every 6 hours", "Wound care: clean the wound daily"
+        )))
+
+        self.index.clear()
+        self.assertEqual(self.index.search("heparin"), [])
+
+    def test_copy_is_independent(self):
+        copy = self.index.copy()
+        copy.remove('a')
+        copy.add('e', "Heparin infusion protocol")
+
+        self.assertEqual(self.index.search("glargine")[0][0], 'a')
+        self.assertEqual(self.index.search("heparin"), [])
+        self.assertEqual(copy.search("glargine"), [])
+        self.assertEqual(copy.search("heparin")[0][0], 'e')
+        self.assertEqual(len(self.index), 4)
+
+if __name__ == "__main__":
+    unittest.main()
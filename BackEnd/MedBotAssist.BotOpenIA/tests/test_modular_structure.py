@@ -33,6 +33,7 @@ class TestModularStructure(unittest.TestCase):
             'search_patients',
             'get_patients_summary', 
             'search_patients_by_name',
+            'search_patients_by_similar_name',
             'filter_patients_by_demographics',
             'search_patients_by_condition',
             'get_patient_by_id',
@@ -0,0 +1,143 @@
+# test_patient_cache.py
+
+import unittest
+from datetime import date
+from app.services.patient_cache import CachedPatient, PatientCache, parse_birth_date
+
+class FakePatientsTable:
+    """Patients table with the row and state queries the cache runs."""
+
+    def __init__(self):
+        self.rows = {}
+        self.queries = []
+
+    def add(self, patient_id, full_name, identification_number, birth_date=None, phone=None, email=None):
+        self.rows[patient_id] = {
+            'patient_id': patient_id, 'full_name': full_name, 'identification_number': identification_number,
+            'birth_date': birth_date, 'phone': phone, 'email': email
+        }
+
+    def load_rows(self, after_id):
+        self.queries.append(('rows', after_id))
+        return [dict(row) for patient_id, row in self.rows.items() if after_id is None or patient_id > after_id]
+
+    def load_state(self, up_to_id):
+        self.queries.append(('state', up_to_id))
+        rows = [row for patient_id, row in self.rows.items() if up_to_id is None or patient_id <= up_to_id]
+        checksum = hash(tuple(sorted(repr(sorted(row.items())) for row in rows))) if rows else None
+        return len(rows), checksum, max(self.rows) if self.rows else None
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestPatientCache(unittest.TestCase):
+    def setUp(self):
+        self.table = FakePatientsTable()
+        self.table.add(1, 'José Pérez', '100', date(1990, 5, 15), '+57-300', 'jose@Gmail.com')
+        self.table.add(2, 'Ana Gómez', '200', '1985-12-10T00:00:00.000Z')
+        self.clock = FakeClock()
+        self.cache = PatientCache(self.table.load_rows, self.table.load_state, ttl_seconds=30,
+                                  max_age_seconds=3600, clock=self.clock)
+
+    def test_rows_are_normalized_once_and_sorted(self):
+        patients = self.cache.get_patients()
+
+        self.assertEqual([p.full_name for p in patients], ['Ana Gómez', 'José Pérez'])
+        self.assertEqual(patients[1].search_name, 'jose perez')
+        self.assertEqual(patients[1].search_email, 'jose@gmail.com')
+        self.assertIn('1990-05-15', patients[1].search_text)
+        self.assertEqual(patients[0].birth_date, date(1985, 12, 10))
+        self.assertEqual(patients[1].to_dict()['birth_date'], date(1990, 5, 15))
+
+    def test_reads_within_ttl_do_not_query(self):
+        self.cache.get_patients()
+        queries = len(self.table.queries)
+        self.cache.get_patients()
+
+        self.assertEqual(len(self.table.queries), queries)
+        stats = self.cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['full_refreshes']), (1, 1, 1))
+
+    def test_unchanged_table_costs_one_state_query(self):
+        self.cache.get_patients()
+        self.table.queries.clear()
+        self.clock.now = 31
+
+        self.cache.get_patients()
+
+        self.assertEqual(self.table.queries, [('state', 2)])
+        self.assertEqual(self.cache.get_stats()['unchanged'], 1)
+
+    def test_new_patients_are_fetched_incrementally(self):
+        self.cache.get_patients()
+        self.table.add(3, 'Zoe Díaz', '300')
+        self.table.queries.clear()
+        self.cache.invalidate()
+
+        patients = self.cache.get_patients()
+
+        self.assertEqual([p.patient_id for p in patients], [2, 1, 3])
+        self.assertIn(('rows', 2), self.table.queries)
+        self.assertEqual(self.cache.get_stats()['incremental_refreshes'], 1)
+
+        # The new watermark covers the merged rows
+        self.table.queries.clear()
+        self.cache.invalidate()
+        self.cache.get_patients()
+        self.assertEqual(self.table.queries, [('state', 3)])
+
+    def test_updates_and_deletes_reload_the_table(self):
+        first = self.cache.get_patients()
+        self.table.add(1, 'José Pérez', '100', date(1990, 5, 15), '+57-999', 'jose@gmail.com')
+        self.cache.invalidate()
+
+        patients = self.cache.get_patients()
+        self.assertEqual(patients[1].phone, '+57-999')
+        self.assertEqual(first[1].phone, '+57-300')
+
+        del self.table.rows[2]
+        self.clock.now = 31
+        self.assertEqual([p.patient_id for p in self.cache.get_patients()], [1])
+        self.assertEqual(self.cache.get_stats()['full_refreshes'], 3)
+
+    def test_max_age_forces_a_full_reload(self):
+        self.cache.get_patients()
+        self.clock.now = 3600
+        self.table.queries.clear()
+
+        self.cache.get_patients()
+
+        self.assertEqual(self.table.queries, [('state', None), ('rows', None)])
+
+    def test_identification_lookup_needs_a_fresh_snapshot(self):
+        self.assertIsNone(self.cache.find_by_identification(['100']))
+
+        self.cache.get_patients()
+        self.table.add(3, 'Duplicado', '100')
+        self.table.queries.clear()
+        found = self.cache.find_by_identification(['100', '200', '999'])
+
+        self.assertEqual({number: patient.patient_id for number, patient in found.items()}, {'100': 1, '200': 2})
+        self.assertEqual(self.table.queries, [])
+
+        self.cache.invalidate()
+        self.assertIsNone(self.cache.find_by_identification(['100']))
+        self.cache.get_patients()
+        # With duplicate numbers the lowest PatientId wins
+        self.assertEqual(self.cache.find_by_identification(['100'])['100'].patient_id, 1)
+        self.assertEqual(self.cache.get_stats()['lookup_cold'], 2)
+
+    def test_birth_dates_and_ages(self):
+        self.assertEqual(parse_birth_date('1990-05-15'), date(1990, 5, 15))
+        self.assertIsNone(parse_birth_date('not a date'))
+        patient = CachedPatient(1, 'A', '1', date(2000, 6, 30), None, None)
+        self.assertEqual(patient.age(date(2024, 6, 29)), 23)
+        self.assertEqual(patient.age(date(2024, 6, 30)), 24)
+        self.assertIsNone(CachedPatient(2, 'B', '2', None, None, None).age())
+
+if __name__ == '__main__':
+    unittest.main()
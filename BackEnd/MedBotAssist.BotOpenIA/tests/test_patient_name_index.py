@@ -0,0 +1,78 @@
+# test_patient_name_index.py
+
+import unittest
+from app.services.patient_cache import CachedPatient
+from app.services.patient_name_index import PatientNameIndex, allowed_distance, bounded_edit_distance
+
+def snapshot(names):
+    """Patients ordered like PatientCache.get_patients."""
+    patients = [CachedPatient(patient_id, name, str(patient_id), None, None, None)
+                for patient_id, name in enumerate(names, 1)]
+    return sorted(patients, key=lambda patient: (patient.search_name, patient.patient_id))
+
+class TestPatientNameIndex(unittest.TestCase):
+    def setUp(self):
+        self.patients = snapshot([
+            'Úrsula Muñoz', 'José Pérez', 'Josefina Ortega', 'María José Pérez',
+            'Omar Ñañez', 'ANA GÓMEZ', 'Ana', 'Mariana Ruiz', 'Luis González', 'Carla Rodríguez'
+        ])
+        self.index = PatientNameIndex(self.patients)
+
+    def names(self, query, limit=None):
+        return [patient.full_name for patient in self.index.search(query, limit)]
+
+    def test_accents_and_case_are_ignored(self):
+        self.assertEqual(self.names('URSULA munoz'), ['Úrsula Muñoz'])
+        self.assertEqual(self.names('ñañez'), ['Omar Ñañez'])
+        self.assertEqual(self.names('  úrsula  '), ['Úrsula Muñoz'])
+
+    def test_ranking(self):
+        # Exact name, name prefix, word prefix, then substring inside a word
+        self.assertEqual(self.names('ana'), ['Ana', 'ANA GÓMEZ', 'Mariana Ruiz'])
+        self.assertEqual(self.names('jose'), ['José Pérez', 'Josefina Ortega', 'María José Pérez'])
+        self.assertEqual(self.names('jose', limit=2), ['José Pérez', 'Josefina Ortega'])
+
+    def test_words_in_any_order_and_substrings(self):
+        self.assertEqual(self.names('perez jose'), ['José Pérez', 'María José Pérez'])
+        self.assertEqual(self.names('jose perez'), ['José Pérez', 'María José Pérez'])
+        self.assertEqual(self.names('ia jose p'), ['María José Pérez'])
+        self.assertEqual(self.names('ortegaz'), [])
+
+    def test_short_queries_match_word_prefixes_only(self):
+        self.assertEqual(self.names('ma'), ['María José Pérez', 'Mariana Ruiz'])
+        self.assertEqual(self.names(''), [])
+
+    def test_index_belongs_to_its_snapshot(self):
+        self.assertTrue(self.index.covers(self.patients))
+        self.assertFalse(self.index.covers(list(self.patients)))
+        stats = self.index.get_stats()
+        self.assertEqual(stats['patients'], 10)
+
+    def fuzzy(self, query, max_distance=2, limit=None):
+        return [(patient.full_name, distance) for patient, distance in self.index.fuzzy_search(query, max_distance, limit)]
+
+    def test_fuzzy_search_tolerates_typos(self):
+        self.assertEqual(self.fuzzy('Gonzales'), [('Luis González', 1)])
+        self.assertEqual(self.fuzzy('rodrigez carla'), [('Carla Rodríguez', 1)])
+        self.assertEqual(self.fuzzy('Rodirguez'), [('Carla Rodríguez', 2)])
+        self.assertEqual(self.fuzzy('Rodirguez', max_distance=1), [])
+        self.assertEqual(self.fuzzy('Gonzales', max_distance=0), [])
+
+    def test_fuzzy_search_ranks_fewest_edits_first(self):
+        self.assertEqual(self.fuzzy('jose perez'), [('José Pérez', 0), ('María José Pérez', 0)])
+        self.assertEqual(self.fuzzy('perex'), [('José Pérez', 1), ('María José Pérez', 1)])
+        self.assertEqual(self.fuzzy('omar nanes', limit=1), [('Omar Ñañez', 1)])
+        self.assertEqual(self.fuzzy('ama'), [('Ana', 1), ('ANA GÓMEZ', 1)])
+        # Words of up to two characters must match exactly
+        self.assertEqual(self.fuzzy('am'), [])
+        self.assertEqual(self.fuzzy('  '), [])
+
+    def test_edit_distance(self):
+        self.assertEqual(bounded_edit_distance('gonzales', 'gonzalez', 2), 1)
+        self.assertEqual(bounded_edit_distance('kitten', 'sitting', 3), 3)
+        self.assertIsNone(bounded_edit_distance('kitten', 'sitting', 2))
+        self.assertIsNone(bounded_edit_distance('ana', 'anastasia', 2))
+        self.assertEqual([allowed_distance(word, 2) for word in ('an', 'ana', 'perez', 'gonzalez')], [0, 1, 1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
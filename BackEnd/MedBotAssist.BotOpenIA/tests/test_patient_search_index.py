@@ -0,0 +1,58 @@
+# test_patient_search_index.py
+
+import unittest
+from datetime import date
+from app.services.patient_cache import CachedPatient
+from app.services.patient_search_index import PatientSearchIndex, patient_terms, search_terms
+
+def snapshot(rows):
+    """Patients ordered like PatientCache.get_patients."""
+    patients = [CachedPatient(patient_id, *row) for patient_id, row in enumerate(rows, 1)]
+    return sorted(patients, key=lambda patient: (patient.search_name, patient.patient_id))
+
+class TestPatientSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.patients = snapshot([
+            ('María López', 'CC-100', date(1990, 5, 15), '+57-300-555-0101', 'maria.lopez@gmail.com'),
+            ('María Gómez', '200', date(1985, 1, 2), '+57-311-222-3333', 'mgomez@hotmail.com'),
+            ('José Marín', '300', date(1990, 8, 1), None, 'jose@gmail.com'),
+            ('Ana Ruiz', '400', None, '3005550101', None)
+        ])
+        self.index = PatientSearchIndex(self.patients)
+
+    def search(self, query, top_k=None):
+        return [(patient.full_name, score) for patient, score in self.index.search(query, top_k)]
+
+    def test_terms_of_every_field(self):
+        terms = patient_terms(self.patients[3])
+        for term in ('maria', 'lopez', 'cc-100', 'cc', '100', '57', '300', '555', '0101', '573005550101',
+                     'maria.lopez@gmail.com', 'gmail.com', 'gmail', '1990-05-15', '1990'):
+            self.assertIn(term, terms)
+        self.assertEqual(search_terms('jose.perez@gmail.com, 1990'),
+                         {'jose', 'perez', 'gmail', 'com', 'jose.perez@gmail.com', '1990'})
+
+    def test_more_matched_terms_rank_higher(self):
+        self.assertEqual(self.search('patients named maria born in 1990'),
+                         [('María López', 2.0), ('José Marín', 1.0), ('María Gómez', 1.0)])
+        self.assertEqual(self.search('gmail 1990', top_k=2), [('José Marín', 2.0), ('María López', 2.0)])
+
+    def test_phone_email_and_id_lookups(self):
+        self.assertEqual([name for name, _ in self.search('phone containing 555')], ['María López'])
+        self.assertEqual([name for name, _ in self.search('3005550101')], ['Ana Ruiz'])
+        # A whole address found as is replaces its pieces, such as "com"
+        self.assertEqual(self.search('MGOMEZ@hotmail.com'), [('María Gómez', 1.0)])
+        self.assertEqual(self.search('mgomez@yahoo.com')[0], ('María Gómez', 2.0))
+        self.assertEqual([name for name, _ in self.search('cc-100')], ['María López'])
+
+    def test_prefixes_need_three_characters(self):
+        self.assertEqual(self.search('mar'), [('José Marín', 0.5), ('María Gómez', 0.5), ('María López', 0.5)])
+        self.assertEqual(self.search('ma'), [])
+        self.assertEqual(self.search('patients with'), [])
+
+    def test_index_belongs_to_its_snapshot(self):
+        self.assertTrue(self.index.covers(self.patients))
+        self.assertFalse(self.index.covers(list(self.patients)))
+        self.assertEqual(self.index.get_stats()['patients'], 4)
+
+if __name__ == '__main__':
+    unittest.main()
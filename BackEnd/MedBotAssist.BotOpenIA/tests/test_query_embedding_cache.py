@@ -0,0 +1,135 @@
+# test_query_embedding_cache.py
+
+import asyncio
+import unittest
+from app.services.query_embedding_cache import QueryEmbeddingCache, normalize_query
+
+class FakeEmbedder:
+    """Fake embeddings request that records its inputs and can be held open."""
+
+    def __init__(self):
+        self.requests = []
+        self.release = None
+        self.error = None
+
+    async def __call__(self, queries):
+        self.requests.append(list(queries))
+        if self.release is not None:
+            await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return [[float(len(query)), 1.0] for query in queries]
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestQueryEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.embedder = FakeEmbedder()
+        self.clock = FakeClock()
+        self.cache = QueryEmbeddingCache(self.embedder, max_entries=2, ttl_seconds=60, clock=self.clock)
+
+    def test_normalization(self):
+        self.assertEqual(normalize_query("  Insulin\tADMINISTRATION \n"), "insulin administration")
+        self.assertEqual(normalize_query("ﬁebre"), "fiebre")
+
+    def test_repeated_queries_hit_the_cache(self):
+        async def run():
+            first = await self.cache.embed("Insulin administration")
+            second = await self.cache.embed("insulin   administration")
+            return first, second
+
+        first, second = asyncio.run(run())
+
+        self.assertIs(first, second)
+        self.assertEqual(self.embedder.requests, [["insulin administration"]])
+        self.assertFalse(first.flags.writeable)
+        stats = self.cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_concurrent_identical_queries_share_a_request(self):
+        async def run():
+            self.embedder.release = asyncio.Event()
+            tasks = [asyncio.create_task(self.cache.embed("ketogenic diet")) for _ in range(5)]
+            await asyncio.sleep(0)
+            self.embedder.release.set()
+            return await asyncio.gather(*tasks)
+
+        results = asyncio.run(run())
+
+        self.assertEqual(len(self.embedder.requests), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(self.cache.get_stats()['coalesced'], 4)
+
+    def test_misses_are_embedded_in_one_request(self):
+        async def run():
+            await self.cache.embed("a")
+            return await self.cache.embed_many(["A", "bb", "bb", "ccc"])
+
+        results = asyncio.run(run())
+
+        self.assertEqual([result[0] for result in results], [1.0, 2.0, 2.0, 3.0])
+        self.assertEqual(self.embedder.requests, [["a"], ["bb", "ccc"]])
+
+    def test_lru_eviction_and_ttl(self):
+        async def run():
+            await self.cache.embed("a")
+            await self.cache.embed("b")
+            await self.cache.embed("a")
+            await self.cache.embed("c")
+
+        asyncio.run(run())
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get_stats()['evictions'], 1)
+
+        self.clock.now = 61
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get_stats()['expired'], 1)
+
+    def test_failures_reach_every_waiter_and_are_not_cached(self):
+        async def run():
+            self.embedder.release = asyncio.Event()
+            self.embedder.error = RuntimeError("rate limited")
+            tasks = [asyncio.create_task(self.cache.embed("q")) for _ in range(2)]
+            await asyncio.sleep(0)
+            self.embedder.release.set()
+            return await asyncio.gather(*tasks, return_exceptions=True)
+
+        results = asyncio.run(run())
+
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(len(self.cache), 0)
+        self.embedder.release = self.embedder.error = None
+        self.assertEqual(asyncio.run(self.cache.embed("q"))[0], 1.0)
+
+    def test_cancelled_owner_lets_waiters_retry(self):
+        async def run():
+            self.embedder.release = asyncio.Event()
+            owner = asyncio.create_task(self.cache.embed("q"))
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(self.cache.embed("q"))
+            await asyncio.sleep(0)
+            owner.cancel()
+            await asyncio.sleep(0)
+            self.embedder.release.set()
+            return await waiter
+
+        self.assertEqual(asyncio.run(run())[0], 1.0)
+        self.assertEqual(len(self.embedder.requests), 2)
+
+    def test_sync_get_and_put(self):
+        self.assertIsNone(self.cache.get("Fever"))
+        stored = self.cache.put("Fever", [0.5, 0.5])
+
+        self.assertIs(self.cache.get("fever"), stored)
+        self.assertEqual(asyncio.run(self.cache.embed("FEVER"))[0], 0.5)
+        self.assertEqual(self.embedder.requests, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+# test_text_chunker.py
+
+import unittest
+from app.services.text_chunker import StructuredChunker, TextBlock, HEADING, PARAGRAPH, blocks_from_text
+
+def _document_text(blocks):
+    return '\n'.join(block.text for block in blocks)
+
+class TestBlocksFromText(unittest.TestCase):
+    def test_detects_headings_and_paragraphs(self):
+        text = "1. INTRODUCCIÓN\nEste protocolo aplica a\ntodos los servicios.\n\n## Dosis\nAdministrar 10 mg/kg."
+
+        blocks = blocks_from_text(text, page=3)
+
+        self.assertEqual(blocks, [
+            TextBlock("1. INTRODUCCIÓN", HEADING, 3),
+            TextBlock("Este protocolo aplica a todos los servicios.", PARAGRAPH, 3),
+            TextBlock("Dosis", HEADING, 3),
+            TextBlock("Administrar 10 mg/kg.", PARAGRAPH, 3)
+        ])
+
+    def test_sentence_lines_end_paragraphs_without_blank_lines(self):
+        blocks = blocks_from_text("First line of text\ncontinues here.\nSecond paragraph.")
+
+        self.assertEqual([block.text for block in blocks], ["First line of text continues here.", "Second paragraph."])
+
+class TestStructuredChunker(unittest.TestCase):
+    def test_packs_paragraphs_within_sections(self):
+        blocks = [
+            TextBlock("Dosage", HEADING, 1),
+            TextBlock("one two three four five six seven eight.", PARAGRAPH, 1),
+            TextBlock("nine ten eleven twelve.", PARAGRAPH, 2),
+            TextBlock("Wound care", HEADING, 2),
+            TextBlock("clean the wound daily with saline solution.", PARAGRAPH, 2)
+        ]
+
+        chunks = list(StructuredChunker(chunk_size=16).chunk(blocks))
+
+        self.assertEqual([chunk.section for chunk in chunks], ["Dosage", "Wound care"])
+        self.assertEqual(chunks[0].text, "Dosage\none two three four five six seven eight.\nnine ten eleven twelve.")
+        self.assertEqual((chunks[0].page_start, chunks[0].page_end), (1, 2))
+        text = _document_text(blocks)
+        for chunk in chunks:
+            self.assertEqual(text[chunk.char_start:chunk.char_end], chunk.text)
+
+    def test_splits_long_paragraphs_at_sentences_without_overlap(self):
+        paragraph = " ".join(f"Sentence {i} has five words." for i in range(10))
+        blocks = [TextBlock(paragraph, PARAGRAPH, 1)]
+
+        chunks = list(StructuredChunker(chunk_size=12).chunk(blocks))
+
+        self.assertEqual(len(chunks), 5)
+        self.assertTrue(all(len(chunk.text.split()) <= 12 for chunk in chunks))
+        self.assertEqual(' '.join(chunk.text for chunk in chunks), paragraph)
+        for chunk in chunks:
+            self.assertEqual(paragraph[chunk.char_start:chunk.char_end], chunk.text)
+
+    def test_overlap_carries_trailing_sentences(self):
+        paragraph = " ".join(f"Sentence {i} has five words." for i in range(4))
+
+        chunks = list(StructuredChunker(chunk_size=10, chunk_overlap=5).chunk([TextBlock(paragraph)]))
+
+        self.assertTrue(chunks[1].text.startswith("Sentence 1 has five words."))
+        self.assertLess(chunks[1].char_start, chunks[0].char_end)
+
+    def test_cuts_sentences_longer_than_a_chunk(self):
+        chunks = list(StructuredChunker(chunk_size=4).chunk([TextBlock("a b c d e f g h i j")]))
+
+        self.assertEqual([chunk.text for chunk in chunks], ["a b c d", "e f g h", "i j"])
+        self.assertEqual([chunk.char_start for chunk in chunks], [0, 8, 16])
+
+if __name__ == "__main__":
+    unittest.main()
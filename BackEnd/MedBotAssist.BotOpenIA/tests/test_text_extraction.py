@@ -0,0 +1,88 @@
+# test_text_extraction.py
+
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from app.services.text_chunker import TextBlock, HEADING, PARAGRAPH
+from app.services.text_extraction import (
+    UnsupportedFileType, detect_file_kind, extract_blocks, extract_pdf_pages, pdf_page_count
+)
+
+def _pdf(pages):
+    """Build a minimal PDF with one line of Helvetica text per page."""
+    count = len(pages)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(count))}] /Count {count} >>"
+    ]
+    for i, text in enumerate(pages):
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+                       f"/Resources << /Font << /F1 {3 + 2 * count} 0 R >> >> >>")
+        operations = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(operations)} >>\nstream\n{operations}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    content, offsets = b"%PDF-1.4\n", []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(content))
+        content += f"{number} 0 obj\n{obj}\nendobj\n".encode()
+    xref = len(content)
+    content += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    content += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    content += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF".encode()
+    return content
+
+class TestTextExtraction(unittest.TestCase):
+    def test_detects_file_kind(self):
+        self.assertEqual(detect_file_kind('guide.PDF', ''), 'pdf')
+        self.assertEqual(detect_file_kind('protocol', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'), 'docx')
+        self.assertEqual(detect_file_kind('notes.md', 'application/octet-stream'), 'text')
+        self.assertEqual(detect_file_kind('page.htm', ''), 'html')
+        with self.assertRaises(UnsupportedFileType):
+            detect_file_kind('archive.zip', 'application/zip')
+
+    def test_html_headings_and_text(self):
+        html = b"<html><style>p {}</style><h2>Dosis</h2><p>Administrar 10 mg/kg.</p><script>x()</script></html>"
+
+        self.assertEqual(extract_blocks(html, 'html'), [
+            TextBlock("Dosis", HEADING),
+            TextBlock("Administrar 10 mg/kg.", PARAGRAPH)
+        ])
+        self.assertEqual(extract_blocks("## Dosis\n\nTexto.".encode(), 'text')[0], TextBlock("Dosis", HEADING))
+
+    def test_pdf_page_ranges(self):
+        descriptor, path = tempfile.mkstemp(suffix='.pdf')
+        try:
+            with os.fdopen(descriptor, 'wb') as pdf_file:
+                pdf_file.write(_pdf([f"Page {n} text." for n in range(1, 6)]))
+
+            self.assertEqual(pdf_page_count(path), 5)
+            blocks = extract_pdf_pages(path, 2, 4) + extract_pdf_pages(path, 4, 8)
+            self.assertEqual([(block.text, block.page) for block in blocks],
+                             [("Page 3 text.", 3), ("Page 4 text.", 4), ("Page 5 text.", 5)])
+        finally:
+            os.remove(path)
+
+    def test_pdf_threads_do_not_share_readers(self):
+        paths = []
+        try:
+            for name in ("a", "b"):
+                descriptor, path = tempfile.mkstemp(suffix='.pdf')
+                with os.fdopen(descriptor, 'wb') as pdf_file:
+                    pdf_file.write(_pdf([f"File {name} page {n}." for n in range(1, 4)]))
+                paths.append(path)
+
+            # Alternating files across threads must always read the requested file
+            tasks = [(paths[i % 2], i % 3) for i in range(60)]
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                results = list(executor.map(lambda task: extract_pdf_pages(task[0], task[1], task[1] + 1), tasks))
+            for (path, page), blocks in zip(tasks, results):
+                name = "a" if path == paths[0] else "b"
+                self.assertEqual([block.text for block in blocks], [f"File {name} page {page + 1}."])
+        finally:
+            for path in paths:
+                os.remove(path)
+
+if __name__ == "__main__":
+    unittest.main()
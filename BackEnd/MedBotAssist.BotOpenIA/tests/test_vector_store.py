@@ -0,0 +1,229 @@
+# test_vector_store.py
+
+import tempfile
+import unittest
+import numpy as np
+from app.services.vector_store import InMemoryVectorStore
+
+def _metadata(filename, index):
+    return {'filename': filename, 'chunk_index': index}
+
+class TestInMemoryVectorStore(unittest.TestCase):
+    def setUp(self):
+        self.store = InMemoryVectorStore(initial_capacity=2)
+
+    def test_search_ranks_by_cosine_similarity(self):
+        self.store.add_documents(
+            ids=['a', 'b', 'c'],
+            contents=['alpha', 'beta', 'gamma'],
+            embeddings=[[1.0, 0.0], [0.0, 3.0], [1.0, 1.0]],
+            metadatas=[_metadata('f.pdf', i) for i in range(3)]
+        )
+
+        results = self.store.search([2.0, 0.1], top_k=2)
+
+        self.assertEqual([r['id'] for r in results], ['a', 'c'])
+        self.assertAlmostEqual(results[0]['similarity_score'], 0.99875, places=4)
+        self.assertEqual(results[1]['content'], 'gamma')
+
+    def test_matrix_grows_and_keeps_rows(self):
+        for i in range(9):
+            self.store.add_documents([f'id{i}'], [f'text {i}'], [[float(i + 1), 1.0]], [_metadata('f.pdf', i)])
+
+        self.assertEqual(len(self.store), 9)
+        self.assertEqual(self.store.embeddings.dtype, np.float32)
+        norms = np.linalg.norm(self.store.embeddings, axis=1)
+        np.testing.assert_allclose(norms, np.ones(9), rtol=1e-6)
+        self.assertEqual(self.store.search([9.0, 1.0], top_k=1)[0]['id'], 'id8')
+
+    def test_existing_id_overwrites_row(self):
+        self.store.add_documents(['a'], ['old'], [[1.0, 0.0]], [_metadata('f.pdf', 0)])
+        self.store.add_documents(['a'], ['new'], [[0.0, 1.0]], [_metadata('f.pdf', 0)])
+
+        self.assertEqual(len(self.store), 1)
+        result = self.store.search([0.0, 1.0], top_k=5)
+        self.assertEqual(result[0]['content'], 'new')
+        self.assertAlmostEqual(result[0]['similarity_score'], 1.0, places=5)
+
+    def test_remove_documents_compacts_rows(self):
+        self.store.add_documents(
+            ids=['a', 'b', 'c'],
+            contents=['alpha', 'beta', 'gamma'],
+            embeddings=[[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]],
+            metadatas=[_metadata('f.pdf', 0), _metadata('g.pdf', 0), _metadata('f.pdf', 1)]
+        )
+
+        self.assertEqual(self.store.remove_documents(['a', 'missing']), 1)
+
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual([self.store.documents[i].row for i in ('b', 'c')], [0, 1])
+        self.assertEqual(self.store.search([1.0, 0.0], top_k=1)[0]['id'], 'c')
+
+    def test_compressed_storage_matches_float32_ranking(self):
+        rng = np.random.default_rng(7)
+        vectors = rng.normal(size=(200, 32))
+        query = vectors[17] + rng.normal(scale=0.1, size=32)
+        ids = [f'id{i}' for i in range(200)]
+        metadatas = [_metadata('f.pdf', i) for i in range(200)]
+
+        exact = InMemoryVectorStore()
+        exact.add_documents(ids, ids, vectors, metadatas)
+        expected = exact.search(query, top_k=1)[0]
+
+        for storage, rerank in (('float16', 0), ('int8', 0), ('int8', 10)):
+            with self.subTest(storage=storage, rerank=rerank):
+                store = InMemoryVectorStore(storage=storage, rerank_candidates=rerank)
+                store.add_documents(ids, ids, vectors, metadatas)
+                store.remove_documents(['id3'])
+
+                best = store.search(query, top_k=1)[0]
+                self.assertEqual(best['id'], expected['id'])
+                self.assertAlmostEqual(best['similarity_score'], expected['similarity_score'], places=2)
+                if rerank:
+                    self.assertAlmostEqual(best['similarity_score'], expected['similarity_score'], places=5)
+
+        int8_store = InMemoryVectorStore(storage='int8')
+        int8_store.add_documents(ids, ids, vectors, metadatas)
+        self.assertLess(int8_store.nbytes, exact.nbytes / 3)
+
+    def test_filtered_search_scores_only_matching_rows(self):
+        self.store.add_documents(
+            ids=['a', 'b', 'c', 'd'],
+            contents=['alpha', 'beta', 'gamma', 'delta'],
+            embeddings=[[1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [0.1, 0.9]],
+            metadatas=[
+                {'filename': 'f.pdf', 'file_type': 'application/pdf', 'last_modified': 'Mon, 01 Jan 2024 10:00:00 GMT'},
+                {'filename': 'g.docx', 'file_type': 'application/msword', 'last_modified': 'Fri, 01 Mar 2024 10:00:00 GMT'},
+                {'filename': 'g.docx', 'file_type': 'application/msword', 'last_modified': 'Fri, 01 Mar 2024 10:00:00 GMT'},
+                {'filename': 'h.pdf', 'file_type': 'application/pdf', 'last_modified': 'Sat, 01 Jun 2024 10:00:00 GMT'}
+            ]
+        )
+
+        # A file whose chunks are outside the global top-k is still searchable
+        results = self.store.search([1.0, 0.0], top_k=1, filters={'filename': 'h.pdf'})
+        self.assertEqual([r['id'] for r in results], ['d'])
+
+        results = self.store.search([1.0, 0.0], top_k=5, filters={'file_type': ['application/pdf']})
+        self.assertEqual([r['id'] for r in results], ['a', 'd'])
+
+        results = self.store.search([1.0, 0.0], top_k=5, filters={
+            'last_modified': {'gte': '2024-02-01', 'lt': '2024-05-01'},
+            'filename': 'g.docx'
+        })
+        self.assertEqual([r['id'] for r in results], ['b', 'c'])
+
+        self.assertEqual(self.store.search([1.0, 0.0], filters={'filename': 'missing.pdf'}), [])
+        with self.assertRaises(ValueError):
+            self.store.search([1.0, 0.0], filters={'content': 'alpha'})
+
+    def test_search_batch_matches_single_queries(self):
+        rng = np.random.default_rng(11)
+        vectors = rng.normal(size=(50, 16))
+        queries = rng.normal(size=(4, 16))
+        ids = [f'id{i}' for i in range(50)]
+        metadatas = [{'filename': 'f.pdf' if i % 2 else 'g.pdf'} for i in range(50)]
+
+        for storage, rerank in (('float32', 0), ('int8', 0), ('int8', 5)):
+            with self.subTest(storage=storage, rerank=rerank):
+                store = InMemoryVectorStore(storage=storage, rerank_candidates=rerank)
+                store.add_documents(ids, ids, vectors, metadatas)
+
+                for filters in (None, {'filename': 'g.pdf'}):
+                    batch = store.search_batch(queries, top_k=3, filters=filters)
+                    self.assertEqual(len(batch), 4)
+                    for query, results in zip(queries, batch):
+                        expected = store.search(query, top_k=3, filters=filters)
+                        self.assertEqual([r['id'] for r in results], [r['id'] for r in expected])
+                        for got, want in zip(results, expected):
+                            self.assertAlmostEqual(got['similarity_score'], want['similarity_score'], places=5)
+
+        self.assertEqual(InMemoryVectorStore().search_batch(queries), [[], [], [], []])
+
+    def test_filters_follow_overwrites_and_removals(self):
+        self.store.add_documents(['a', 'b'], ['x', 'y'], [[1.0, 0.0], [0.0, 1.0]],
+                                 [{'filename': 'f.pdf'}, {'filename': 'g.pdf'}])
+        self.store.add_documents(['a'], ['x'], [[1.0, 0.0]], [{'filename': 'g.pdf'}])
+        self.store.remove_documents(['b'])
+
+        self.assertEqual(self.store.find_ids({'filename': 'g.pdf'}), ['a'])
+        self.assertEqual(self.store.find_ids({'filename': 'f.pdf'}), [])
+
+    def test_neighbors_stay_within_file(self):
+        self.store.add_documents(
+            ids=['f0', 'f1', 'f2', 'g0'],
+            contents=['a', 'b', 'c', 'd'],
+            embeddings=[[1.0, 0.0]] * 4,
+            metadatas=[_metadata('f.pdf', 0), _metadata('f.pdf', 1), _metadata('f.pdf', 2), _metadata('g.pdf', 0)]
+        )
+
+        self.assertEqual([d.id for d in self.store.neighbors('f1')], ['f0', 'f1', 'f2'])
+        self.assertEqual([d.id for d in self.store.neighbors('f2')], ['f1', 'f2'])
+        self.assertEqual([d.id for d in self.store.neighbors('g0', window=2)], ['g0'])
+
+        # Rows of a file that are no longer contiguous are found through its postings
+        self.store.remove_documents(['f1'])
+        self.store.add_documents(['f1'], ['b'], [[1.0, 0.0]], [_metadata('f.pdf', 1)])
+        self.assertEqual([d.id for d in self.store.neighbors('f0')], ['f0', 'f1'])
+
+    def test_copy_is_independent(self):
+        self.store.add_documents(['a', 'b'], ['x', 'y'], [[1.0, 0.0], [0.0, 1.0]],
+                                 [_metadata('f.pdf', 0), _metadata('g.pdf', 0)])
+        copy = self.store.copy()
+
+        copy.remove_documents(['a'])
+        copy.add_documents(['c'], ['z'], [[1.0, 0.1]], [_metadata('f.pdf', 1)])
+
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual(self.store.search([1.0, 0.0], top_k=1)[0]['id'], 'a')
+        self.assertEqual(self.store.find_ids({'filename': 'f.pdf'}), ['a'])
+        self.assertEqual(len(copy), 2)
+        self.assertEqual(copy.search([1.0, 0.0], top_k=1)[0]['id'], 'c')
+        self.assertEqual(sorted(copy.find_ids({'filename': 'f.pdf'})), ['c'])
+
+    def test_clear(self):
+        self.store.add_documents(['a'], ['x'], [[1.0, 0.0]], [_metadata('f.pdf', 0)])
+        self.store.clear()
+
+        self.assertEqual(len(self.store), 0)
+        self.assertEqual(self.store.search([1.0, 0.0]), [])
+
+    def test_save_and_load_round_trip(self):
+        self.store.add_documents(
+            ids=['a', 'b'],
+            contents=['alpha', 'beta'],
+            embeddings=[[1.0, 0.0], [0.0, 1.0]],
+            metadatas=[_metadata('f.pdf', 0), _metadata('f.pdf', 1)]
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.store.save(directory)
+            loaded = InMemoryVectorStore()
+            self.assertTrue(loaded.load(directory))
+
+            self.assertIsInstance(loaded.embeddings, np.memmap)
+            self.assertEqual(loaded.documents['b'].metadata, _metadata('f.pdf', 1))
+            self.assertEqual(loaded.search([0.0, 1.0], top_k=1)[0]['id'], 'b')
+
+            # Appending copies the read-only mapping into a writable matrix
+            loaded.add_documents(['c'], ['gamma'], [[1.0, 1.0]], [_metadata('g.pdf', 0)])
+            self.assertEqual(len(loaded), 3)
+            self.assertEqual(loaded.search([1.0, 1.0], top_k=1)[0]['id'], 'c')
+
+    def test_map_embeddings_after_save(self):
+        self.store.add_documents(['a', 'b'], ['alpha', 'beta'], [[1.0, 0.0], [0.0, 1.0]],
+                                 [_metadata('f.pdf', 0), _metadata('f.pdf', 1)])
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.store.save(directory)
+            self.assertTrue(self.store.map_embeddings(directory))
+
+            self.assertIsInstance(self.store.embeddings, np.memmap)
+            self.assertEqual(self.store.search([0.0, 1.0], top_k=1)[0]['id'], 'b')
+            self.assertFalse(InMemoryVectorStore(storage='int8').map_embeddings(directory))
+
+    def test_load_missing_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertFalse(self.store.load(directory))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+# test_worker_coordination.py
+
+import asyncio
+import os
+import tempfile
+import unittest
+from app.services.worker_coordination import FileLock, SharedIndexLock
+
+class TestFileLock(unittest.TestCase):
+    def test_one_holder_at_a_time(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'locks', 'leader.lock')
+            first, second = FileLock(path), FileLock(path)
+
+            self.assertTrue(first.try_acquire())
+            self.assertTrue(first.try_acquire())
+            self.assertFalse(second.try_acquire())
+
+            first.release()
+            self.assertFalse(first.is_held)
+            self.assertTrue(second.try_acquire())
+            second.release()
+
+class TestSharedIndexLock(unittest.TestCase):
+    def test_writers_in_different_locks_are_serialized(self):
+        async def scenario():
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'write.lock')
+                catch_ups = []
+                events = []
+
+                async def catch_up():
+                    catch_ups.append(len(events))
+
+                # Two locks on one file stand in for two worker processes
+                worker_a = SharedIndexLock(path, on_acquire=catch_up)
+                worker_b = SharedIndexLock(path, on_acquire=catch_up)
+
+                async def write(lock, name):
+                    async with lock:
+                        events.append(f'{name} start')
+                        await asyncio.sleep(0.05)
+                        events.append(f'{name} end')
+
+                await asyncio.gather(write(worker_a, 'a'), write(worker_b, 'b'))
+
+                self.assertEqual(events, ['a start', 'a end', 'b start', 'b end'])
+                self.assertEqual(catch_ups, [0, 2])
+                self.assertFalse(worker_a.locked() or worker_b.locked())
+
+        asyncio.run(scenario())
+
+    def test_cancelled_waiter_releases_its_locks(self):
+        async def scenario():
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'write.lock')
+                holder = FileLock(path)
+                holder.try_acquire()
+                waiter = SharedIndexLock(path)
+
+                async def write():
+                    async with waiter:
+                        pass
+
+                task = asyncio.create_task(write())
+                await asyncio.sleep(0.05)
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                holder.release()
+
+                self.assertFalse(waiter.locked())
+                async with waiter:
+                    self.assertTrue(waiter.locked())
+
+        asyncio.run(scenario())
+
+if __name__ == "__main__":
+    unittest.main()